@@ -0,0 +1,68 @@
+"""
+Script para analizar los tiempos por fase de los marcajes
+Lee src/logs/tiempos_ejecuciones.jsonl (y su rotación .1) y muestra p50/p95 por fase
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.metricas import TIEMPOS_FILE, FASES, percentil, archivo_respaldo
+
+def leer_registros(desde: datetime):
+    """Lee los registros de tiempos posteriores a la fecha indicada"""
+    registros = []
+    # Primero el archivo rotado (más antiguo) para conservar el orden
+    for archivo in (archivo_respaldo(TIEMPOS_FILE), TIEMPOS_FILE):
+        if not archivo.exists():
+            continue
+        with open(archivo, 'r', encoding='utf-8') as f:
+            for linea in f:
+                try:
+                    registro = json.loads(linea)
+                    if datetime.fromisoformat(registro['ts']) >= desde:
+                        registros.append(registro)
+                except (ValueError, KeyError):
+                    continue  # Línea incompleta o corrupta
+    return registros
+
+def main():
+    parser = argparse.ArgumentParser(description="Percentiles de latencia por fase")
+    parser.add_argument('--dias', type=int, default=28, help="Ventana de análisis en días (default: 28)")
+    parser.add_argument('--operacion', choices=['run', 'verificar_estado'], default=None)
+    args = parser.parse_args()
+    
+    desde = datetime.now() - timedelta(days=args.dias)
+    registros = leer_registros(desde)
+    if args.operacion:
+        registros = [r for r in registros if r.get('op') == args.operacion]
+    
+    print("=" * 70)
+    print(f"⏱️  LATENCIA POR FASE - Últimos {args.dias} días ({len(registros)} ejecuciones)")
+    print("=" * 70)
+    
+    if not registros:
+        print("❌ No hay registros de tiempos en el periodo")
+        return
+    
+    muestras = {}
+    for registro in registros:
+        for nombre, ms in registro.get('fases', {}).items():
+            muestras.setdefault(nombre, []).append(ms)
+        muestras.setdefault('TOTAL', []).append(registro.get('total_ms', 0))
+    
+    orden = [f for f in FASES if f in muestras] + sorted(f for f in muestras if f not in FASES)
+    print(f"{'Fase':12} {'n':>6} {'p50 (ms)':>10} {'p95 (ms)':>10} {'máx (ms)':>10}")
+    print("-" * 70)
+    for nombre in orden:
+        valores = sorted(muestras[nombre])
+        print(f"{nombre:12} {len(valores):>6} {percentil(valores, 0.50):>10.0f} "
+              f"{percentil(valores, 0.95):>10.0f} {valores[-1]:>10.0f}")
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark de la aritmética de días hábiles: versión vectorizada (numpy)
+frente al recorrido día a día con es_dia_laborable
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.festivos_colombia import es_dia_laborable
+from src import dias_habiles
+
+def contar_escalar(inicio: date, fin: date) -> int:
+    """Días hábiles en [inicio, fin) recorriendo día a día"""
+    total = 0
+    dia = inicio
+    while dia < fin:
+        if es_dia_laborable(dia):
+            total += 1
+        dia += timedelta(days=1)
+    return total
+
+def desplazar_escalar(fecha: date, n: int) -> date:
+    """Suma n días hábiles (n >= 0) recorriendo día a día"""
+    while not es_dia_laborable(fecha):
+        fecha += timedelta(days=1)
+    while n > 0:
+        fecha += timedelta(days=1)
+        if es_dia_laborable(fecha):
+            n -= 1
+    return fecha
+
+def medir(nombre: str, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    print(f"   {nombre:32} {duracion * 1000:10.1f} ms")
+    return resultado, duracion
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de días hábiles (numpy vs escalar)")
+    parser.add_argument('--empleados', type=int, default=5000, help="Rangos de fechas a conciliar")
+    parser.add_argument('--dias-max', type=int, default=60, help="Longitud máxima de cada rango")
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    if dias_habiles.np is None:
+        print("❌ numpy no está instalado: pip install numpy")
+        sys.exit(1)
+    np = dias_habiles.np
+
+    rng = random.Random(args.semilla)
+    base = date(date.today().year, 1, 1)
+    inicios = [base + timedelta(days=rng.randrange(365)) for _ in range(args.empleados)]
+    fines = [inicio + timedelta(days=rng.randrange(1, args.dias_max)) for inicio in inicios]
+    desplazamientos = [rng.randrange(0, 30) for _ in range(args.empleados)]
+
+    print("=" * 60)
+    print(f"⏱️ Días hábiles para {args.empleados} empleados (rangos de hasta {args.dias_max} días)")
+    print("=" * 60)
+
+    # Calentar el calendario precalculado y el de numpy antes de medir
+    dias_habiles.es_dia_habil(inicios + fines)
+
+    print("\n📊 Conteo de días hábiles entre fechas:")
+    escalar, t_escalar = medir("es_dia_laborable día a día", lambda: [contar_escalar(i, f) for i, f in zip(inicios, fines)])
+    vector, t_vector = medir("dias_habiles_entre", lambda: dias_habiles.dias_habiles_entre(inicios, fines))
+    assert list(vector) == escalar, "Los conteos no coinciden"
+    print(f"   Aceleración: x{t_escalar / max(t_vector, 1e-9):.0f}")
+
+    print("\n📊 Sumar N días hábiles:")
+    escalar, t_escalar = medir("es_dia_laborable día a día", lambda: [desplazar_escalar(i, n) for i, n in zip(inicios, desplazamientos)])
+    vector, t_vector = medir("desplazar_dias_habiles", lambda: dias_habiles.desplazar_dias_habiles(inicios, desplazamientos))
+    assert [d.astype(object) for d in vector] == escalar, "Los desplazamientos no coinciden"
+    print(f"   Aceleración: x{t_escalar / max(t_vector, 1e-9):.0f}")
+
+    print("\n📊 Máscara de días hábiles del año:")
+    fin_año = date(base.year, 12, 31)
+    dias = [base + timedelta(days=i) for i in range((fin_año - base).days + 1)]
+    escalar, t_escalar = medir("es_dia_laborable día a día", lambda: [es_dia_laborable(d) for d in dias])
+    (_, vector), t_vector = medir("mascara_dias_habiles", lambda: dias_habiles.mascara_dias_habiles(base, fin_año))
+    assert np.array_equal(vector, escalar), "Las máscaras no coinciden"
+    print(f"   Aceleración: x{t_escalar / max(t_vector, 1e-9):.0f}")
+
+    print("\n✅ Resultados idénticos en ambas versiones")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark de extremo a extremo contra el simulador local de GeoVictoria
+Mide throughput y latencia por fase de todo el flujo (navegador, login, iframe,
+botón y clic) sin tocar el portal real
+"""
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import src.cache_estado as cache_estado
+import src.circuito as circuito
+import src.metricas as metricas
+import src.sesiones as sesiones
+from src.geovictoria import Config
+from src.lote import run_lote, formatear_resultados
+from src.simulador_geovictoria import SimuladorGeoVictoria, OpcionesSimulador, ESCENARIOS
+
+async def ejecutar_benchmark(args, simulador):
+    cuentas = [{'usuario': f"bench_{i:03d}", 'password': "clave"} for i in range(args.cuentas)]
+    
+    rondas = []
+    resultados = []
+    for ronda in range(1, args.rondas + 1):
+        inicio = time.perf_counter()
+        resultados = await run_lote(cuentas, None, args.concurrencia)
+        duracion = time.perf_counter() - inicio
+        marcados = sum(1 for r in resultados if r['estado'] == 'MARCADO')
+        rondas.append((ronda, duracion, marcados))
+    return rondas, resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark local del flujo de marcaje")
+    parser.add_argument('--cuentas', type=int, default=10, help="Cuentas por ronda")
+    parser.add_argument('--rondas', type=int, default=3, help="Rondas (la 1ª incluye logins, las siguientes reutilizan sesión)")
+    parser.add_argument('--concurrencia', type=int, default=Config.LOTE_MAX_CONCURRENCIA)
+    parser.add_argument('--latencia-iframe', type=int, default=300)
+    parser.add_argument('--latencia-boton', type=int, default=200)
+    parser.add_argument('--prob-sin-iframe', type=float, default=0.0)
+    parser.add_argument('--prob-error-login', type=float, default=0.0)
+    parser.add_argument('--con-ventana', action='store_true', help="Navegadores visibles")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--escenario', choices=sorted(ESCENARIOS), default='normal',
+                        help="Escenario del simulador (render_lento: botones 8 s después del iframe)")
+    args = parser.parse_args()
+    
+    valores = dict(
+        latencia_iframe=args.latencia_iframe, latencia_boton=args.latencia_boton,
+        prob_sin_iframe=args.prob_sin_iframe, prob_error_login=args.prob_error_login,
+        semilla=args.semilla
+    )
+    valores.update(ESCENARIOS[args.escenario])
+    args.latencia_boton = valores['latencia_boton']
+    opciones = OpcionesSimulador(**valores)
+    simulador = SimuladorGeoVictoria(0, opciones).iniciar()
+    simulador.configurar_geovictoria()
+    Config.HEADLESS = not args.con_ventana
+    
+    # No mezclar los tiempos del benchmark con los de producción
+    metricas.TIEMPOS_FILE = metricas.TIEMPOS_FILE.with_name("tiempos_benchmark.jsonl")
+    
+    # Circuito, caché y sesiones del benchmark en un directorio temporal: los fallos
+    # inyectados no deben abrir el circuito real ni dejar estados del simulador
+    directorio = Path(tempfile.mkdtemp(prefix="benchmark_geovictoria_"))
+    circuito._circuito_geovictoria = circuito.Circuito("GeoVictoria (benchmark)",
+                                                       archivo=directorio / "circuito.json")
+    cache_estado._cache_global = cache_estado.CacheEstado(ttl_segundos=60, ttl_duro_segundos=900,
+                                                          archivo=directorio / "cache_estado.db")
+    sesiones._almacen_global = sesiones.AlmacenSesiones(directorio / "sesiones")
+    
+    try:
+        rondas, resultados = asyncio.run(ejecutar_benchmark(args, simulador))
+    finally:
+        simulador.detener()
+        # ignore_errors: en Windows la base SQLite puede seguir abierta
+        shutil.rmtree(directorio, ignore_errors=True)
+    
+    print("\n" + "=" * 70)
+    print("🧪 BENCHMARK LOCAL - Simulador GeoVictoria")
+    print("=" * 70)
+    print(f"Cuentas: {args.cuentas} | Concurrencia: {args.concurrencia} | "
+          f"Latencia iframe: {args.latencia_iframe} ms | Latencia botón: {args.latencia_boton} ms")
+    print("-" * 70)
+    for ronda, duracion, marcados in rondas:
+        print(f"Ronda {ronda}: {duracion:6.2f}s | {marcados}/{args.cuentas} marcados | "
+              f"{marcados / duracion:6.2f} marcajes/s")
+    print("-" * 70)
+    print("Latencia por fase (ms):")
+    for nombre, datos in metricas.get_histogramas().percentiles().items():
+        print(f"  {nombre:22} n={datos['n']:<5} p50={datos['p50']:>8.0f} p95={datos['p95']:>8.0f} máx={datos['max']:>8.0f}")
+    print("-" * 70)
+    print(f"Simulador: {simulador.contadores()}")
+    print("-" * 70)
+    print("Última ronda:")
+    print(formatear_resultados(resultados))
+    print("=" * 70)
+
+if __name__ == "__main__":
+    main()
@@ -87,15 +87,15 @@ REM ============================================================================
 echo [4/6] Verificando registro de ejecuciones...
 echo ----------------------------------------
 
-if exist "src\logs\registro_ejecuciones.json" (
+if exist "src\logs\registro_ejecuciones.db" (
     echo     [OK] Archivo de registro encontrado
     echo.
     echo     Ultimas ejecuciones:
     echo     ----------------------------------------
-    python -c "import json; f=open('src/logs/registro_ejecuciones.json','r',encoding='utf-8'); data=json.load(f); f.close(); import sys; [print(f'     {fecha}: {list(marcajes.keys())}') for fecha, marcajes in sorted(data.items(), reverse=True)[:7]]" 2>NUL
+    python -c "from src.registro_ejecuciones import get_registro; data=get_registro().como_dict(); [print(f'     {fecha}: {list(marcajes.keys())}') for fecha, marcajes in sorted(data.items(), reverse=True)[:7]]" 2>NUL
     if errorlevel 1 (
-        echo     [ERROR] No se pudo leer el archivo JSON
-        echo     [SOLUCION] El archivo puede estar corrupto
+        echo     [ERROR] No se pudo leer el registro de ejecuciones
+        echo     [SOLUCION] Ejecute scripts\diagnostico_sistema.py para mas detalles
     )
 ) else (
     echo     [ADVERTENCIA] No existe registro de ejecuciones
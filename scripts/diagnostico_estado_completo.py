@@ -1,6 +1,7 @@
 """
 Script para verificar el estado actual del sistema de marcajes
 """
+import asyncio
 import sys
 import json
 from datetime import datetime, date
@@ -82,7 +83,7 @@ def main():
     print("=" * 80)
     
     # Ejecutar verificación
-    verificar_marcajes_pendientes()
+    asyncio.run(verificar_marcajes_pendientes())
     
     print("\n" + "=" * 80)
     print("✅ DIAGNÓSTICO COMPLETADO")
@@ -20,9 +20,13 @@ except (ImportError, AttributeError):
     # Si colorama no está disponible, usar texto plano
     GREEN = YELLOW = RED = RESET = ""
 
+# Agregar el directorio raíz al path (registro de ejecuciones en src/)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
 script_dir = Path(__file__).parent.parent / "src" / "logs"
-registro_file = script_dir / "registro_ejecuciones.json"
+registro_file = script_dir / "registro_ejecuciones.db"
 lock_file = script_dir / "programador.lock"
+circuito_file = script_dir / "circuito_geovictoria.json"
 
 def print_header(text):
     print("\n" + "=" * 70)
@@ -109,13 +113,15 @@ def verificar_registro_ejecuciones():
     """Verifica el registro de ejecuciones"""
     print_header("REGISTRO DE EJECUCIONES")
     
-    if not registro_file.exists():
+    # El registro JSON antiguo se migra al abrirlo; el journal es el almacenamiento alternativo
+    if not any(ruta.exists() for ruta in (registro_file, registro_file.with_suffix('.json'),
+                                          registro_file.with_suffix('.journal.jsonl'))):
         print_warning("Archivo de registro no existe")
         return
     
     try:
-        with open(registro_file, 'r', encoding='utf-8') as f:
-            registro = json.load(f)
+        from src.registro_ejecuciones import get_registro
+        registro = get_registro().como_dict()
         
         hoy = date.today().isoformat()
         
@@ -174,6 +180,38 @@ def verificar_registro_ejecuciones():
     except Exception as e:
         print_error(f"Error leyendo registro: {e}")
 
+def verificar_circuito():
+    """Verifica el estado del circuit breaker del portal de GeoVictoria"""
+    print_header("CIRCUITO GEOVICTORIA")
+    
+    if not circuito_file.exists():
+        print_ok("Sin fallos registrados (circuito cerrado)")
+        return
+    
+    try:
+        with open(circuito_file, 'r', encoding='utf-8') as f:
+            circuito = json.load(f)
+        
+        estado = circuito.get('estado', 'cerrado')
+        fallos = circuito.get('fallos_consecutivos', 0)
+        if estado == 'cerrado':
+            print_ok(f"Circuito cerrado (fallos consecutivos: {fallos})")
+            return
+        
+        print_error(f"Circuito {estado.upper()} - Las consultas a GeoVictoria se están omitiendo")
+        print(f"  • Fallos consecutivos: {fallos}")
+        print(f"  • Último error: {circuito.get('ultimo_error') or 'N/A'}")
+        print(f"  • Consultas rechazadas: {circuito.get('rechazadas', 0)}")
+        if circuito.get('abierto_desde'):
+            abierto = datetime.fromtimestamp(circuito['abierto_desde'])
+            proxima = abierto.timestamp() + circuito.get('espera_s', 0)
+            print(f"  • Abierto desde: {abierto.strftime('%Y-%m-%d %H:%M:%S')}")
+            print(f"  • Próxima consulta de prueba: {datetime.fromtimestamp(proxima).strftime('%H:%M:%S')}")
+        print("  • Verifique la conexión y que el portal de GeoVictoria esté disponible")
+    
+    except Exception as e:
+        print_error(f"Error leyendo estado del circuito: {e}")
+
 def verificar_logs_recientes():
     """Verifica los logs más recientes"""
     print_header("LOGS RECIENTES")
@@ -220,6 +258,7 @@ def main():
     verificar_procesos()
     verificar_lock_file()
     verificar_registro_ejecuciones()
+    verificar_circuito()
     verificar_logs_recientes()
     
     print_header("RESUMEN")
@@ -45,7 +45,7 @@ echo NO CIERRE esta ventana - se ejecutara en segundo plano.
 echo.
 echo Para verificar que funciona, revise:
 echo   - src\logs\programador_[fecha].log
-echo   - Deberia ver mensajes cada hora
+echo   - Deberia ver la proxima verificacion de pendientes programada
 echo.
 echo Presione cualquier tecla para iniciar...
 pause >nul
@@ -2,40 +2,30 @@
 Script para limpiar el registro de ejecuciones de hoy
 Útil cuando se detectan marcajes incorrectos o duplicados
 """
-import json
 import sys
 from datetime import date
 from pathlib import Path
 
-# Obtener la ruta del archivo de registro
-script_dir = Path(__file__).parent.parent / "src" / "logs"
-registro_file = script_dir / "registro_ejecuciones.json"
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.registro_ejecuciones import get_registro
 
 def limpiar_registro_hoy():
-    """Elimina el registro del día de hoy del archivo JSON"""
+    """Elimina los marcajes de hoy del registro de ejecuciones"""
     try:
-        if not registro_file.exists():
-            print("ℹ️  Archivo de registro no encontrado")
-            return
-        
-        # Leer el registro actual
-        with open(registro_file, 'r', encoding='utf-8') as f:
-            registro = json.load(f)
-        
+        registro = get_registro()
         hoy = date.today().isoformat()
+        marcajes_hoy = registro.como_dict(dias=0).get(hoy, {})
         
-        if hoy in registro:
+        if marcajes_hoy:
             print(f"📅 Limpiando registro de {hoy}...")
             print(f"   Marcajes a eliminar:")
-            for tipo_marcaje, datos in registro[hoy].items():
+            for tipo_marcaje, datos in marcajes_hoy.items():
                 print(f"     • {tipo_marcaje}: {datos.get('hora', 'N/A')}")
             
             # Eliminar el registro de hoy
-            del registro[hoy]
-            
-            # Guardar el registro actualizado
-            with open(registro_file, 'w', encoding='utf-8') as f:
-                json.dump(registro, f, indent=2, ensure_ascii=False)
+            registro.eliminar(date.today())
             
             print(f"\n✅ Registro de {hoy} eliminado exitosamente")
             print("⚠️  Los marcajes programados se ejecutarán normalmente en sus horarios")
@@ -8,8 +8,8 @@ from pathlib import Path
 # Agregar el directorio raíz al path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.geovictoria import run, verificar_estado
-from src.programador import guardar_registro_ejecucion
+from src.geovictoria import run
+from src.programador import guardar_registro_ejecucion, verificar_estado_con_cache
 from datetime import date, datetime
 
 async def marcar_salida_emergencia():
@@ -23,7 +23,8 @@ async def marcar_salida_emergencia():
     # Verificar estado actual
     print("\n🔍 Verificando estado actual en GeoVictoria...")
     try:
-        boton_disponible = await verificar_estado()
+        # Reutiliza una consulta reciente del programador si la hay (caché compartido)
+        boton_disponible = await verificar_estado_con_cache()
         print(f"✅ Botón disponible: Marcar {boton_disponible}")
         
         if boton_disponible == "Entrada":
@@ -9,8 +9,8 @@ from pathlib import Path
 # Agregar el directorio raíz al path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.geovictoria import verificar_estado
-from src.programador import leer_registro_ejecuciones
+from src.programador import leer_registro_ejecuciones, verificar_estado_con_cache, esperar_refrescos_estado
+from src.cache_estado import get_cache, FRESCO, OBSOLETO
 from datetime import date
 
 async def main():
@@ -30,10 +30,19 @@ async def main():
         print("   • No hay registros para hoy")
     
     # Verificar estado real en GeoVictoria
-    print("\n🌐 Consultando estado real en GeoVictoria...")
-    print("   (Esto puede tardar unos segundos...)")
+    cache = get_cache()
+    frescura = cache.consultar()[1]
+    if frescura == FRESCO:
+        edad = cache.edad() or 0
+        print(f"\n📦 Usando el estado vigente del caché compartido (guardado hace {edad:.0f}s)")
+    elif frescura == OBSOLETO:
+        print("\n📦 Usando el último estado conocido del caché (se refresca en segundo plano)")
+    else:
+        print("\n🌐 Consultando estado real en GeoVictoria...")
+        print("   (Esto puede tardar unos segundos...)")
     
-    boton_disponible = await verificar_estado()
+    # Diagnóstico de solo lectura: un estado aproximado es suficiente
+    boton_disponible = await verificar_estado_con_cache(permitir_obsoleto=True)
     
     print("\n" + "=" * 80)
     print("📊 RESULTADO:")
@@ -66,6 +75,9 @@ async def main():
         print("   • Hay un problema de conexión")
     
     print("\n" + "=" * 80)
+    
+    # Completar el refresco en segundo plano antes de que asyncio.run() lo cancele
+    await esperar_refrescos_estado()
 
 if __name__ == "__main__":
     asyncio.run(main())
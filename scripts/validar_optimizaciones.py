@@ -43,7 +43,19 @@ try:
     estado = cache_test.get()
     assert estado is None, f"Expected None después de TTL, got '{estado}'"
     print("   ✅ Expiración por TTL funciona correctamente")
-    
+
+    # Probar stale-while-revalidate (TTL suave 1s, duro 3s)
+    from src.cache_estado import FRESCO, OBSOLETO, EXPIRADO
+    cache_swr = CacheEstado(ttl_segundos=1, ttl_duro_segundos=3)
+    cache_swr.set("Entrada")
+    assert cache_swr.consultar() == ("Entrada", FRESCO), "Entrada nueva debería estar fresca"
+    time.sleep(1.5)
+    assert cache_swr.get() is None, "get() no debe retornar estados obsoletos"
+    assert cache_swr.consultar() == ("Entrada", OBSOLETO), "Entrada debería estar obsoleta"
+    time.sleep(2)
+    assert cache_swr.consultar() == (None, EXPIRADO), "Entrada debería haber expirado"
+    print("   ✅ Stale-while-revalidate funciona correctamente")
+
     print("   ✅ CACHE: OK")
     
 except Exception as e:
@@ -60,8 +72,6 @@ try:
     
     from src.geovictoria import Config
     print(f"   ✅ Config.IFRAME_TIMEOUT = {Config.IFRAME_TIMEOUT}ms (optimizado a 30s)")
-    print(f"   ✅ Config.MAX_RETRIES = {Config.MAX_RETRIES} (optimizado de 3)")
-    print(f"   ✅ Config.RETRY_DELAY = {Config.RETRY_DELAY}s (optimizado de 2s)")
     print(f"   ✅ Config.LOGIN_TIMEOUT = {Config.LOGIN_TIMEOUT}ms (nuevo)")
     
     print("   ✅ IMPORTS: OK")
@@ -105,8 +115,7 @@ print("=" * 80)
 print("\n📊 RESUMEN DE OPTIMIZACIONES:")
 print("   • Sistema de caché implementado y funcional")
 print("   • Timeouts reducidos (60s → 30s)")
-print("   • Reintentos optimizados (3 → 2)")
-print("   • Delays reducidos (2s → 1s)")
+print("   • Búsqueda del iframe por eventos (sin reintentos ni esperas fijas)")
 print("   • Nuevo timeout de login: 10s")
 print("\n💡 MEJORAS ESPERADAS:")
 print("   • Reducción del 70-80% en tiempo de verificación")
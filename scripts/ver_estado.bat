@@ -18,8 +18,8 @@ echo 📝 REGISTRO DE EJECUCIONES DE HOY:
 echo ========================================
 cd /d "%~dp0\..\src\logs"
 
-REM Mostrar registro JSON formateado
-python -c "import json; import sys; from datetime import date; data = json.load(open('registro_ejecuciones.json', encoding='utf-8')); hoy = str(date.today()); print('Hoy:', hoy); print(); registros = data.get(hoy, {}); [print(f'✅ {k}:\n   🕐 Hora: {v[\"hora\"]}\n   🎲 Variación: {v.get(\"variacion_minutos\", 0):+d} minutos\n') if registros else None for k, v in registros.items()] if registros else print('❌ No hay marcajes registrados para hoy\n')"
+REM Mostrar registro de ejecuciones (SQLite)
+python -c "import sys; sys.path.insert(0, '../..'); from datetime import date; from src.registro_ejecuciones import get_registro; hoy = str(date.today()); print('Hoy:', hoy); print(); registros = get_registro().como_dict(dias=0).get(hoy, {}); [print(f'✅ {k}:\n   🕐 Hora: {v[\"hora\"]}\n   🎲 Variación: {v.get(\"variacion_minutos\", 0):+d} minutos\n') for k, v in registros.items()] if registros else print('❌ No hay marcajes registrados para hoy\n')"
 
 echo ========================================
 echo 📋 ÚLTIMAS LÍNEAS DEL LOG DEL PROGRAMADOR:
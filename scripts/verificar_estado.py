@@ -3,22 +3,21 @@
 """
 Script para verificar el estado de ejecuciones de marcaje
 """
-import json
 import os
+import sys
 from datetime import date, datetime
 from pathlib import Path
 
 # Paths
 BASE_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(BASE_DIR))
 LOG_DIR = BASE_DIR / "src" / "logs"
-REGISTRO_FILE = LOG_DIR / "registro_ejecuciones.json"
 
 def leer_registro():
-    """Lee el archivo de registro de ejecuciones"""
+    """Lee el registro de ejecuciones (SQLite en src/logs)"""
     try:
-        if REGISTRO_FILE.exists():
-            with open(REGISTRO_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        from src.registro_ejecuciones import get_registro
+        return get_registro().como_dict()
     except Exception as e:
         print(f"❌ Error leyendo registro: {e}")
     return {}
@@ -74,6 +73,29 @@ def mostrar_ultimos_dias(dias=5):
     
     print(f"\n{'-' * 80}")
 
+def mostrar_estado_geovictoria():
+    """Muestra el último estado consultado en GeoVictoria (caché compartido, sin abrir navegador)"""
+    print(f"\n🌐 ÚLTIMO ESTADO CONSULTADO EN GEOVICTORIA:")
+    print(f"{'-' * 80}")
+    
+    try:
+        from src.cache_estado import get_cache, FRESCO
+        cache = get_cache()
+        estado, frescura = cache.consultar()
+        edad = cache.edad()
+    except Exception as e:
+        print(f"⚠️  No se pudo leer el caché de estado: {e}")
+        return
+    
+    if estado:
+        hace = f"hace {edad / 60:.0f} min" if edad is not None and edad >= 60 else f"hace {edad or 0:.0f} s"
+        nota = f"estado de {hace}" if frescura == FRESCO else f"estado de {hace}, puede estar desactualizado"
+        print(f"✓ Botón disponible: Marcar {estado} ({nota})")
+    else:
+        print(f"•  Sin consultas recientes (ejecute scripts/prueba_verificacion_estado.py)")
+    
+    print(f"{'-' * 80}")
+
 def verificar_logs_hoy():
     """Verifica si existen logs de hoy"""
     fecha_log = datetime.now().strftime('%Y%m%d')
@@ -114,6 +136,7 @@ def main():
     
     mostrar_estado_hoy()
     mostrar_ultimos_dias(5)
+    mostrar_estado_geovictoria()
     verificar_logs_hoy()
     
     print(f"\n✅ Verificación completada")
@@ -0,0 +1,140 @@
+"""
+Bloqueo de recursos de red innecesarios para el portal de GeoVictoria
+Aborta imágenes, fuentes, analítica y scripts de terceros que retrasan la carga
+"""
+import logging
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Tamaño estimado por tipo de recurso (bytes) cuando no se ha observado ninguno
+TAMANO_ESTIMADO = {
+    'image': 40_000,
+    'media': 250_000,
+    'font': 60_000,
+    'stylesheet': 30_000,
+    'script': 80_000,
+    'xhr': 5_000,
+    'fetch': 5_000,
+    'other': 10_000,
+}
+
+class PerfilBloqueo:
+    """Reglas de permitir/bloquear por tipo de recurso y dominio
+
+    Orden de evaluación:
+      1. Dominios permitidos (siempre pasan: login y portal de GeoVictoria)
+      2. Dominios bloqueados (analítica, publicidad)
+      3. Tipos de recurso bloqueados (imágenes, fuentes, media)
+      4. Si `solo_dominios_permitidos`, se bloquea cualquier otro dominio
+    """
+
+    def __init__(self, tipos_bloqueados: Iterable[str] = ('image', 'media', 'font'),
+                 dominios_bloqueados: Iterable[str] = (),
+                 dominios_permitidos: Iterable[str] = (),
+                 tipos_siempre_permitidos: Iterable[str] = ('document', 'xhr', 'fetch'),
+                 solo_dominios_permitidos: bool = False):
+        """
+        Args:
+            tipos_bloqueados: Tipos de recurso de Playwright a abortar
+            dominios_bloqueados: Dominios (y subdominios) a abortar
+            dominios_permitidos: Dominios cuyos documentos y XHR nunca se bloquean
+            tipos_siempre_permitidos: Tipos que pasan si el dominio está permitido
+            solo_dominios_permitidos: Bloquear todo lo que no sea de un dominio permitido
+        """
+        self.tipos_bloqueados = frozenset(tipos_bloqueados)
+        self.dominios_bloqueados = tuple(d.lower() for d in dominios_bloqueados)
+        self.dominios_permitidos = tuple(d.lower() for d in dominios_permitidos)
+        self.tipos_siempre_permitidos = frozenset(tipos_siempre_permitidos)
+        self.solo_dominios_permitidos = solo_dominios_permitidos
+
+    @staticmethod
+    def _coincide(host: str, dominios) -> bool:
+        return any(host == d or host.endswith('.' + d) for d in dominios)
+
+    def debe_bloquear(self, url: str, tipo_recurso: str) -> bool:
+        """Decide si una petición debe abortarse"""
+        host = (urlparse(url).hostname or '').lower()
+        if not host:
+            return False  # data:, blob:, about:
+
+        permitido = self._coincide(host, self.dominios_permitidos)
+        if permitido and tipo_recurso in self.tipos_siempre_permitidos:
+            return False
+        if self._coincide(host, self.dominios_bloqueados):
+            return True
+        if tipo_recurso in self.tipos_bloqueados:
+            return True
+        if self.solo_dominios_permitidos and not permitido:
+            return True
+        return False
+
+class EstadisticasBloqueo:
+    """Peticiones y bytes ahorrados por el bloqueo durante una ejecución"""
+
+    def __init__(self):
+        self.permitidas = 0
+        self.bloqueadas = 0
+        self.bloqueadas_por_tipo: Dict[str, int] = {}
+        self.bytes_ahorrados_estimados = 0
+        self._bytes_observados: Dict[str, list] = {}
+
+    def registrar_bloqueo(self, tipo_recurso: str) -> None:
+        self.bloqueadas += 1
+        self.bloqueadas_por_tipo[tipo_recurso] = self.bloqueadas_por_tipo.get(tipo_recurso, 0) + 1
+        self.bytes_ahorrados_estimados += self._tamano_medio(tipo_recurso)
+
+    def registrar_respuesta(self, tipo_recurso: str, content_length: Optional[str]) -> None:
+        """Aprende el tamaño medio por tipo a partir de Content-Length (solo cabeceras)"""
+        if not content_length:
+            return
+        try:
+            tamano = int(content_length)
+        except ValueError:
+            return
+        observados = self._bytes_observados.setdefault(tipo_recurso, [0, 0])
+        observados[0] += tamano
+        observados[1] += 1
+
+    def _tamano_medio(self, tipo_recurso: str) -> int:
+        observados = self._bytes_observados.get(tipo_recurso)
+        if observados and observados[1]:
+            return observados[0] // observados[1]
+        return TAMANO_ESTIMADO.get(tipo_recurso, TAMANO_ESTIMADO['other'])
+
+    def resumen(self) -> str:
+        total = self.permitidas + self.bloqueadas
+        tipos = ", ".join(f"{t}={n}" for t, n in sorted(self.bloqueadas_por_tipo.items())) or "ninguna"
+        return (f"{self.bloqueadas}/{total} peticiones bloqueadas ({tipos}), "
+                f"~{self.bytes_ahorrados_estimados / 1024:.0f} KB ahorrados")
+
+async def instalar_bloqueo(context, perfil: PerfilBloqueo) -> EstadisticasBloqueo:
+    """
+    Instala el enrutamiento de peticiones en el contexto
+
+    Returns:
+        Estadísticas que se actualizan mientras el contexto está abierto
+    """
+    estadisticas = EstadisticasBloqueo()
+
+    async def enrutar(route):
+        request = route.request
+        tipo = request.resource_type
+        if perfil.debe_bloquear(request.url, tipo):
+            estadisticas.registrar_bloqueo(tipo)
+            await route.abort()
+        else:
+            estadisticas.permitidas += 1
+            await route.continue_()
+
+    def al_responder(response):
+        try:
+            estadisticas.registrar_respuesta(response.request.resource_type,
+                                             response.headers.get('content-length'))
+        except Exception:
+            pass
+
+    await context.route("**/*", enrutar)
+    context.on("response", al_responder)
+    return estadisticas
@@ -1,66 +1,390 @@
 """
 Sistema de caché simple para estado de GeoVictoria
 Evita múltiples consultas redundantes en corto tiempo
+
+Política stale-while-revalidate:
+  - Antes del TTL suave la entrada está FRESCA
+  - Entre el TTL suave y el TTL duro está OBSOLETA: puede servirse mientras
+    se refresca en segundo plano
+  - Después del TTL duro está EXPIRADA y se descarta
+
+Con `archivo`, el caché se guarda en SQLite y lo comparten todos los procesos
+del equipo (programador y scripts): una consulta reciente de uno sirve a los demás.
+Las claves son por (cuenta, día) y el tamaño está acotado con expulsión LRU.
 """
-from datetime import datetime, timedelta
-from typing import Optional, Dict
+import atexit
+import logging
+import os
+import sqlite3
 import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from pathlib import Path
+from typing import Optional, Dict, Tuple
+from dotenv import load_dotenv
+
+# La cuenta por defecto de las claves sale de GEOVICTORIA_USER (también en scripts)
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = Path(__file__).parent / "logs" / "cache_estado.db"
+
+# TTL de los resultados negativos (consulta fallida o sin botón): corto para
+# reintentar pronto, pero evita relanzar el navegador en cada llamada
+TTL_NEGATIVO_SEGUNDOS = 30
+
+# Frescura de una entrada del caché
+FRESCO = "fresco"
+OBSOLETO = "obsoleto"
+EXPIRADO = "expirado"
+
+def clave_estado(usuario: Optional[str] = None, fecha: Optional[date] = None) -> str:
+    """
+    Clave del caché para una cuenta y un día
+
+    Args:
+        usuario: Cuenta de GeoVictoria (default: GEOVICTORIA_USER)
+        fecha: Día del estado (default: hoy). El estado de ayer nunca sirve hoy
+    """
+    usuario = usuario or os.getenv("GEOVICTORIA_USER") or "predeterminada"
+    return f"{usuario}|{(fecha or date.today()).isoformat()}"
+
+class _BackendMemoria:
+    """Entradas en un OrderedDict del proceso (orden = uso reciente)"""
+
+    def __init__(self):
+        # key -> (estado, guardado, ttl suave, ttl duro)
+        self._datos: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @staticmethod
+    def ahora() -> float:
+        # Reloj monotónico: inmune a cambios de hora del sistema
+        return time.monotonic()
+
+    def leer(self, key):
+        fila = self._datos.get(key)
+        if fila is not None:
+            self._datos.move_to_end(key)
+        return fila
+
+    def escribir(self, key, estado, guardado, ttl, ttl_duro):
+        self._datos[key] = (estado, guardado, ttl, ttl_duro)
+        self._datos.move_to_end(key)
+
+    def borrar(self, key):
+        self._datos.pop(key, None)
+
+    def limpiar(self):
+        self._datos.clear()
+
+    def tamano(self) -> int:
+        return len(self._datos)
+
+    def expulsar_lru(self, maximo: int) -> int:
+        expulsadas = 0
+        while len(self._datos) > maximo:
+            self._datos.popitem(last=False)
+            expulsadas += 1
+        return expulsadas
+
+    def barrer(self, ahora: float) -> int:
+        vencidas = [k for k, fila in self._datos.items() if ahora - fila[1] > fila[3]]
+        for key in vencidas:
+            del self._datos[key]
+        return len(vencidas)
+
+    def cerrar(self):
+        pass
+
+class _BackendSQLite:
+    """Entradas en una tabla SQLite con columnas de TTL, compartida entre procesos
+
+    Las lecturas no escriben: el último acceso (para LRU) se acumula en memoria
+    y se vuelca en lote, así los lectores no compiten por el bloqueo de escritura.
+    """
+
+    # Volcar los accesos pendientes al llegar a este número o a esta antigüedad
+    MAX_ACCESOS_PENDIENTES = 64
+    INTERVALO_VOLCADO_S = 30.0
+
+    def __init__(self, archivo: Path):
+        archivo.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit: cada operación es una transacción corta
+        self._conexion = sqlite3.connect(str(archivo), timeout=5, isolation_level=None,
+                                         check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS estado ("
+            " clave TEXT PRIMARY KEY, estado TEXT, guardado REAL NOT NULL,"
+            " ttl REAL NOT NULL, ttl_duro REAL NOT NULL, accedido REAL NOT NULL DEFAULT 0)"
+        )
+        columnas = {fila[1] for fila in self._conexion.execute("PRAGMA table_info(estado)")}
+        if 'accedido' not in columnas:
+            self._conexion.execute("ALTER TABLE estado ADD COLUMN accedido REAL NOT NULL DEFAULT 0")
+        self._conexion.execute("CREATE INDEX IF NOT EXISTS idx_estado_accedido ON estado (accedido)")
+        self._accesos: Dict[str, float] = {}
+        self._ultimo_volcado = time.monotonic()
+
+    @staticmethod
+    def ahora() -> float:
+        # Reloj de pared: las marcas de tiempo se comparten entre procesos
+        return time.time()
+
+    def leer(self, key):
+        fila = self._conexion.execute(
+            "SELECT estado, guardado, ttl, ttl_duro FROM estado WHERE clave = ?", (key,)
+        ).fetchone()
+        if fila is not None:
+            self._accesos[key] = time.time()
+            if (len(self._accesos) >= self.MAX_ACCESOS_PENDIENTES
+                    or time.monotonic() - self._ultimo_volcado >= self.INTERVALO_VOLCADO_S):
+                try:
+                    self.volcar_accesos()
+                except sqlite3.Error as e:
+                    # Solo afecta al orden LRU: la lectura sigue siendo válida
+                    logger.debug(f"No se pudieron volcar los accesos del caché: {e}")
+        return fila
+
+    def volcar_accesos(self):
+        """Escribe en una sola transacción los últimos accesos acumulados"""
+        self._ultimo_volcado = time.monotonic()
+        if not self._accesos:
+            return
+        accesos, self._accesos = self._accesos, {}
+        with self._conexion:
+            self._conexion.execute("BEGIN")
+            self._conexion.executemany("UPDATE estado SET accedido = ? WHERE clave = ?",
+                                       [(ts, key) for key, ts in accesos.items()])
+
+    def escribir(self, key, estado, guardado, ttl, ttl_duro):
+        self._conexion.execute(
+            "INSERT OR REPLACE INTO estado (clave, estado, guardado, ttl, ttl_duro, accedido)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (key, estado, guardado, ttl, ttl_duro, guardado),
+        )
+        self._accesos.pop(key, None)
+
+    def borrar(self, key):
+        self._accesos.pop(key, None)
+        self._conexion.execute("DELETE FROM estado WHERE clave = ?", (key,))
+
+    def limpiar(self):
+        self._accesos.clear()
+        self._conexion.execute("DELETE FROM estado")
+
+    def tamano(self) -> int:
+        return self._conexion.execute("SELECT COUNT(*) FROM estado").fetchone()[0]
+
+    def expulsar_lru(self, maximo: int) -> int:
+        exceso = self.tamano() - maximo
+        if exceso <= 0:
+            return 0
+        self.volcar_accesos()  # El orden LRU necesita los accesos al día
+        self._conexion.execute(
+            "DELETE FROM estado WHERE clave IN"
+            " (SELECT clave FROM estado ORDER BY accedido LIMIT ?)", (exceso,)
+        )
+        return exceso
+
+    def barrer(self, ahora: float) -> int:
+        self.volcar_accesos()
+        return self._conexion.execute("DELETE FROM estado WHERE ? - guardado > ttl_duro", (ahora,)).rowcount
+
+    def cerrar(self):
+        self.volcar_accesos()
+        self._conexion.close()
 
 class CacheEstado:
-    """Cache thread-safe para el estado del botón en GeoVictoria"""
-    
-    def __init__(self, ttl_segundos: int = 60):
+    """Cache thread-safe para el estado del botón en GeoVictoria
+
+    Claves por (cuenta, día) con `clave_estado()`; sin clave se usa la cuenta
+    por defecto y el día de hoy. Con `max_entradas` se expulsa la entrada
+    menos usada recientemente (LRU) y un hilo de barrido elimina las vencidas.
+    """
+
+    def __init__(self, ttl_segundos: int = 60, ttl_duro_segundos: Optional[int] = None,
+                 archivo: Optional[Path] = None, max_entradas: int = 1000,
+                 intervalo_barrido_s: Optional[float] = None):
         """
         Args:
             ttl_segundos: Tiempo de vida del caché en segundos (default: 60s)
+            ttl_duro_segundos: Edad máxima de una entrada obsoleta. Si es None,
+                               es igual a ttl_segundos (sin modo obsoleto)
+            archivo: Base SQLite compartida entre procesos (None = solo en memoria)
+            max_entradas: Máximo de entradas antes de expulsar por LRU
+            intervalo_barrido_s: Cada cuánto eliminar entradas vencidas en segundo
+                                 plano (None = solo al leerlas)
         """
-        self._cache: Dict[str, tuple[Optional[str], datetime]] = {}
-        self._ttl = timedelta(seconds=ttl_segundos)
+        self._ttl = float(ttl_segundos)
+        self._ttl_duro = float(max(ttl_duro_segundos or ttl_segundos, ttl_segundos))
+        self._max_entradas = max_entradas
         self._lock = threading.Lock()
-    
-    def get(self, key: str = "estado_actual") -> Optional[str]:
+        self._backend = _BackendMemoria()
+        if archivo is not None:
+            try:
+                self._backend = _BackendSQLite(archivo)
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Caché compartido no disponible ({e}) - Usando caché en memoria")
+
+        # Contadores del proceso
+        self._contadores = {'aciertos': 0, 'obsoletos': 0, 'fallos': 0, 'expulsiones': 0, 'expiradas': 0}
+
+        self._detener_barrido = threading.Event()
+        self._hilo_barrido = None
+        if intervalo_barrido_s:
+            self._hilo_barrido = threading.Thread(target=self._barrido_periodico, args=(intervalo_barrido_s,),
+                                                  name="barrido-cache-estado", daemon=True)
+            self._hilo_barrido.start()
+
+    @property
+    def compartido(self) -> bool:
+        """True si el caché se comparte entre procesos (SQLite)"""
+        return isinstance(self._backend, _BackendSQLite)
+
+    def _operar(self, operacion, *args):
+        """Ejecuta una operación del backend; un error de SQLite equivale a caché vacío"""
+        with self._lock:
+            try:
+                return operacion(*args)
+            except sqlite3.Error as e:
+                logger.debug(f"Error en caché compartido: {e}")
+                return None
+
+    def _contar(self, contador: str, cantidad: int = 1) -> None:
+        with self._lock:
+            self._contadores[contador] += cantidad
+
+    def get(self, key: Optional[str] = None) -> Optional[str]:
         """
-        Obtiene el estado del caché si aún es válido
-        
+        Obtiene el estado del caché si aún es válido (fresco)
+
         Returns:
             Estado del botón ("Entrada", "Salida", None) o None si no hay caché válido
         """
-        with self._lock:
-            if key not in self._cache:
-                return None
-            
-            estado, timestamp = self._cache[key]
-            
-            # Verificar si el caché expiró
-            if datetime.now() - timestamp > self._ttl:
-                del self._cache[key]
-                return None
-            
-            return estado
-    
-    def set(self, estado: Optional[str], key: str = "estado_actual") -> None:
+        estado, frescura = self.consultar(key)
+        return estado if frescura == FRESCO else None
+
+    def consultar(self, key: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """
+        Obtiene el estado junto con su frescura
+
+        Returns:
+            (estado, frescura) con frescura FRESCO, OBSOLETO o EXPIRADO.
+            Si no hay entrada o ya expiró, retorna (None, EXPIRADO)
+        """
+        key = key or clave_estado()
+        fila = self._operar(self._backend.leer, key)
+        if fila is None:
+            self._contar('fallos')
+            return None, EXPIRADO
+
+        estado, guardado, ttl, ttl_duro = fila
+        edad = self._backend.ahora() - guardado
+        if edad <= ttl:
+            self._contar('aciertos')
+            return estado, FRESCO
+        if edad <= ttl_duro:
+            self._contar('obsoletos')
+            return estado, OBSOLETO
+
+        # Pasado el TTL duro la entrada ya no sirve ni como referencia
+        self._operar(self._backend.borrar, key)
+        self._contar('fallos')
+        self._contar('expiradas')
+        return None, EXPIRADO
+
+    def edad(self, key: Optional[str] = None) -> Optional[float]:
+        """Segundos desde que se guardó la entrada (None si no existe); no cuenta como consulta"""
+        fila = self._operar(self._backend.leer, key or clave_estado())
+        if fila is None:
+            return None
+        return max(0.0, self._backend.ahora() - fila[1])
+
+    def set(self, estado: Optional[str], key: Optional[str] = None,
+            ttl_segundos: Optional[int] = None) -> None:
         """
         Guarda el estado en el caché
-        
+
         Args:
             estado: Estado del botón ("Entrada", "Salida", None)
+            key: Clave de `clave_estado()` (default: cuenta por defecto, hoy)
+            ttl_segundos: TTL propio de esta entrada, sin período obsoleto
+                          (ej. resultados negativos). None = TTLs del caché
         """
-        with self._lock:
-            self._cache[key] = (estado, datetime.now())
-    
-    def invalidar(self, key: str = "estado_actual") -> None:
+        if ttl_segundos is None:
+            ttl, ttl_duro = self._ttl, self._ttl_duro
+        else:
+            ttl = ttl_duro = float(ttl_segundos)
+        estado = str(estado) if estado is not None else None
+        key = key or clave_estado()
+        self._operar(self._backend.escribir, key, estado, self._backend.ahora(), ttl, ttl_duro)
+        expulsadas = self._operar(self._backend.expulsar_lru, self._max_entradas)
+        if expulsadas:
+            self._contar('expulsiones', expulsadas)
+
+    def invalidar(self, key: Optional[str] = None) -> None:
         """Invalida el caché para forzar una nueva verificación"""
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-    
+        self._operar(self._backend.borrar, key or clave_estado())
+
     def limpiar_todo(self) -> None:
         """Limpia todo el caché"""
+        self._operar(self._backend.limpiar)
+
+    def barrer(self) -> int:
+        """Elimina las entradas pasadas de su TTL duro; retorna cuántas"""
+        eliminadas = self._operar(self._backend.barrer, self._backend.ahora()) or 0
+        if eliminadas:
+            self._contar('expiradas', eliminadas)
+        return eliminadas
+
+    def _barrido_periodico(self, intervalo_s: float) -> None:
+        while not self._detener_barrido.wait(intervalo_s):
+            self.barrer()
+
+    def detener_barrido(self) -> None:
+        """Detiene el hilo de barrido (si existe)"""
+        self._detener_barrido.set()
+        if self._hilo_barrido is not None:
+            self._hilo_barrido.join(timeout=1)
+
+    def cerrar(self) -> None:
+        """Detiene el barrido, vuelca los accesos pendientes y cierra la base"""
+        self.detener_barrido()
         with self._lock:
-            self._cache.clear()
+            try:
+                self._backend.cerrar()
+            except sqlite3.Error as e:
+                logger.debug(f"Error cerrando el caché compartido: {e}")
+            # Después de cerrar, el caché sigue funcionando solo en memoria
+            self._backend = _BackendMemoria()
+
+    def estadisticas(self) -> Dict:
+        """
+        Contadores del proceso: aciertos (consultas de navegador evitadas),
+        obsoletos servidos, fallos, expulsiones LRU, expiradas, entradas y tasa de aciertos
+        """
+        with self._lock:
+            datos = dict(self._contadores)
+        datos['entradas'] = self._operar(self._backend.tamano) or 0
+        consultas = datos['aciertos'] + datos['obsoletos'] + datos['fallos']
+        datos['tasa_aciertos'] = round((datos['aciertos'] + datos['obsoletos']) / consultas, 3) if consultas else 0.0
+        return datos
+
+    def resumen(self) -> str:
+        """Resumen de una línea de las estadísticas"""
+        d = self.estadisticas()
+        return (f"{d['aciertos']} aciertos, {d['obsoletos']} obsoletos, {d['fallos']} fallos "
+                f"({d['tasa_aciertos']:.0%}), {d['entradas']} entradas, {d['expulsiones']} expulsiones")
+
+# Instancia global del caché, compartida con los scripts a través de SQLite
+# Obsoleto hasta 15 min: solo para consultas que toleran un estado aproximado
+_cache_global = CacheEstado(ttl_segundos=60, ttl_duro_segundos=900, archivo=CACHE_FILE,
+                            max_entradas=5000, intervalo_barrido_s=300)
 
-# Instancia global del caché
-_cache_global = CacheEstado(ttl_segundos=60)
+atexit.register(lambda: _cache_global.cerrar())
 
 def get_cache() -> CacheEstado:
     """Retorna la instancia global del caché"""
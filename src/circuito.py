@@ -0,0 +1,210 @@
+"""
+Circuit breaker para el portal de GeoVictoria
+Tras varios fallos seguidos deja de abrir navegadores durante un tiempo y
+luego permite una única consulta de prueba (semiabierto) antes de cerrarse
+
+El estado se comparte entre procesos a través del archivo: cada permitir()
+revisa si otro proceso lo cambió (mtime) y, en ese caso, lo vuelve a leer.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+CIRCUITO_FILE = Path(__file__).parent / "logs" / "circuito_geovictoria.json"
+
+# Estados del circuito
+CERRADO = "cerrado"
+ABIERTO = "abierto"
+SEMIABIERTO = "semiabierto"
+
+class Circuito:
+    """Circuit breaker thread-safe con estado persistido en disco
+
+    - CERRADO: las consultas pasan; `umbral_fallos` fallos seguidos lo abren
+    - ABIERTO: las consultas se rechazan sin abrir el navegador
+    - SEMIABIERTO: pasado el tiempo de apertura se permite una sola consulta de
+      prueba; si funciona se cierra, si falla se reabre con el doble de espera
+    """
+
+    def __init__(self, nombre: str, umbral_fallos: int = 3, tiempo_apertura_s: float = 120,
+                 tiempo_apertura_max_s: float = 1800, archivo: Optional[Path] = None):
+        """
+        Args:
+            nombre: Nombre del servicio protegido (para los logs)
+            umbral_fallos: Fallos consecutivos que abren el circuito
+            tiempo_apertura_s: Espera inicial antes de la consulta de prueba
+            tiempo_apertura_max_s: Espera máxima tras pruebas fallidas sucesivas
+            archivo: JSON donde persistir el estado (None = solo en memoria)
+        """
+        self.nombre = nombre
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_apertura_s = tiempo_apertura_s
+        self.tiempo_apertura_max_s = tiempo_apertura_max_s
+        self._archivo = archivo
+        self._lock = threading.Lock()
+
+        self._estado = CERRADO
+        self._fallos_consecutivos = 0
+        self._abierto_desde: Optional[float] = None  # time.time(): sobrevive reinicios
+        self._espera_actual = tiempo_apertura_s
+        self._prueba_en_curso = False
+        self._rechazadas = 0
+        self._ultimo_error: Optional[str] = None
+        self._firma_archivo = None  # (mtime, tamaño) de la última lectura o escritura propia
+
+        self._cargar()
+
+    @property
+    def estado(self) -> str:
+        with self._lock:
+            return self._estado
+
+    def permitir(self) -> bool:
+        """True si la consulta puede intentarse (en SEMIABIERTO, solo la de prueba)"""
+        with self._lock:
+            self._recargar_si_cambio()
+            if self._estado == CERRADO:
+                return True
+
+            if self._estado == ABIERTO:
+                if time.time() - self._abierto_desde < self._espera_actual:
+                    self._rechazadas += 1
+                    return False
+                self._cambiar_estado(SEMIABIERTO)
+
+            # SEMIABIERTO: una única consulta de prueba a la vez
+            if self._prueba_en_curso:
+                self._rechazadas += 1
+                return False
+            self._prueba_en_curso = True
+            logger.info(f"🔌 Circuito {self.nombre} semiabierto - Consulta de prueba")
+            return True
+
+    def registrar_exito(self) -> None:
+        with self._lock:
+            self._fallos_consecutivos = 0
+            self._prueba_en_curso = False
+            if self._estado != CERRADO:
+                self._espera_actual = self.tiempo_apertura_s
+                self._ultimo_error = None
+                self._cambiar_estado(CERRADO)
+                logger.info(f"🔌 Circuito {self.nombre} cerrado - Servicio recuperado")
+
+    def registrar_fallo(self, error: Optional[str] = None) -> None:
+        with self._lock:
+            self._fallos_consecutivos += 1
+            self._ultimo_error = error
+            if self._estado == SEMIABIERTO:
+                # La prueba falló: reabrir con espera exponencial
+                self._prueba_en_curso = False
+                self._espera_actual = min(self._espera_actual * 2, self.tiempo_apertura_max_s)
+                self._abrir()
+            elif self._estado == CERRADO and self._fallos_consecutivos >= self.umbral_fallos:
+                self._abrir()
+            else:
+                self._guardar()
+
+    def _abrir(self) -> None:
+        self._abierto_desde = time.time()
+        self._cambiar_estado(ABIERTO)
+        logger.warning(f"🔌 Circuito {self.nombre} ABIERTO tras {self._fallos_consecutivos} fallo(s) - "
+                       f"Sin consultas durante {self._espera_actual:.0f}s")
+
+    def _cambiar_estado(self, nuevo: str) -> None:
+        self._estado = nuevo
+        self._guardar()
+
+    def segundos_para_prueba(self) -> float:
+        """Segundos hasta que se permita la consulta de prueba (0 si no está abierto)"""
+        with self._lock:
+            if self._estado != ABIERTO:
+                return 0.0
+            return max(0.0, self._espera_actual - (time.time() - self._abierto_desde))
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            return self._instantanea()
+
+    def _instantanea(self) -> Dict:
+        return {
+            'nombre': self.nombre,
+            'estado': self._estado,
+            'fallos_consecutivos': self._fallos_consecutivos,
+            'abierto_desde': self._abierto_desde,
+            'espera_s': self._espera_actual,
+            'rechazadas': self._rechazadas,
+            'ultimo_error': self._ultimo_error,
+            'actualizado': time.time(),
+        }
+
+    def _guardar(self) -> None:
+        if self._archivo is None:
+            return
+        try:
+            self._archivo.parent.mkdir(exist_ok=True)
+            temporal = self._archivo.with_suffix('.tmp')
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump(self._instantanea(), f, ensure_ascii=False, indent=2)
+            os.replace(temporal, self._archivo)
+            self._firma_archivo = self._firma()
+        except Exception as e:
+            logger.debug(f"No se pudo guardar el estado del circuito: {e}")
+
+    def _firma(self):
+        try:
+            st = os.stat(self._archivo)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _recargar_si_cambio(self) -> None:
+        """Relee el estado si otro proceso escribió el archivo (requiere self._lock)"""
+        if self._archivo is None:
+            return
+        firma = self._firma()
+        if firma is not None and firma != self._firma_archivo:
+            estado_anterior = self._estado
+            self._cargar()
+            if self._estado != estado_anterior:
+                logger.info(f"🔌 Circuito {self.nombre} {self._estado} (cambiado por otro proceso)")
+
+    def _cargar(self) -> None:
+        """Recupera un circuito abierto por otro proceso o antes de un reinicio"""
+        if self._archivo is None or not self._archivo.exists():
+            return
+        firma = self._firma()
+        try:
+            with open(self._archivo, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+        except Exception as e:
+            logger.debug(f"No se pudo leer el estado del circuito: {e}")
+            return
+        self._firma_archivo = firma
+
+        self._fallos_consecutivos = datos.get('fallos_consecutivos', 0)
+        self._espera_actual = datos.get('espera_s', self.tiempo_apertura_s)
+        self._ultimo_error = datos.get('ultimo_error')
+        if datos.get('estado') in (ABIERTO, SEMIABIERTO) and datos.get('abierto_desde'):
+            # Una prueba que quedó a medias (aquí o en otro proceso) se repite
+            if self._estado != SEMIABIERTO or not self._prueba_en_curso:
+                self._estado = ABIERTO
+                self._abierto_desde = datos['abierto_desde']
+        elif datos.get('estado') == CERRADO:
+            self._estado = CERRADO
+            self._abierto_desde = None
+            self._prueba_en_curso = False
+
+_circuito_geovictoria: Optional[Circuito] = None
+
+def get_circuito() -> Circuito:
+    """Retorna el circuito del portal de GeoVictoria (estado en src/logs)"""
+    global _circuito_geovictoria
+    if _circuito_geovictoria is None:
+        _circuito_geovictoria = Circuito("GeoVictoria", archivo=CIRCUITO_FILE)
+    return _circuito_geovictoria
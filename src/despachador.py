@@ -0,0 +1,213 @@
+"""
+Despachador de marcajes con límite de ritmo global
+Cuando muchas cuentas comparten la misma hora de turno, cada cuenta recibe
+de antemano su propio hueco dentro de la ventana (VARIACION_*): la ventana se
+divide en partes iguales según la posición de la cuenta, en un orden al azar
+que cambia cada día. Además todos los marcajes pasan por un token bucket
+común, así que los lanzamientos de Chromium y las peticiones a GeoVictoria
+quedan acotados.
+
+Si una ventana tiene más cuentas de las que el ritmo permite, se avisa y el
+marcaje que no consigue token lo toma prestado dentro de su propio hueco:
+como cada cuenta tiene un hueco distinto, los marcajes siguen repartidos.
+
+El ritmo también queda acotado por los navegadores: con `ajustar_concurrencia`
+no se despachan más marcajes por minuto de los que el pool puede terminar.
+"""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+def repartir_ventana(inicio: datetime, fin: datetime, claves: Iterable[str],
+                     semilla=None) -> Dict[str, datetime]:
+    """
+    Momento de cada clave en la ventana [inicio, fin), uno por hueco de igual tamaño
+
+    El orden de las claves y la posición dentro del hueco (la misma para todos)
+    salen de `semilla`: con la misma semilla siempre se obtiene el mismo reparto.
+    """
+    claves = sorted(claves)
+    azar = random.Random(semilla)
+    azar.shuffle(claves)
+    hueco = (fin - inicio) / len(claves)
+    fase = azar.random()
+    return {clave: inicio + hueco * (posicion + fase) for posicion, clave in enumerate(claves)}
+
+class CuboTokens:
+    """Token bucket asíncrono: `tasa_por_s` tokens por segundo, hasta `capacidad` acumulados"""
+
+    def __init__(self, tasa_por_s: float, capacidad: float):
+        self.tasa_por_s = tasa_por_s
+        self.capacidad = capacidad
+        self._tokens = capacidad
+        self._actualizado = time.monotonic()
+        self.prestados = 0
+
+    def _rellenar(self) -> None:
+        ahora = time.monotonic()
+        self._tokens = min(self.capacidad, self._tokens + (ahora - self._actualizado) * self.tasa_por_s)
+        self._actualizado = ahora
+
+    def ajustar(self, tasa_por_s: float, capacidad: float) -> None:
+        """Cambia el ritmo y la ráfaga sin perder la deuda acumulada"""
+        self._rellenar()
+        self.tasa_por_s = tasa_por_s
+        self.capacidad = capacidad
+        self._tokens = min(self._tokens, capacidad)
+
+    async def adquirir(self, plazo: Optional[float] = None) -> bool:
+        """
+        Espera un token
+
+        Args:
+            plazo: Instante (time.monotonic) a partir del cual no se espera más:
+                   el token se toma prestado y el cubo queda en negativo
+
+        Returns:
+            True si el token estaba disponible dentro del ritmo, False si se tomó prestado
+        """
+        while True:
+            self._rellenar()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+
+            ahora = time.monotonic()
+            if plazo is not None and ahora >= plazo:
+                # La deuda la pagan los marcajes siguientes, que esperan más
+                self._tokens -= 1
+                self.prestados += 1
+                return False
+
+            espera = (1 - self._tokens) / self.tasa_por_s
+            if plazo is not None:
+                espera = min(espera, plazo - ahora)
+            await asyncio.sleep(espera)
+
+class Despachador:
+    """Asigna a cada cuenta su hueco en la ventana y ejecuta los marcajes respetando el ritmo global"""
+
+    def __init__(self, marcajes_por_minuto: float, rafaga: int):
+        """
+        Args:
+            marcajes_por_minuto: Ritmo sostenido máximo de marcajes (todas las cuentas)
+            rafaga: Marcajes que pueden salir seguidos tras un periodo de calma
+        """
+        self.marcajes_por_minuto = marcajes_por_minuto
+        self.marcajes_por_minuto_configurado = marcajes_por_minuto
+        self.cubo = CuboTokens(marcajes_por_minuto / 60, rafaga)
+        # Sal del proceso: el orden de las cuentas no se puede predecir de un día a otro
+        self._sal = random.getrandbits(32)
+        self._ventanas_anunciadas = set()
+        self.despachados = 0
+        self.fuera_de_ritmo = 0
+        self.en_espera = 0
+        self.max_en_espera = 0
+        self.max_retraso_s = 0.0
+
+    def ajustar_concurrencia(self, capacidad: int, duracion_marcaje_s: float) -> None:
+        """
+        Limita el ritmo a lo que `capacidad` marcajes simultáneos pueden completar
+
+        Args:
+            capacidad: Contextos de navegador simultáneos (pool.capacidad)
+            duracion_marcaje_s: Duración esperada de un marcaje completo
+        """
+        ritmo_pool = capacidad * 60 / duracion_marcaje_s
+        ritmo = min(self.marcajes_por_minuto_configurado, ritmo_pool)
+        if ritmo < self.marcajes_por_minuto_configurado:
+            logger.warning(f"⚠️ {capacidad} contexto(s) de navegador × {duracion_marcaje_s:g}s por marcaje "
+                           f"solo completan {ritmo_pool:.1f} marcajes/min - Ritmo limitado a ese valor "
+                           f"(configurado {self.marcajes_por_minuto_configurado:g}/min)")
+        self.marcajes_por_minuto = ritmo
+        self.cubo.ajustar(ritmo / 60, min(self.cubo.capacidad, capacidad))
+
+    def asignar(self, ventana: str, inicio: datetime, fin: datetime,
+                cuentas: Iterable[str], cuenta: str) -> Tuple[datetime, datetime]:
+        """
+        Hueco de una cuenta en una ventana compartida
+
+        Args:
+            ventana: Identificador de la ventana (incluye el día: el orden cambia cada día)
+            inicio, fin: Límites de la ventana
+            cuentas: Todas las cuentas que marcan en esa ventana
+            cuenta: Cuenta cuyo hueco se pide
+
+        Returns:
+            (momento asignado, plazo para tomar token: a mitad de camino del siguiente
+            hueco, así un marcaje prestado no coincide con el que llega después)
+        """
+        cuentas = set(cuentas) | {cuenta}
+        momentos = repartir_ventana(inicio, fin, cuentas, semilla=f"{self._sal}|{ventana}")
+        hueco = (fin - inicio) / len(cuentas)
+
+        if ventana not in self._ventanas_anunciadas:
+            if len(self._ventanas_anunciadas) > 256:
+                self._ventanas_anunciadas.clear()
+            self._ventanas_anunciadas.add(ventana)
+            maximo = self.marcajes_por_minuto * (fin - inicio).total_seconds() / 60
+            logger.info(f"🚦 Ventana {ventana}: {len(cuentas)} cuenta(s) entre {inicio.strftime('%H:%M')} "
+                        f"y {fin.strftime('%H:%M')}, una cada {hueco.total_seconds():.0f}s")
+            if len(cuentas) > maximo:
+                logger.warning(f"⚠️ Ventana {ventana}: {len(cuentas)} cuentas superan el ritmo "
+                               f"({self.marcajes_por_minuto:.1f}/min, incluida la capacidad de los "
+                               f"navegadores → máx {maximo:.0f} en la ventana) - "
+                               f"Se marcará por encima del ritmo, repartido en la ventana")
+
+        momento = momentos[cuenta]
+        return momento, min(momento + hueco / 2, fin)
+
+    async def despachar(self, momento: datetime, plazo: datetime,
+                        operacion: Callable[[], Awaitable]):
+        """
+        Espera hasta `momento`, toma un token (a más tardar en `plazo`) y ejecuta la operación
+
+        Args:
+            momento: Hora asignada al marcaje
+            plazo: Si para entonces no hay token, se toma prestado (cada cuenta
+                   tiene un plazo distinto, dentro de su hueco)
+            operacion: Función sin argumentos que retorna el awaitable del marcaje
+        """
+        self.en_espera += 1
+        self.max_en_espera = max(self.max_en_espera, self.en_espera)
+        try:
+            espera = (momento - datetime.now()).total_seconds()
+            if espera > 0:
+                await asyncio.sleep(espera)
+
+            plazo_monotonico = time.monotonic() + max(0.0, (plazo - datetime.now()).total_seconds())
+            dentro_del_ritmo = await self.cubo.adquirir(plazo_monotonico)
+        finally:
+            self.en_espera -= 1
+
+        retraso = max(0.0, (datetime.now() - momento).total_seconds())
+        self.max_retraso_s = max(self.max_retraso_s, retraso)
+        self.despachados += 1
+        if not dentro_del_ritmo:
+            # El aviso va una vez por ventana (asignar); aquí solo el detalle
+            self.fuera_de_ritmo += 1
+            logger.debug(f"🚦 Ritmo de marcajes superado - Se marca en el plazo del hueco "
+                         f"({plazo.strftime('%H:%M:%S')})")
+        elif retraso >= 1:
+            logger.info(f"🚦 Marcaje retrasado {retraso:.0f}s por el límite de ritmo")
+        return await operacion()
+
+    def estadisticas(self) -> Dict:
+        return {
+            'despachados': self.despachados,
+            'fuera_de_ritmo': self.fuera_de_ritmo,
+            'en_espera': self.en_espera,
+            'max_en_espera': self.max_en_espera,
+            'max_retraso_s': round(self.max_retraso_s, 1),
+        }
+
+    def resumen(self) -> str:
+        """Resumen de una línea de las estadísticas"""
+        d = self.estadisticas()
+        return (f"{d['despachados']} despachados, {d['en_espera']} en espera (máx {d['max_en_espera']}), "
+                f"retraso máx {d['max_retraso_s']}s, {d['fuera_de_ritmo']} fuera de ritmo")
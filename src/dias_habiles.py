@@ -0,0 +1,127 @@
+"""
+Aritmética de días hábiles en lote (conciliación de nómina)
+Versión vectorizada de es_dia_laborable sobre arreglos de fechas, con un
+numpy.busdaycalendar construido a partir de festivos_colombia:
+lunes a sábado hábiles, domingos y festivos no.
+
+Requiere numpy (opcional: el resto del proyecto no lo necesita).
+"""
+import threading
+from datetime import date
+from typing import Optional, Tuple
+
+from src.festivos_colombia import get_calendario
+
+try:
+    import numpy as np
+except ImportError:  # numpy es opcional
+    np = None
+
+# Lunes a sábado hábiles, domingo no (como es_dia_laborable)
+MASCARA_SEMANA = "1111110"
+
+# Años de margen al construir el calendario (desplazamientos que cruzan de año)
+_MARGEN_AÑOS = 1
+
+_lock = threading.Lock()
+_calendario_np = None
+_años_cubiertos: Optional[Tuple[int, int]] = None
+
+def _requerir_numpy() -> None:
+    if np is None:
+        raise ImportError("dias_habiles requiere numpy: pip install numpy")
+
+def _como_fechas(fechas):
+    """Convierte date, ISO, listas o arreglos a datetime64[D]"""
+    _requerir_numpy()
+    return np.asarray(fechas, dtype='datetime64[D]')
+
+def _años(fechas) -> Tuple[int, int]:
+    años = fechas.astype('datetime64[Y]').astype(int) + 1970
+    return int(años.min()), int(años.max())
+
+def calendario_habil(año_min: int, año_max: int):
+    """
+    numpy.busdaycalendar con los festivos de [año_min, año_max] (al menos)
+
+    Se reutiliza mientras cubra los años pedidos; si no, se reconstruye con
+    el rango ampliado (los festivos vienen del calendario precalculado).
+    """
+    _requerir_numpy()
+    global _calendario_np, _años_cubiertos
+    with _lock:
+        if _años_cubiertos is not None:
+            if _años_cubiertos[0] <= año_min and año_max <= _años_cubiertos[1]:
+                return _calendario_np
+            año_min = min(año_min, _años_cubiertos[0])
+            año_max = max(año_max, _años_cubiertos[1])
+
+        año_min -= _MARGEN_AÑOS
+        año_max += _MARGEN_AÑOS
+        calendario = get_calendario()
+        festivos = sorted(f for año in range(año_min, año_max + 1) for f in calendario.festivos_año(año))
+        _calendario_np = np.busdaycalendar(weekmask=MASCARA_SEMANA,
+                                           holidays=np.array(festivos, dtype='datetime64[D]'))
+        _años_cubiertos = (año_min, año_max)
+        return _calendario_np
+
+def es_dia_habil(fechas):
+    """
+    Arreglo booleano: True donde la fecha es laborable (no domingo ni festivo)
+
+    Args:
+        fechas: date, texto ISO o arreglo/lista de ellos
+    """
+    fechas = _como_fechas(fechas)
+    if fechas.size == 0:
+        return np.zeros(fechas.shape, dtype=bool)
+    return np.is_busday(fechas, busdaycal=calendario_habil(*_años(fechas)))
+
+def dias_habiles_entre(inicios, fines):
+    """
+    Días hábiles en [inicio, fin) para cada par (fin excluido, como numpy.busday_count)
+
+    Si fin < inicio el resultado es negativo. Admite difusión: un inicio
+    contra muchos fines o viceversa.
+    """
+    inicios = _como_fechas(inicios)
+    fines = _como_fechas(fines)
+    if inicios.size == 0 or fines.size == 0:
+        return np.zeros(np.broadcast(inicios, fines).shape, dtype=np.int64)
+    año_min = min(_años(inicios)[0], _años(fines)[0])
+    año_max = max(_años(inicios)[1], _años(fines)[1])
+    return np.busday_count(inicios, fines, busdaycal=calendario_habil(año_min, año_max))
+
+def desplazar_dias_habiles(fechas, n, roll: str = 'forward'):
+    """
+    Suma n días hábiles a cada fecha (n negativo retrocede)
+
+    Args:
+        fechas: date, texto ISO o arreglo/lista de ellos
+        n: Entero o arreglo de enteros (difusión con fechas)
+        roll: Qué hacer si la fecha de partida no es hábil
+              ('forward', 'backward', 'raise'...; ver numpy.busday_offset)
+
+    Returns:
+        Arreglo datetime64[D]
+    """
+    fechas = _como_fechas(fechas)
+    n = np.asarray(n, dtype=np.int64)
+    if fechas.size == 0:
+        return fechas
+    año_min, año_max = _años(fechas)
+    # ~300 días hábiles por año: cubrir también los años a los que se llega
+    margen = int(np.abs(n).max()) // 300 + 1 if n.size else 0
+    calendario = calendario_habil(año_min - margen, año_max + margen)
+    return np.busday_offset(fechas, n, roll=roll, busdaycal=calendario)
+
+def mascara_dias_habiles(desde: date, hasta: date):
+    """
+    Fechas de [desde, hasta] (ambas incluidas) y su máscara de días hábiles
+
+    Returns:
+        (fechas datetime64[D], máscara booleana)
+    """
+    _requerir_numpy()
+    fechas = np.arange(np.datetime64(desde, 'D'), np.datetime64(hasta, 'D') + 1, dtype='datetime64[D]')
+    return fechas, es_dia_habil(fechas)
@@ -1,9 +1,13 @@
 """
 Módulo para gestionar festivos en Colombia
 Incluye festivos fijos y móviles según la ley colombiana
+
+Los festivos se precalculan por año en un calendario en memoria (frozenset por
+año, extendido bajo demanda), así que es_festivo/es_dia_laborable son O(1)
 """
+import threading
 from datetime import datetime, date
-from typing import List
+from typing import Dict, FrozenSet, List, Optional
 
 def calcular_pascua(año: int) -> date:
     """Calcula la fecha de Pascua usando el algoritmo de Meeus/Jones/Butcher"""
@@ -85,10 +89,65 @@ def obtener_festivos_colombia(año: int) -> List[date]:
     
     return sorted(festivos)
 
+class CalendarioFestivos:
+    """Festivos precalculados por año con consultas O(1) (thread-safe)"""
+
+    def __init__(self, año_inicio: Optional[int] = None, años: int = 3):
+        """
+        Args:
+            año_inicio: Primer año a precalcular (default: el anterior al actual)
+            años: Cantidad de años a precalcular; los demás se calculan al consultarlos
+        """
+        self._lock = threading.Lock()
+        self._festivos: Dict[int, FrozenSet[date]] = {}
+        self.consultas = 0
+        self.festivos_encontrados = 0
+        self.extensiones = 0
+
+        if año_inicio is None:
+            año_inicio = date.today().year - 1
+        for año in range(año_inicio, año_inicio + años):
+            self._festivos[año] = frozenset(obtener_festivos_colombia(año))
+
+    def festivos_año(self, año: int) -> FrozenSet[date]:
+        """Festivos del año (se calculan una sola vez)"""
+        festivos = self._festivos.get(año)
+        if festivos is None:
+            with self._lock:
+                festivos = self._festivos.get(año)
+                if festivos is None:
+                    festivos = frozenset(obtener_festivos_colombia(año))
+                    self._festivos[año] = festivos
+                    self.extensiones += 1
+        return festivos
+
+    def es_festivo(self, fecha: date) -> bool:
+        self.consultas += 1
+        if fecha in self.festivos_año(fecha.year):
+            self.festivos_encontrados += 1
+            return True
+        return False
+
+    def estadisticas(self) -> Dict:
+        return {
+            'consultas': self.consultas,
+            'festivos_encontrados': self.festivos_encontrados,
+            'años': sorted(self._festivos),
+            'extensiones': self.extensiones,
+        }
+
+_calendario: Optional[CalendarioFestivos] = None
+
+def get_calendario() -> CalendarioFestivos:
+    """Retorna el calendario de festivos del proceso"""
+    global _calendario
+    if _calendario is None:
+        _calendario = CalendarioFestivos()
+    return _calendario
+
 def es_festivo(fecha: date) -> bool:
     """Verifica si una fecha es festivo en Colombia"""
-    festivos = obtener_festivos_colombia(fecha.year)
-    return fecha in festivos
+    return get_calendario().es_festivo(fecha)
 
 def es_dia_laborable(fecha: date = None) -> bool:
     """
@@ -120,7 +179,7 @@ def listar_festivos_año(año: int = None) -> None:
     if año is None:
         año = datetime.now().year
     
-    festivos = obtener_festivos_colombia(año)
+    festivos = sorted(get_calendario().festivos_año(año))
     print(f"\n📅 Festivos en Colombia {año}:")
     print("=" * 60)
     
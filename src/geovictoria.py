@@ -1,21 +1,92 @@
 import asyncio
 import logging
 import os
+import sys
+import time
+from contextlib import asynccontextmanager, AsyncExitStack
+from contextvars import ContextVar
 from datetime import datetime
+from enum import Enum
 from pathlib import Path
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from dotenv import load_dotenv
 
+# Agregar el directorio raíz al path para importaciones
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.pool_navegadores import PoolNavegadores, get_pool_activo
+from src.sesiones import get_almacen_sesiones
+from src.bloqueo_recursos import PerfilBloqueo, instalar_bloqueo
+from src.metricas import iniciar_medicion, finalizar_medicion, fase
+from src.circuito import get_circuito
+from src.cache_estado import get_cache, clave_estado
+
+# Cargar variables de entorno
+load_dotenv()
+
 # Configuración
 class Config:
-    LOGIN_URL = "https://clients.geovictoria.com/account/login?ReturnUrl=%2f"
-    IFRAME_DOMAIN = "gvportal.geovictoria.com"
-    IFRAME_TIMEOUT = 30000  # Reducido de 60s a 30s
-    BUTTON_TIMEOUT = 5000
-    MAX_RETRIES = 2  # Reducido de 3 a 2 para más rapidez
-    RETRY_DELAY = 1  # Reducido de 2s a 1s
+    # Sobrescribibles por entorno para apuntar al simulador local (src/simulador_geovictoria.py)
+    LOGIN_URL = os.getenv("GEOVICTORIA_LOGIN_URL", "https://clients.geovictoria.com/account/login?ReturnUrl=%2f")
+    IFRAME_DOMAIN = os.getenv("GEOVICTORIA_IFRAME_DOMAIN", "gvportal.geovictoria.com")
+    IFRAME_TIMEOUT = 30000  # Plazo único para el iframe y el render de sus botones
+    BUTTON_TIMEOUT = 5000  # Espera mínima de los botones aunque el plazo del iframe se haya agotado
     HEADLESS = False
     LOGIN_TIMEOUT = 10000  # Timeout específico para login
+    
+    # Navegador y contexto
+    NAVEGADOR_ARGS = [
+        '--disable-blink-features=AutomationControlled',
+        '--disable-dev-shm-usage',
+        '--no-sandbox'
+    ]
+    CONTEXTO_OPCIONES = {
+        'viewport': {'width': 1920, 'height': 1080},
+        'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
+        'locale': 'es-CO',
+        'timezone_id': 'America/Bogota'
+    }
+    # Ocultar que es un navegador automatizado
+    SCRIPT_OCULTAR_WEBDRIVER = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+    
+    # Pool de navegadores (usado por el programador)
+    POOL_MAX_NAVEGADORES = 1
+    POOL_CONTEXTOS_POR_NAVEGADOR = 4
+    POOL_MAX_USOS = 25  # Reciclar Chromium tras N contextos
+    
+    # Bloqueo de recursos innecesarios (imágenes, fuentes, analítica)
+    BLOQUEO_RECURSOS = True
+    BLOQUEO_TIPOS = ('image', 'media', 'font')
+    BLOQUEO_DOMINIOS = (
+        'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+        'facebook.net', 'facebook.com', 'hotjar.com', 'clarity.ms',
+        'intercom.io', 'intercomcdn.com', 'zdassets.com', 'zendesk.com',
+        'nr-data.net', 'newrelic.com', 'segment.io', 'mixpanel.com',
+    )
+    
+    # Marcaje por lotes (varias cuentas)
+    LOTE_MAX_CONCURRENCIA = 8
+    
+    # Vigencia en caché del estado publicado tras un marcaje exitoso (segundos)
+    TTL_POST_MARCAJE = 600
+
+class EstadoBoton(str, Enum):
+    """Botón de marcaje visible en el portal"""
+    ENTRADA = "Entrada"
+    SALIDA = "Salida"
+    NINGUNO = "Ninguno"
+    
+    def __str__(self):
+        return self.value
+    
+    def siguiente(self) -> "EstadoBoton":
+        """Botón que muestra el portal después de marcar este"""
+        if self is EstadoBoton.ENTRADA:
+            return EstadoBoton.SALIDA
+        if self is EstadoBoton.SALIDA:
+            return EstadoBoton.ENTRADA
+        return EstadoBoton.NINGUNO
 
 # Configurar logging
 log_dir = Path(__file__).parent / "logs"
@@ -32,9 +103,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Cargar variables de entorno
-load_dotenv()
-
 def get_credentials():
     """Obtiene credenciales desde variables de entorno o archivo .env"""
     usuario = os.getenv("GEOVICTORIA_USER")
@@ -49,62 +117,147 @@ def get_credentials():
     
     return usuario, password
 
-async def wait_for_iframe(page, max_retries=2):
-    """Espera y busca el iframe con reintentos optimizados"""
-    for attempt in range(1, max_retries + 1):
-        try:
-            if attempt == 1:
-                logger.debug(f"Buscando iframe...")
+def crear_pool_navegadores(max_navegadores: int = None) -> PoolNavegadores:
+    """Crea un pool de navegadores con la configuración de GeoVictoria"""
+    return PoolNavegadores(
+        max_navegadores=max_navegadores or Config.POOL_MAX_NAVEGADORES,
+        max_usos=Config.POOL_MAX_USOS,
+        contextos_por_navegador=Config.POOL_CONTEXTOS_POR_NAVEGADOR,
+        headless=Config.HEADLESS,
+        args=Config.NAVEGADOR_ARGS,
+        opciones_contexto=Config.CONTEXTO_OPCIONES,
+        init_script=Config.SCRIPT_OCULTAR_WEBDRIVER
+    )
+
+def perfil_bloqueo() -> PerfilBloqueo:
+    """Perfil de bloqueo que preserva documentos y XHR del login y del portal"""
+    dominios_geovictoria = [
+        urlparse(Config.LOGIN_URL).hostname,
+        Config.IFRAME_DOMAIN.split(':')[0],
+    ]
+    return PerfilBloqueo(
+        tipos_bloqueados=Config.BLOQUEO_TIPOS,
+        dominios_bloqueados=Config.BLOQUEO_DOMINIOS,
+        dominios_permitidos=[d for d in dominios_geovictoria if d]
+    )
+
+@asynccontextmanager
+async def abrir_contexto(headless=None, storage_state=None):
+    """Entrega un BrowserContext listo para usar
+    
+    Si el proceso tiene un pool de navegadores activo (programador), el contexto
+    sale de un Chromium ya caliente. Si no (scripts, ejecución manual), se lanza
+    un navegador propio que se cierra al terminar.
+    
+    Args:
+        headless: Forzar modo headless del navegador propio (None = Config.HEADLESS)
+        storage_state: Sesión guardada (cookies/localStorage) para el contexto
+    """
+    opciones = {'storage_state': storage_state} if storage_state else {}
+    
+    async with AsyncExitStack() as stack:
+        with fase("navegador"):
+            pool = get_pool_activo()
+            if pool is not None:
+                context = await stack.enter_async_context(pool.contexto(**opciones))
             else:
-                logger.info(f"Reintentando buscar iframe ({attempt}/{max_retries})...")
-            
-            # Intentar esperar a que la página cargue (con timeout tolerable)
-            try:
-                await page.wait_for_load_state("networkidle", timeout=10000)
-                logger.debug("Página cargada (networkidle)")
-            except PlaywrightTimeoutError:
-                logger.debug("Timeout esperando networkidle, continuando...")
-            
-            # Esperar más tiempo para que los iframes se carguen
-            await asyncio.sleep(4)
-            
-            # Log de qué frames hay disponibles
-            frames_urls = [f.url for f in page.frames]
-            logger.info(f"Frames disponibles en intento {attempt}: {len(page.frames)}")
-            for idx, url in enumerate(frames_urls):
-                logger.info(f"  Frame {idx}: {url}")
-            
-            # Buscar iframe gvportal directamente por URL
-            for frame in page.frames:
-                if Config.IFRAME_DOMAIN in frame.url:
-                    logger.info(f"✅ Iframe encontrado: {frame.url}")
-                    return frame
-            
-            # Si no se encontró, intentar esperar más tiempo
-            if attempt < max_retries:
-                logger.warning(f"Iframe gvportal no encontrado en intento {attempt}, esperando...")
-                await asyncio.sleep(3)
-                
-        except Exception as e:
-            logger.warning(f"⚠️ Error buscando iframe en intento {attempt}: {e}")
-            if attempt < max_retries:
-                await asyncio.sleep(Config.RETRY_DELAY)
+                logger.debug("Iniciando navegador...")
+                p = await stack.enter_async_context(async_playwright())
+                browser = await p.chromium.launch(
+                    headless=Config.HEADLESS if headless is None else headless,
+                    args=Config.NAVEGADOR_ARGS
+                )
+                stack.push_async_callback(browser.close)
+                context = await browser.new_context(**Config.CONTEXTO_OPCIONES, **opciones)
+                await context.add_init_script(Config.SCRIPT_OCULTAR_WEBDRIVER)
+        
+        yield context
+
+# Hora límite (datetime) del marcaje de esta tarea: pasado ese momento no se hace clic.
+# El programador la fija al final de la ventana del turno (None = sin límite)
+limite_marcaje: ContextVar = ContextVar('limite_marcaje', default=None)
+
+def fuera_de_limite(momento: str) -> bool:
+    """True (y error en el log) si ya pasó el límite del marcaje de esta tarea"""
+    limite = limite_marcaje.get()
+    ahora = datetime.now()
+    if limite is None or ahora <= limite:
+        return False
+    logger.error(f"❌ {momento} a las {ahora.strftime('%H:%M:%S')}, después del límite del marcaje "
+                 f"({limite.strftime('%H:%M:%S')}) - NO se marcará")
+    return True
+
+# Plazo (time.monotonic) del portal abierto en esta tarea: los botones del iframe
+# pueden esperar lo que quede de Config.IFRAME_TIMEOUT mientras la SPA se renderiza
+_plazo_portal: ContextVar = ContextVar('plazo_portal', default=None)
+
+async def wait_for_iframe(page, timeout=None):
+    """Espera el iframe del portal guiado por eventos de frames, con un único plazo
+    
+    Retorna en cuanto un frame de Config.IFRAME_DOMAIN se adjunta o navega,
+    sin esperas fijas. Solo si el frame nunca aparece se agota el plazo
+    completo (Config.IFRAME_TIMEOUT).
+    
+    Args:
+        timeout: Plazo total en milisegundos (default: Config.IFRAME_TIMEOUT)
+    """
+    timeout = timeout or Config.IFRAME_TIMEOUT
+    inicio = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    encontrado = loop.create_future()
     
-    # Log de diagnóstico final
+    def revisar_frame(frame):
+        if not encontrado.done() and Config.IFRAME_DOMAIN in frame.url:
+            encontrado.set_result(frame)
+    
+    logger.debug("Buscando iframe...")
+    page.on("frameattached", revisar_frame)
+    page.on("framenavigated", revisar_frame)
     try:
-        frames_urls = [f.url for f in page.frames]
-        logger.error(f"❌ No se encontró iframe después de {max_retries} intentos")
-        logger.error(f"Frames finales: {frames_urls}")
+        # El frame pudo adjuntarse antes de suscribirse a los eventos
+        for frame in page.frames:
+            revisar_frame(frame)
+        
+        target_frame = await asyncio.wait_for(encontrado, timeout / 1000)
+        
+        # Esperar el DOM del iframe dentro del mismo plazo
+        restante = timeout - (time.perf_counter() - inicio) * 1000
+        try:
+            await target_frame.wait_for_load_state("domcontentloaded", timeout=max(restante, 1))
+        except PlaywrightTimeoutError:
+            logger.debug("Timeout esperando domcontentloaded del iframe, continuando...")
+        
+        logger.info(f"✅ Iframe encontrado en {(time.perf_counter() - inicio) * 1000:.0f} ms: {target_frame.url}")
+        return target_frame
+        
+    except asyncio.TimeoutError:
+        # Log de diagnóstico final
+        try:
+            frames_urls = [f.url for f in page.frames]
+            logger.error(f"❌ No se encontró iframe después de {timeout / 1000:.0f}s")
+            logger.error(f"Frames finales: {frames_urls}")
+        except Exception as e:
+            logger.error(f"❌ No se encontró iframe. Error al listar frames: {e}")
+        return None
     except Exception as e:
-        logger.error(f"❌ No se encontró iframe. Error al listar frames: {e}")
-    
-    return None
+        logger.warning(f"⚠️ Error buscando iframe: {e}")
+        return None
+    finally:
+        page.remove_listener("frameattached", revisar_frame)
+        page.remove_listener("framenavigated", revisar_frame)
 
-async def login(page, usuario, password):
-    """Realiza el login con manejo optimizado de errores"""
+async def login(page, usuario, password, sesion_guardada=False):
+    """Realiza el login con manejo optimizado de errores
+    
+    Args:
+        sesion_guardada: True si el contexto se creó con una sesión persistida.
+                         Si GeoVictoria la acepta, la página de login redirige
+                         directamente al portal y se omite el formulario.
+    """
     try:
         logger.debug("Navegando a página de login...")
-        await page.goto(Config.LOGIN_URL, wait_until="domcontentloaded")
+        with fase("goto"):
+            await page.goto(Config.LOGIN_URL, wait_until="domcontentloaded")
         
         # Verificar si nos redirigió a "browsernotsupported"
         if "browsernotsupported" in page.url:
@@ -113,13 +266,21 @@ async def login(page, usuario, password):
             logger.error("   Esto puede resolverse usando un navegador no-headless")
             return False
         
-        logger.debug("Completando formulario de login...")
-        await page.fill("#user", usuario)
-        await page.fill("input[type='password']", password)
-        await page.keyboard.press("Enter")
+        # Sesión guardada válida: el portal ya no muestra el formulario
+        if sesion_guardada:
+            if "login" not in page.url:
+                logger.info("🔑 Sesión guardada aceptada - Login omitido")
+                return True
+            logger.info("🔑 Sesión guardada rechazada - Iniciando sesión con formulario")
         
-        logger.debug("Esperando confirmación de login...")
-        await page.wait_for_url(lambda url: "login" not in url, timeout=Config.LOGIN_TIMEOUT)
+        with fase("login"):
+            logger.debug("Completando formulario de login...")
+            await page.fill("#user", usuario)
+            await page.fill("input[type='password']", password)
+            await page.keyboard.press("Enter")
+            
+            logger.debug("Esperando confirmación de login...")
+            await page.wait_for_url(lambda url: "login" not in url, timeout=Config.LOGIN_TIMEOUT)
         
         # Verificar otra vez después del login
         if "browsernotsupported" in page.url:
@@ -136,114 +297,189 @@ async def login(page, usuario, password):
         logger.error(f"❌ Error durante login: {e}")
         return False
 
-async def verificar_boton_disponible(target_frame):
-    """Verifica qué botón está disponible sin ejecutar marcaje"""
-    try:
-        # Verificar si está disponible Marcar Entrada
-        btn_entry = target_frame.locator("text=Marcar Entrada")
-        await btn_entry.wait_for(timeout=Config.BUTTON_TIMEOUT, state="visible")
-        logger.debug("🔍 Botón disponible: Marcar Entrada")
-        return "Entrada"
-    except PlaywrightTimeoutError:
-        pass
+@asynccontextmanager
+async def abrir_portal(usuario, password, headless=None):
+    """Abre el portal autenticado y entrega el iframe de marcaje (o None si falla)
+    
+    Reutiliza la sesión guardada de la cuenta cuando existe; solo si GeoVictoria
+    la rechaza se completa el formulario de login. Tras un login correcto la
+    sesión se vuelve a guardar para el siguiente trabajo.
+    
+    Está protegido por el circuit breaker del portal: con el circuito abierto
+    retorna None sin abrir el navegador.
+    """
+    circuito = get_circuito()
+    if not circuito.permitir():
+        logger.warning(f"🔌 Circuito {circuito.nombre} abierto - Consulta omitida "
+                       f"(próxima prueba en {circuito.segundos_para_prueba():.0f}s)")
+        yield None
+        return
+    
+    sesiones = get_almacen_sesiones()
+    storage_state = sesiones.obtener(usuario)
+    # Resultado del portal para el circuito: None = pendiente
+    portal_ok = None
+    error = None
+    tarde = False
     
     try:
-        # Verificar si está disponible Marcar Salida
-        btn_exit = target_frame.locator("text=Marcar Salida")
-        await btn_exit.wait_for(timeout=Config.BUTTON_TIMEOUT, state="visible")
-        logger.debug("🔍 Botón disponible: Marcar Salida")
-        return "Salida"
-    except PlaywrightTimeoutError:
-        pass
+        async with abrir_contexto(headless=headless, storage_state=storage_state) as context:
+            # Con todos los navegadores ocupados el contexto puede llegar tarde
+            if fuera_de_limite("Contexto del navegador obtenido"):
+                tarde = True
+                yield None
+                return
+            
+            bloqueo = None
+            if Config.BLOQUEO_RECURSOS:
+                bloqueo = await instalar_bloqueo(context, perfil_bloqueo())
+            
+            try:
+                page = await context.new_page()
+                
+                # Login
+                if not await login(page, usuario, password, sesion_guardada=storage_state is not None):
+                    logger.error("❌ Fallo en el proceso de login")
+                    sesiones.invalidar(usuario)
+                    # Si el formulario de login cargó, el portal responde: el problema es de la cuenta
+                    portal_ok = "login" in page.url
+                    error = "login"
+                    yield None
+                    return
+                
+                # Buscar iframe (retorna en cuanto el frame aparece); lo que sobre del
+                # plazo queda para que la SPA del iframe muestre sus botones
+                _plazo_portal.set(time.monotonic() + Config.IFRAME_TIMEOUT / 1000)
+                with fase("iframe"):
+                    target_frame = await wait_for_iframe(page)
+                
+                if not target_frame:
+                    logger.error("❌ No se pudo encontrar el iframe")
+                    # La sesión reutilizada pudo quedar a medias: forzar login completo la próxima vez
+                    if storage_state is not None:
+                        sesiones.invalidar(usuario)
+                    portal_ok = False
+                    error = "iframe"
+                    yield None
+                    return
+                
+                await sesiones.guardar(context, usuario)
+                portal_ok = True
+                yield target_frame
+            finally:
+                if bloqueo is not None:
+                    logger.info(f"🚫 Recursos bloqueados: {bloqueo.resumen()}")
+    except Exception as e:
+        if portal_ok is None:
+            error = str(e) or type(e).__name__
+        raise
+    finally:
+        # Los errores del llamador después de entregar el iframe no son fallos del portal
+        _plazo_portal.set(None)
+        if tarde:
+            pass  # El portal no llegó a consultarse
+        elif portal_ok:
+            circuito.registrar_exito()
+        else:
+            circuito.registrar_fallo(error)
+
+async def detectar_estado_boton(target_frame, timeout=None) -> EstadoBoton:
+    """Detecta en una sola espera qué botón de marcaje está visible
+    
+    Espera ambos botones a la vez con un localizador combinado, así que
+    resuelve en cuanto cualquiera aparece. El iframe se entrega al cargar su
+    DOM, antes de que la SPA muestre los botones: la espera usa lo que queda
+    del plazo del portal (Config.IFRAME_TIMEOUT), y al menos Config.BUTTON_TIMEOUT.
+    """
+    if timeout is None:
+        timeout = Config.BUTTON_TIMEOUT
+        plazo = _plazo_portal.get()
+        if plazo is not None:
+            timeout = max(timeout, (plazo - time.monotonic()) * 1000)
+    
+    btn_entry = target_frame.locator("text=Marcar Entrada")
+    btn_exit = target_frame.locator("text=Marcar Salida")
     
-    logger.warning("⚠️ Ningún botón de marcaje disponible")
-    return None
+    with fase("boton"):
+        try:
+            await btn_entry.or_(btn_exit).first.wait_for(timeout=timeout, state="visible")
+        except PlaywrightTimeoutError:
+            return EstadoBoton.NINGUNO
+        
+        # Entrada tiene prioridad, igual que en el flujo de marcaje
+        if await btn_entry.first.is_visible():
+            return EstadoBoton.ENTRADA
+        if await btn_exit.first.is_visible():
+            return EstadoBoton.SALIDA
+        return EstadoBoton.NINGUNO
 
-async def marcar_asistencia(target_frame):
-    """Intenta marcar entrada o salida con validación optimizada"""
+async def verificar_boton_disponible(target_frame):
+    """Verifica qué botón está disponible sin ejecutar marcaje
+    
+    Returns:
+        EstadoBoton.ENTRADA, EstadoBoton.SALIDA o None si no hay botón
+    """
+    estado = await detectar_estado_boton(target_frame)
+    
+    if estado is EstadoBoton.NINGUNO:
+        logger.warning("⚠️ Ningún botón de marcaje disponible")
+        return None
+    
+    logger.debug(f"🔍 Botón disponible: Marcar {estado}")
+    return estado
+
+async def marcar_asistencia(target_frame, estado=None):
+    """Intenta marcar entrada o salida con validación optimizada
+    
+    Args:
+        estado: EstadoBoton ya detectado (evita repetir la detección)
+    """
     accion = None
     
     try:
-        # Intentar marcar entrada
-        logger.debug("Buscando botón 'Marcar Entrada'...")
-        btn_entry = target_frame.locator("text=Marcar Entrada")
-        await btn_entry.wait_for(timeout=Config.BUTTON_TIMEOUT, state="visible")
+        if estado is None:
+            logger.debug("Buscando botón de marcaje...")
+            estado = await detectar_estado_boton(target_frame)
+        
+        if estado is EstadoBoton.NINGUNO:
+            logger.warning("❌ Ningún botón de marcaje disponible")
+            return None
         
-        logger.info("Haciendo clic en 'Marcar Entrada'...")
-        await btn_entry.click(force=True)
-        accion = "Entrada"
+        logger.info(f"Haciendo clic en 'Marcar {estado}'...")
+        with fase("click"):
+            await target_frame.locator(f"text=Marcar {estado}").first.click(force=True)
+        accion = estado
         
         # Esperar confirmación visual (reducido de 2s a 1s)
         await asyncio.sleep(1)
-        logger.info("✅ Marcaje de Entrada realizado")
-        
-    except PlaywrightTimeoutError:
-        logger.debug("Botón 'Marcar Entrada' no disponible, intentando Salida...")
+        logger.info(f"✅ Marcaje de {estado} realizado")
         
-        try:
-            # Intentar marcar salida
-            btn_exit = target_frame.locator("text=Marcar Salida")
-            await btn_exit.wait_for(timeout=Config.BUTTON_TIMEOUT, state="visible")
-            
-            logger.info("Haciendo clic en 'Marcar Salida'...")
-            await btn_exit.click(force=True)
-            accion = "Salida"
-            
-            # Esperar confirmación visual (reducido de 2s a 1s)
-            await asyncio.sleep(1)
-            logger.info("✅ Marcaje de Salida realizado")
-            
-        except PlaywrightTimeoutError:
-            logger.warning("❌ Ningún botón de marcaje disponible")
-        except Exception as e:
-            logger.error(f"❌ Error al marcar salida: {e}")
-            
     except Exception as e:
-        logger.error(f"❌ Error al marcar entrada: {e}")
+        logger.error(f"❌ Error al marcar {estado or 'asistencia'}: {e}")
+        accion = None
     
     return accion
 
-async def verificar_estado():
-    """Verifica qué botón está disponible en GeoVictoria sin ejecutar marcaje"""
-    browser = None
+async def verificar_estado(usuario=None, password=None):
+    """Verifica qué botón está disponible en GeoVictoria sin ejecutar marcaje
+    
+    Args:
+        usuario, password: Credenciales de la cuenta. Si no se indican, se usan
+                           las de GEOVICTORIA_USER/GEOVICTORIA_PASSWORD.
+    """
     boton_disponible = None
+    medicion = None
     
     try:
         # Obtener credenciales
-        usuario, password = get_credentials()
+        if not usuario or not password:
+            usuario, password = get_credentials()
         logger.debug("🔍 Verificando estado en GeoVictoria...")
+        medicion = iniciar_medicion("verificar_estado", usuario)
         
-        # Iniciar navegador con configuración mejorada
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=False,  # Usar navegador visible para evitar detección
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox'
-                ]
-            )
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-                locale='es-CO',
-                timezone_id='America/Bogota'
-            )
-            # Ocultar que es un navegador automatizado
-            await context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            page = await context.new_page()
-            
-            # Login
-            if not await login(page, usuario, password):
-                logger.error("❌ Fallo en el proceso de login")
-                return None
-            
-            # Buscar iframe
-            target_frame = await wait_for_iframe(page, max_retries=Config.MAX_RETRIES)
-            
+        # Navegador visible para evitar detección (si no hay pool activo)
+        async with abrir_portal(usuario, password, headless=False) as target_frame:
             if not target_frame:
-                logger.error("❌ No se pudo encontrar el iframe")
                 return None
             
             # Verificar qué botón está disponible
@@ -252,24 +488,28 @@ async def verificar_estado():
     except Exception as e:
         logger.error(f"❌ Error verificando estado: {e}")
     finally:
-        if browser:
-            await browser.close()
+        if medicion is not None:
+            finalizar_medicion(medicion, boton_disponible)
     
     return boton_disponible
 
-async def run(accion_esperada=None):
+async def run(accion_esperada=None, usuario=None, password=None):
     """Función principal con manejo optimizado de errores
     
     Args:
         accion_esperada: "Entrada" o "Salida". Si se especifica, solo ejecuta si coincide.
                         Si es None, ejecuta lo que esté disponible (modo manual).
+        usuario, password: Credenciales de la cuenta. Si no se indican, se usan
+                           las de GEOVICTORIA_USER/GEOVICTORIA_PASSWORD.
     """
-    browser = None
     accion = None
+    medicion = None
     
     try:
         # Obtener credenciales
-        usuario, password = get_credentials()
+        if not usuario or not password:
+            usuario, password = get_credentials()
+        medicion = iniciar_medicion("run", usuario)
         logger.info("=" * 60)
         logger.info(f"Iniciando marcaje automático GeoVictoria")
         logger.info(f"Usuario: {usuario}")
@@ -277,45 +517,20 @@ async def run(accion_esperada=None):
             logger.info(f"Acción esperada: {accion_esperada}")
         logger.info("=" * 60)
         
-        # Iniciar navegador con configuración mejorada
-        async with async_playwright() as p:
-            logger.debug("Iniciando navegador...")
-            browser = await p.chromium.launch(
-                headless=Config.HEADLESS,
-                args=[
-                    '--disable-blink-features=AutomationControlled',
-                    '--disable-dev-shm-usage',
-                    '--no-sandbox'
-                ]
-            )
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36',
-                locale='es-CO',
-                timezone_id='America/Bogota'
-            )
-            # Ocultar que es un navegador automatizado
-            await context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            page = await context.new_page()
-            
-            # Login
-            if not await login(page, usuario, password):
-                logger.error("❌ Fallo en el proceso de login")
-                return None
-            
-            # Buscar iframe con reintentos
-            target_frame = await wait_for_iframe(page, max_retries=Config.MAX_RETRIES)
-            
+        # Contexto del pool de navegadores (o navegador propio en modo manual)
+        async with abrir_portal(usuario, password) as target_frame:
             if not target_frame:
-                logger.error("❌ No se pudo encontrar el iframe")
                 return None
             
             # Si se especifica acción esperada, validar primero
+            boton_disponible = None
             if accion_esperada:
                 boton_disponible = await verificar_boton_disponible(target_frame)
                 
                 if boton_disponible != accion_esperada:
+                    # Lo observado sigue siendo un estado válido para el caché
+                    if boton_disponible:
+                        get_cache().set(boton_disponible, clave_estado(usuario))
                     logger.warning("=" * 60)
                     logger.warning(f"⚠️ VALIDACIÓN FALLIDA")
                     logger.warning(f"   • Acción esperada: {accion_esperada}")
@@ -326,8 +541,18 @@ async def run(accion_esperada=None):
                 
                 logger.debug(f"✅ Validación OK: Botón '{boton_disponible}' coincide")
             
-            # Marcar asistencia
-            accion = await marcar_asistencia(target_frame)
+            if fuera_de_limite("Portal listo para marcar"):
+                return None
+            
+            # Marcar asistencia (reutilizando el estado ya detectado)
+            accion = await marcar_asistencia(target_frame, estado=boton_disponible)
+            
+            # Write-through: tras el clic se conoce el siguiente botón sin volver a consultar.
+            # Si el clic no se hizo o falló, el estado es desconocido y se invalida.
+            if accion:
+                get_cache().set(accion.siguiente(), clave_estado(usuario), ttl_segundos=Config.TTL_POST_MARCAJE)
+            else:
+                get_cache().invalidar(clave_estado(usuario))
             
             if accion:
                 logger.info("=" * 60)
@@ -349,8 +574,8 @@ async def run(accion_esperada=None):
     except Exception as e:
         logger.error(f"❌ Error inesperado: {e}", exc_info=True)
     finally:
-        if browser:
-            await browser.close()
+        if medicion is not None:
+            finalizar_medicion(medicion, accion)
     
     return accion
 
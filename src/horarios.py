@@ -0,0 +1,137 @@
+"""
+Horarios de marcaje (turnos) por cuenta
+Se leen de config/horarios.json (ver config/horarios.example.json). Si el
+archivo no existe, la cuenta de GEOVICTORIA_USER usa el turno predeterminado
+del programador (HorarioConfig).
+
+Cada cuenta genera sus propios trabajos ("entrada_semana:usuario", ...), así
+que un cambio en el archivo se aplica comparando trabajos: solo se agregan,
+quitan o reprograman los afectados.
+"""
+import json
+import logging
+import os
+from datetime import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from src.registro_ejecuciones import cuenta_predeterminada
+
+logger = logging.getLogger(__name__)
+
+HORARIOS_FILE = Path(__file__).parent.parent / "config" / "horarios.json"
+
+# Trabajos de marcaje de un turno: id -> (tipo de marcaje, días cron, jornada, campo)
+MARCAJES = {
+    'entrada_semana': ("ENTRADA SEMANA (L-V)", 'mon-fri', 'semana', 'entrada'),
+    'salida_semana': ("SALIDA SEMANA (L-V)", 'mon-fri', 'semana', 'salida'),
+    'entrada_sabado': ("ENTRADA SÁBADO", 'sat', 'sabado', 'entrada'),
+    'salida_sabado': ("SALIDA SÁBADO", 'sat', 'sabado', 'salida'),
+}
+
+JORNADAS = ('semana', 'sabado')
+
+def _hora(texto) -> time:
+    """'HH:MM' -> time (ValueError si el formato no es válido)"""
+    try:
+        hora, minuto = str(texto).split(':')
+        return time(int(hora), int(minuto))
+    except (ValueError, TypeError):
+        raise ValueError(f"Hora inválida: {texto!r} (formato HH:MM)")
+
+def _turno(datos: Optional[Dict], base: Dict) -> Dict:
+    """
+    Combina un turno del archivo con su base
+
+    Por jornada: ausente = la de la base, null = no se marca ese día,
+    objeto = entrada/salida (las que falten se toman de la base)
+    """
+    if datos is None:
+        datos = {}
+    if not isinstance(datos, dict):
+        raise ValueError(f"Turno inválido: {datos!r}")
+
+    turno = {}
+    for jornada in JORNADAS:
+        if jornada not in datos:
+            turno[jornada] = base.get(jornada)
+            continue
+        valor = datos[jornada]
+        if valor is None:
+            turno[jornada] = None
+            continue
+        if not isinstance(valor, dict):
+            raise ValueError(f"'{jornada}' debe ser un objeto {{entrada, salida}} o null, no {valor!r}")
+        base_jornada = base.get(jornada) or {}
+        turno[jornada] = {
+            campo: _hora(valor[campo]) if campo in valor else base_jornada.get(campo)
+            for campo in ('entrada', 'salida')
+        }
+        if None in turno[jornada].values():
+            raise ValueError(f"Jornada '{jornada}' sin entrada o salida")
+    return turno
+
+def cargar_horarios(turno_base: Dict, ruta: Path = None) -> Dict[str, Dict]:
+    """
+    Turnos por cuenta: {usuario: {'semana': {'entrada', 'salida'} | None, 'sabado': ...}}
+
+    Args:
+        turno_base: Turno usado cuando el archivo no define uno
+        ruta: Archivo de horarios (default: config/horarios.json)
+
+    Raises:
+        ValueError: Si el archivo no es JSON válido o tiene horas mal escritas
+    """
+    ruta = Path(ruta) if ruta else HORARIOS_FILE
+    if not ruta.exists():
+        return {cuenta_predeterminada(): turno_base}
+
+    with open(ruta, 'r', encoding='utf-8') as f:
+        datos = json.load(f)
+    if not isinstance(datos, dict):
+        raise ValueError(f"{ruta.name} debe ser un objeto JSON")
+
+    try:
+        predeterminado = _turno(datos.get('predeterminado'), turno_base)
+    except ValueError as e:
+        raise ValueError(f"predeterminado: {e}")
+    cuentas = datos.get('cuentas') or {}
+    if not isinstance(cuentas, dict):
+        raise ValueError("'cuentas' debe ser un objeto {usuario: turno}")
+
+    horarios = {}
+    for usuario, turno in cuentas.items():
+        try:
+            horarios[usuario] = _turno(turno, predeterminado)
+        except ValueError as e:
+            raise ValueError(f"cuentas.{usuario}: {e}")
+    return horarios or {cuenta_predeterminada(): predeterminado}
+
+def trabajos_de(horarios: Dict[str, Dict]) -> Dict[str, Dict]:
+    """id de trabajo -> {'marcaje', 'tipo', 'usuario', 'dias', 'hora', 'minuto'}"""
+    trabajos = {}
+    for usuario, turno in horarios.items():
+        for marcaje, (tipo, dias, jornada, campo) in MARCAJES.items():
+            if not turno.get(jornada):
+                continue
+            hora = turno[jornada][campo]
+            trabajos[f"{marcaje}:{usuario}"] = {
+                'marcaje': marcaje, 'tipo': tipo, 'usuario': usuario,
+                'dias': dias, 'hora': hora.hour, 'minuto': hora.minute,
+            }
+    return trabajos
+
+def comparar_trabajos(actuales: Dict[str, Dict], nuevos: Dict[str, Dict]) -> Tuple[list, list, list]:
+    """(ids a agregar, ids a quitar, ids a reprogramar)"""
+    agregar = [id_ for id_ in nuevos if id_ not in actuales]
+    quitar = [id_ for id_ in actuales if id_ not in nuevos]
+    reprogramar = [id_ for id_ in nuevos if id_ in actuales and nuevos[id_] != actuales[id_]]
+    return agregar, quitar, reprogramar
+
+def firma_archivo(ruta: Path) -> Optional[Tuple[int, int]]:
+    """(mtime, tamaño) del archivo, None si no existe: cambia al editarlo"""
+    try:
+        st = os.stat(ruta)
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,163 @@
+"""
+Marcaje por lotes para varias cuentas de GeoVictoria
+Ejecuta run() para todas las cuentas de un listado sobre un único loop asyncio,
+con un contexto de navegador por cuenta y concurrencia limitada por semáforo
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Optional
+
+# Agregar el directorio raíz al path para importaciones
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.geovictoria import Config, run, get_credentials, crear_pool_navegadores
+from src.pool_navegadores import activar_pool, get_pool_activo
+
+logger = logging.getLogger(__name__)
+
+CUENTAS_FILE = Path(__file__).parent.parent / "config" / "cuentas.json"
+
+def cargar_cuentas(ruta: Path = None) -> List[Dict]:
+    """
+    Carga el listado de cuentas a marcar
+
+    El archivo es una lista JSON de objetos con "usuario" y "password"
+    (ver config/cuentas.example.json). Si no existe, se usa la cuenta única
+    configurada en GEOVICTORIA_USER/GEOVICTORIA_PASSWORD.
+
+    Raises:
+        ValueError: Si el archivo no es una lista de objetos o tiene campos que no son texto
+    """
+    ruta = Path(ruta) if ruta else CUENTAS_FILE
+    if not ruta.exists():
+        logger.info(f"📋 No existe {ruta.name} - Usando la cuenta de las variables de entorno")
+        usuario, password = get_credentials()
+        return [{'usuario': usuario, 'password': password}]
+
+    with open(ruta, 'r', encoding='utf-8') as f:
+        cuentas = json.load(f)
+    if not isinstance(cuentas, list):
+        raise ValueError(f"{ruta.name} debe ser una lista de cuentas")
+
+    validas = []
+    for idx, cuenta in enumerate(cuentas):
+        if not isinstance(cuenta, dict):
+            raise ValueError(f"Cuenta #{idx + 1} de {ruta.name} debe ser un objeto, no {cuenta!r}")
+        for campo in ('usuario', 'password'):
+            if cuenta.get(campo) is not None and not isinstance(cuenta[campo], str):
+                raise ValueError(f"Cuenta #{idx + 1} de {ruta.name}: '{campo}' debe ser texto")
+        if not cuenta.get('usuario') or not cuenta.get('password'):
+            logger.warning(f"⚠️ Cuenta #{idx + 1} sin usuario o password - Omitida")
+            continue
+        validas.append(cuenta)
+
+    logger.info(f"📋 {len(validas)} cuenta(s) cargadas desde {ruta.name}")
+    return validas
+
+async def _marcar_cuenta(cuenta: Dict, accion_esperada: Optional[str], semaforo: asyncio.Semaphore) -> Dict:
+    """Marca una cuenta respetando el límite de concurrencia"""
+    usuario = cuenta['usuario']
+    async with semaforo:
+        inicio = time.perf_counter()
+        resultado = {'usuario': usuario, 'accion': None, 'estado': None, 'duracion_s': None, 'error': None}
+        try:
+            accion = await run(accion_esperada=accion_esperada, usuario=usuario, password=cuenta['password'])
+            resultado['accion'] = accion
+            resultado['estado'] = 'MARCADO' if accion else 'SIN MARCAJE'
+        except Exception as e:
+            resultado['estado'] = 'ERROR'
+            resultado['error'] = str(e)
+            logger.error(f"❌ Error marcando {usuario}: {e}")
+        resultado['duracion_s'] = round(time.perf_counter() - inicio, 1)
+        return resultado
+
+async def run_lote(cuentas: List[Dict], accion_esperada: Optional[str] = None,
+                   max_concurrencia: int = None) -> List[Dict]:
+    """
+    Ejecuta el marcaje de todas las cuentas concurrentemente
+
+    Args:
+        cuentas: Lista de {"usuario", "password"}
+        accion_esperada: "Entrada", "Salida" o None (lo que esté disponible)
+        max_concurrencia: Cuentas procesándose a la vez (default: Config.LOTE_MAX_CONCURRENCIA)
+
+    Returns:
+        Lista de resultados por cuenta, en el mismo orden de entrada
+    """
+    max_concurrencia = max_concurrencia or Config.LOTE_MAX_CONCURRENCIA
+    semaforo = asyncio.Semaphore(max_concurrencia)
+
+    # Reutilizar el pool del proceso si existe; si no, crear uno para el lote
+    pool_propio = None
+    if get_pool_activo() is None:
+        navegadores = math.ceil(max_concurrencia / Config.POOL_CONTEXTOS_POR_NAVEGADOR)
+        pool_propio = crear_pool_navegadores(max_navegadores=navegadores)
+        await pool_propio.iniciar()
+        activar_pool(pool_propio)
+
+    logger.info("=" * 80)
+    logger.info(f"👥 MARCAJE POR LOTES: {len(cuentas)} cuenta(s), concurrencia {max_concurrencia}")
+    if accion_esperada:
+        logger.info(f"   • Acción esperada: {accion_esperada}")
+    logger.info("=" * 80)
+
+    inicio = time.perf_counter()
+    try:
+        resultados = await asyncio.gather(
+            *(_marcar_cuenta(cuenta, accion_esperada, semaforo) for cuenta in cuentas)
+        )
+    finally:
+        if pool_propio is not None:
+            logger.info(f"🧭 Pool de navegadores: {pool_propio.resumen()}")
+            activar_pool(None)
+            await pool_propio.cerrar()
+
+    total = time.perf_counter() - inicio
+    marcados = sum(1 for r in resultados if r['estado'] == 'MARCADO')
+    logger.info(f"✅ Lote completado en {total:.1f}s: {marcados}/{len(cuentas)} cuenta(s) marcadas")
+    return list(resultados)
+
+def formatear_resultados(resultados: List[Dict]) -> str:
+    """Tabla de texto con el resultado de cada cuenta"""
+    ancho = max([len('Usuario')] + [len(r['usuario']) for r in resultados])
+    lineas = [
+        f"{'Usuario':{ancho}} | {'Estado':12} | {'Acción':8} | {'Duración':>9} | Error",
+        "-" * (ancho + 50),
+    ]
+    for r in resultados:
+        duracion = f"{r['duracion_s']:.1f}s" if r['duracion_s'] is not None else "-"
+        lineas.append(
+            f"{r['usuario']:{ancho}} | {r['estado']:12} | {r['accion'] or '-':8} | {duracion:>9} | {r['error'] or ''}"
+        )
+    return "\n".join(lineas)
+
+def main():
+    parser = argparse.ArgumentParser(description="Marcaje GeoVictoria para varias cuentas")
+    parser.add_argument('--accion', choices=['Entrada', 'Salida'], default=None,
+                        help="Acción esperada (por defecto: la que esté disponible)")
+    parser.add_argument('--cuentas', type=Path, default=None,
+                        help=f"Archivo JSON de cuentas (por defecto: {CUENTAS_FILE})")
+    parser.add_argument('--concurrencia', type=int, default=Config.LOTE_MAX_CONCURRENCIA,
+                        help="Cuentas procesándose a la vez")
+    parser.add_argument('--headless', action='store_true', help="Navegadores sin ventana")
+    args = parser.parse_args()
+
+    if args.headless:
+        Config.HEADLESS = True
+
+    cuentas = cargar_cuentas(args.cuentas)
+    resultados = asyncio.run(run_lote(cuentas, args.accion, args.concurrencia))
+
+    print(f"\n📊 RESULTADO DEL LOTE - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(formatear_resultados(resultados))
+    sys.exit(0 if all(r['estado'] == 'MARCADO' for r in resultados) else 1)
+
+if __name__ == "__main__":
+    main()
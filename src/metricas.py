@@ -0,0 +1,154 @@
+"""
+Medición de latencia por fase del flujo de marcaje
+Registra duraciones monotónicas de cada fase de run()/verificar_estado(),
+mantiene histogramas móviles en memoria y escribe un registro compacto por ejecución
+"""
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+TIEMPOS_FILE = Path(__file__).parent / "logs" / "tiempos_ejecuciones.jsonl"
+# Al superar este tamaño el archivo pasa a .1 (reemplazando el anterior) y se empieza otro
+TIEMPOS_MAX_BYTES = 5 * 1024 * 1024
+
+# Orden de las fases en el flujo de marcaje (para los resúmenes)
+FASES = ("navegador", "goto", "login", "iframe", "boton", "click")
+
+class HistogramaFases:
+    """Ventana móvil de duraciones por fase con percentiles (thread-safe)"""
+
+    def __init__(self, tamano_ventana: int = 500):
+        self._ventana = tamano_ventana
+        self._muestras: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def agregar(self, fase: str, duracion_ms: float) -> None:
+        with self._lock:
+            if fase not in self._muestras:
+                self._muestras[fase] = deque(maxlen=self._ventana)
+            self._muestras[fase].append(duracion_ms)
+
+    def percentiles(self) -> Dict[str, Dict[str, float]]:
+        """Retorna {fase: {n, p50, p95, max}} en milisegundos"""
+        with self._lock:
+            copia = {fase: sorted(muestras) for fase, muestras in self._muestras.items()}
+
+        resultado = {}
+        for fase, valores in copia.items():
+            if not valores:
+                continue
+            resultado[fase] = {
+                'n': len(valores),
+                'p50': round(percentil(valores, 0.50), 1),
+                'p95': round(percentil(valores, 0.95), 1),
+                'max': round(valores[-1], 1),
+            }
+        return resultado
+
+    def resumen(self) -> str:
+        """Resumen de una línea: fase=p50/p95 ms"""
+        datos = self.percentiles()
+        orden = [f for f in FASES if f in datos] + [f for f in datos if f not in FASES]
+        return ", ".join(f"{f}={datos[f]['p50']:.0f}/{datos[f]['p95']:.0f}" for f in orden) or "sin datos"
+
+def percentil(valores_ordenados, p: float) -> float:
+    """Percentil por el método del rango más cercano sobre una lista ordenada"""
+    indice = min(len(valores_ordenados) - 1, int(len(valores_ordenados) * p))
+    return valores_ordenados[indice]
+
+class MedicionEjecucion:
+    """Duraciones por fase de una ejecución de run() o verificar_estado()"""
+
+    def __init__(self, operacion: str, usuario: Optional[str] = None):
+        self.operacion = operacion
+        self.usuario = usuario
+        self.fases: Dict[str, float] = {}
+        self._inicio = time.perf_counter()
+
+    @contextmanager
+    def fase(self, nombre: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Una fase repetida (ej. dos detecciones de botón) acumula su tiempo
+            self.fases[nombre] = self.fases.get(nombre, 0.0) + (time.perf_counter() - inicio) * 1000
+
+    def registro(self, resultado=None) -> Dict:
+        return {
+            'ts': datetime.now().isoformat(timespec='seconds'),
+            'op': self.operacion,
+            'usuario': self.usuario,
+            'resultado': str(resultado) if resultado else None,
+            'total_ms': round((time.perf_counter() - self._inicio) * 1000),
+            'fases': {fase: round(ms) for fase, ms in self.fases.items()},
+        }
+
+_histogramas = HistogramaFases()
+_medicion_actual: ContextVar[Optional[MedicionEjecucion]] = ContextVar('medicion_actual', default=None)
+_lock_archivo = threading.Lock()
+
+def iniciar_medicion(operacion: str, usuario: Optional[str] = None) -> MedicionEjecucion:
+    """Crea la medición de la ejecución en curso (visible para fase() en esta tarea)"""
+    medicion = MedicionEjecucion(operacion, usuario)
+    _medicion_actual.set(medicion)
+    return medicion
+
+@contextmanager
+def fase(nombre: str):
+    """Mide una fase de la ejecución en curso; no hace nada si no hay medición"""
+    medicion = _medicion_actual.get()
+    if medicion is None:
+        yield
+        return
+    with medicion.fase(nombre):
+        yield
+
+def archivo_respaldo(archivo: Path) -> Path:
+    """Archivo rotado de un registro de tiempos (tiempos_ejecuciones.1.jsonl)"""
+    return archivo.with_name(f"{archivo.stem}.1{archivo.suffix}")
+
+def _rotar_si_excede(archivo: Path) -> None:
+    """Rota el registro de tiempos si superó TIEMPOS_MAX_BYTES (requiere _lock_archivo)"""
+    try:
+        if archivo.stat().st_size < TIEMPOS_MAX_BYTES:
+            return
+    except FileNotFoundError:
+        return
+    archivo.replace(archivo_respaldo(archivo))
+    logger.debug(f"♻️ Registro de tiempos rotado: {archivo.name}")
+
+def finalizar_medicion(medicion: MedicionEjecucion, resultado=None) -> Dict:
+    """Cierra la medición: alimenta los histogramas y escribe el registro compacto"""
+    registro = medicion.registro(resultado)
+    _medicion_actual.set(None)
+
+    for nombre, duracion_ms in medicion.fases.items():
+        _histogramas.agregar(nombre, duracion_ms)
+    _histogramas.agregar(f"total_{medicion.operacion}", registro['total_ms'])
+
+    try:
+        with _lock_archivo:
+            TIEMPOS_FILE.parent.mkdir(exist_ok=True)
+            _rotar_si_excede(TIEMPOS_FILE)
+            with open(TIEMPOS_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(registro, ensure_ascii=False, separators=(',', ':')) + "\n")
+    except Exception as e:
+        logger.debug(f"No se pudo guardar el registro de tiempos: {e}")
+
+    fases_txt = ", ".join(f"{f}={ms}" for f, ms in registro['fases'].items())
+    logger.info(f"⏱️ Tiempos {medicion.operacion}: total={registro['total_ms']} ms ({fases_txt})")
+    return registro
+
+def get_histogramas() -> HistogramaFases:
+    """Retorna los histogramas móviles del proceso"""
+    return _histogramas
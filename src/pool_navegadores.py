@@ -0,0 +1,316 @@
+"""
+Pool de navegadores Chromium reutilizables para GeoVictoria
+Mantiene instancias calientes y entrega un BrowserContext nuevo por trabajo
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, List
+
+from playwright.async_api import async_playwright
+
+logger = logging.getLogger(__name__)
+
+class _NavegadorPool:
+    """Navegador del pool con sus contadores de uso"""
+
+    def __init__(self, browser, numero: int):
+        self.browser = browser
+        self.numero = numero
+        self.usos = 0
+        self.en_uso = 0
+        self.retirado = False  # Marcado para reciclar cuando quede libre
+
+class PoolNavegadores:
+    """Pool de navegadores Chromium calientes ligado a un loop asyncio
+
+    Cada trabajo recibe un BrowserContext nuevo (cookies y storage aislados),
+    pero el proceso de Chromium se reutiliza hasta `max_usos` contextos o hasta
+    que se cae, momento en que se recicla.
+    """
+
+    def __init__(self, max_navegadores: int = 1, max_usos: int = 25,
+                 contextos_por_navegador: int = 4, headless: bool = False,
+                 args: Optional[List[str]] = None,
+                 opciones_contexto: Optional[Dict] = None,
+                 init_script: Optional[str] = None):
+        """
+        Args:
+            max_navegadores: Número máximo de procesos Chromium simultáneos
+            max_usos: Contextos entregados por navegador antes de reciclarlo
+            contextos_por_navegador: Contextos simultáneos permitidos por navegador
+            headless: Lanzar Chromium sin ventana
+            args: Argumentos de línea de comandos para Chromium
+            opciones_contexto: Opciones para browser.new_context()
+            init_script: Script inyectado en cada contexto nuevo
+        """
+        self.max_navegadores = max_navegadores
+        self.max_usos = max_usos
+        self.contextos_por_navegador = contextos_por_navegador
+        self.headless = headless
+        self.args = list(args or [])
+        self.opciones_contexto = dict(opciones_contexto or {})
+        self.init_script = init_script
+
+        self._playwright = None
+        self._loop = None
+        self._lock = None
+        self._cambio = None
+        self._cupos = None
+        self._iniciando = None
+        self._navegadores: List[_NavegadorPool] = []
+        # Retirados por usos que aún tienen contextos abiertos (siguen siendo procesos vivos)
+        self._retirados: List[_NavegadorPool] = []
+        self._siguiente_numero = 1
+        self._cerrado = False
+        self._en_uso = 0
+
+        # Métricas
+        self._latencias_ms = deque(maxlen=200)
+        self._checkouts = 0
+        self._lanzamientos = 0
+        self._reciclados = 0
+        self._caidas = 0
+
+    @property
+    def capacidad(self) -> int:
+        """Contextos simultáneos que el pool puede entregar"""
+        return self.max_navegadores * self.contextos_por_navegador
+
+    @property
+    def loop(self):
+        """Loop asyncio al que está ligado el pool (None si no se ha iniciado)"""
+        return self._loop
+
+    async def iniciar(self, precalentar: bool = True) -> None:
+        """Inicia el driver de Playwright y opcionalmente lanza el primer navegador
+
+        Las llamadas concurrentes esperan la misma inicialización (un solo driver)
+        """
+        if self._iniciando is None:
+            self._iniciando = asyncio.ensure_future(self._iniciar(precalentar))
+        iniciando = self._iniciando
+        try:
+            await asyncio.shield(iniciando)
+        except Exception:
+            if self._iniciando is iniciando:
+                self._iniciando = None  # Permitir reintentar
+            raise
+
+    async def _iniciar(self, precalentar: bool) -> None:
+        if self._playwright is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._lock = asyncio.Lock()
+        self._cambio = asyncio.Condition(self._lock)
+        self._cupos = asyncio.Semaphore(self.capacidad)
+        self._cerrado = False
+        self._playwright = await async_playwright().start()
+        logger.info(f"🧭 Pool de navegadores iniciado (máx. {self.max_navegadores} navegador(es), "
+                    f"{self.contextos_por_navegador} contexto(s) c/u, reciclaje cada {self.max_usos} usos)")
+
+        if precalentar:
+            async with self._lock:
+                await self._lanzar_navegador()
+
+    async def cerrar(self) -> None:
+        """Cierra todos los navegadores y detiene el driver de Playwright"""
+        self._cerrado = True
+        for nav in list(self._navegadores):
+            await self._cerrar_navegador(nav)
+        for nav in list(self._retirados):
+            await self._cerrar_navegador(nav)
+        self._navegadores.clear()
+        self._retirados.clear()
+        self._iniciando = None
+
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.debug(f"Error deteniendo Playwright: {e}")
+            self._playwright = None
+        logger.info("🧭 Pool de navegadores cerrado")
+
+    async def _lanzar_navegador(self) -> _NavegadorPool:
+        """Lanza un Chromium nuevo y lo agrega al pool (requiere self._lock)"""
+        inicio = time.perf_counter()
+        browser = await self._playwright.chromium.launch(headless=self.headless, args=self.args)
+        nav = _NavegadorPool(browser, self._siguiente_numero)
+        self._siguiente_numero += 1
+        self._lanzamientos += 1
+        browser.on("disconnected", lambda _: self._marcar_caido(nav))
+        self._navegadores.append(nav)
+        logger.debug(f"🚀 Navegador #{nav.numero} lanzado en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+        return nav
+
+    def _marcar_caido(self, nav: _NavegadorPool) -> None:
+        """Callback de desconexión: retira el navegador del pool"""
+        if nav.retirado or self._cerrado:
+            return
+        nav.retirado = True
+        self._caidas += 1
+        if nav in self._navegadores:
+            self._navegadores.remove(nav)
+        if nav in self._retirados:
+            self._retirados.remove(nav)
+        logger.warning(f"⚠️ Navegador #{nav.numero} desconectado - Será reemplazado")
+
+    async def _cerrar_navegador(self, nav: _NavegadorPool) -> None:
+        nav.retirado = True
+        if nav in self._navegadores:
+            self._navegadores.remove(nav)
+        if nav in self._retirados:
+            self._retirados.remove(nav)
+        try:
+            if nav.browser.is_connected():
+                await nav.browser.close()
+        except Exception as e:
+            logger.debug(f"Error cerrando navegador #{nav.numero}: {e}")
+
+    def _procesos_vivos(self) -> int:
+        """Procesos Chromium abiertos, incluidos los retirados que aún tienen contextos"""
+        return len(self._navegadores) + len(self._retirados)
+
+    async def _seleccionar_navegador(self) -> _NavegadorPool:
+        """Elige el navegador menos ocupado o lanza uno nuevo si hay espacio"""
+        async with self._cambio:
+            while True:
+                disponibles = [
+                    nav for nav in self._navegadores
+                    if not nav.retirado and nav.browser.is_connected()
+                    and nav.en_uso < self.contextos_por_navegador
+                ]
+
+                # Preferir un navegador libre; lanzar otro solo si todos están ocupados
+                libres = [nav for nav in disponibles if nav.en_uso == 0]
+                if libres:
+                    nav = libres[0]
+                elif self._procesos_vivos() < self.max_navegadores:
+                    nav = await self._lanzar_navegador()
+                elif disponibles:
+                    nav = min(disponibles, key=lambda n: n.en_uso)
+                else:
+                    # Los retirados con contextos abiertos ocupan el cupo: esperar a que cierren
+                    await self._cambio.wait()
+                    continue
+                break
+
+            nav.en_uso += 1
+            nav.usos += 1
+            if nav.usos >= self.max_usos:
+                # No entregar más contextos de este navegador; se cierra al quedar libre
+                nav.retirado = True
+                self._navegadores.remove(nav)
+                self._retirados.append(nav)
+            return nav
+
+    async def _liberar(self, nav: _NavegadorPool) -> None:
+        async with self._cambio:
+            nav.en_uso -= 1
+            if nav.retirado and nav.en_uso == 0:
+                if nav.browser.is_connected():
+                    self._reciclados += 1
+                    logger.debug(f"♻️ Reciclando navegador #{nav.numero} tras {nav.usos} usos")
+                await self._cerrar_navegador(nav)
+            self._cambio.notify_all()
+
+    @asynccontextmanager
+    async def contexto(self, **opciones):
+        """Entrega un BrowserContext nuevo sobre un navegador caliente
+
+        Args:
+            **opciones: Opciones adicionales para new_context() (ej. storage_state)
+        """
+        if self._playwright is None:
+            await self.iniciar(precalentar=False)
+
+        inicio = time.perf_counter()
+        await self._cupos.acquire()
+        self._en_uso += 1
+        nav = None
+        context = None
+        try:
+            nav = await self._seleccionar_navegador()
+            context = await nav.browser.new_context(**{**self.opciones_contexto, **opciones})
+            if self.init_script:
+                await context.add_init_script(self.init_script)
+
+            latencia_ms = (time.perf_counter() - inicio) * 1000
+            self._latencias_ms.append(latencia_ms)
+            self._checkouts += 1
+            logger.debug(f"🧭 Contexto entregado por navegador #{nav.numero} en {latencia_ms:.0f} ms "
+                         f"({self.ocupacion()}/{self.capacidad} en uso)")
+
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Error cerrando contexto: {e}")
+            if nav is not None:
+                await self._liberar(nav)
+            self._en_uso -= 1
+            self._cupos.release()
+
+    def ocupacion(self) -> int:
+        """Número de contextos actualmente entregados"""
+        return self._en_uso
+
+    def estadisticas(self) -> Dict:
+        """Retorna ocupación, latencia de checkout y contadores del pool"""
+        latencias = sorted(self._latencias_ms)
+
+        def percentil(p):
+            if not latencias:
+                return None
+            return round(latencias[min(len(latencias) - 1, int(len(latencias) * p))], 1)
+
+        return {
+            'navegadores_activos': self._procesos_vivos(),
+            'contextos_en_uso': self.ocupacion(),
+            'capacidad': self.capacidad,
+            'checkouts': self._checkouts,
+            'latencia_checkout_p50_ms': percentil(0.50),
+            'latencia_checkout_p95_ms': percentil(0.95),
+            'latencia_checkout_max_ms': round(latencias[-1], 1) if latencias else None,
+            'lanzamientos': self._lanzamientos,
+            'reciclados': self._reciclados,
+            'caidas': self._caidas,
+        }
+
+    def resumen(self) -> str:
+        """Resumen de una línea para los logs"""
+        e = self.estadisticas()
+        p50 = f"{e['latencia_checkout_p50_ms']:.0f}" if e['latencia_checkout_p50_ms'] is not None else "-"
+        p95 = f"{e['latencia_checkout_p95_ms']:.0f}" if e['latencia_checkout_p95_ms'] is not None else "-"
+        return (f"{e['contextos_en_uso']}/{e['capacidad']} en uso, "
+                f"{e['navegadores_activos']} navegador(es), {e['checkouts']} checkouts, "
+                f"latencia p50={p50} ms p95={p95} ms, "
+                f"{e['lanzamientos']} lanzamientos, {e['reciclados']} reciclados, {e['caidas']} caídas")
+
+# Pool registrado por el proceso dueño (el programador)
+_pool_activo: Optional[PoolNavegadores] = None
+
+def activar_pool(pool: Optional[PoolNavegadores]) -> None:
+    """Registra el pool que deben usar los marcajes de este proceso (None para desactivar)"""
+    global _pool_activo
+    _pool_activo = pool
+
+def get_pool_activo() -> Optional[PoolNavegadores]:
+    """Retorna el pool activo si pertenece al loop asyncio en ejecución"""
+    pool = _pool_activo
+    if pool is None:
+        return None
+    try:
+        loop_actual = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    # Los objetos de Playwright solo funcionan en el loop donde se crearon
+    if pool.loop is not None and pool.loop is not loop_actual:
+        return None
+    return pool
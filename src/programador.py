@@ -5,28 +5,38 @@ Configurado para Colombia con manejo de festivos
 import asyncio
 import logging
 import sys
-import json
 import random
 import os
 import atexit
+import math
+import time as reloj
 from datetime import datetime, date, time, timedelta
-from apscheduler.schedulers.blocking import BlockingScheduler
-from apscheduler.triggers.cron import CronTrigger
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.date import DateTrigger
 from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 from pathlib import Path
 
 # Agregar el directorio raíz al path para importaciones
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.geovictoria import run, verificar_estado
-from src.festivos_colombia import es_dia_laborable, es_festivo, listar_festivos_año
-from src.cache_estado import get_cache
+from src.geovictoria import run, verificar_estado, crear_pool_navegadores, Config, limite_marcaje
+from src.pool_navegadores import activar_pool
+from src.metricas import get_histogramas
+from src.festivos_colombia import es_dia_laborable, es_festivo, listar_festivos_año, get_calendario
+from src.cache_estado import get_cache, clave_estado, FRESCO, OBSOLETO, TTL_NEGATIVO_SEGUNDOS
+from src.circuito import get_circuito
+from src.registro_ejecuciones import get_registro, cuenta_predeterminada
+from src.single_flight import SingleFlight
+from src.trigger_laborable import CronTriggerLaborable
+from src.horarios import (HORARIOS_FILE, MARCAJES, cargar_horarios, trabajos_de, comparar_trabajos,
+                          firma_archivo)
+from src.lote import CUENTAS_FILE, cargar_cuentas
+from src.despachador import Despachador
 
 # Configuración de logging y registro de ejecuciones
 log_dir = Path(__file__).parent / "logs"
 log_dir.mkdir(exist_ok=True)
 log_file = log_dir / f"programador_{datetime.now().strftime('%Y%m%d')}.log"
-registro_file = log_dir / "registro_ejecuciones.json"
 lock_file = log_dir / "programador.lock"
 
 # Configurar logging con manejo robusto para Task Scheduler
@@ -73,6 +83,90 @@ class HorarioConfig:
     
     # Cooldown mínimo entre marcajes (segundos) - para prevenir marcajes consecutivos rápidos
     COOLDOWN_ENTRE_MARCAJES = 300  # 5 minutos
+    
+    # Horas límite: después no se marca automáticamente (entrada 12 PM, salida 11 PM)
+    LIMITE_ENTRADA_HORA = 12
+    LIMITE_SALIDA_HORA = 23
+    
+    # Margen de las verificaciones de pendientes: tras cada ventana y antes de cada límite
+    MARGEN_VERIFICACION_MINUTOS = 5
+    
+    # Repartir los marcajes en su ventana de variación con un ritmo global máximo
+    # (False = todas las cuentas marcan exactamente a la hora del turno)
+    REPARTIR_MARCAJES = True
+    MARCAJES_POR_MINUTO = 20
+    RAFAGA_MARCAJES = 3
+    # Duración esperada de un marcaje completo (navegador, login, iframe y clic):
+    # dimensiona el pool para que MARCAJES_POR_MINUTO terminen, no solo arranquen
+    DURACION_MARCAJE_S = 20
+
+# Pool de navegadores del programador (vive en el loop del scheduler entre trabajos)
+_pool_navegadores = None
+
+# Consultas de estado en curso por cuenta (single-flight)
+_consultas_estado = SingleFlight("Consulta de estado")
+
+# Refrescos del caché en segundo plano por cuenta (referencia fuerte hasta que terminen)
+_refrescos_pendientes = {}
+
+# Vigilancia del reloj: detecta suspensiones del equipo y saltos de la hora del sistema
+INTERVALO_VIGILANCIA_S = 30
+UMBRAL_SALTO_RELOJ_S = 90
+ESPERA_MIN_ENTRE_RECUPERACIONES_S = 120
+
+# Despachador: reparte los marcajes de todas las cuentas en sus ventanas con ritmo limitado
+_despachador = Despachador(HorarioConfig.MARCAJES_POR_MINUTO, HorarioConfig.RAFAGA_MARCAJES)
+
+# Turnos por cuenta (config/horarios.json), trabajos programados y contraseñas
+INTERVALO_RECARGA_HORARIOS_S = 5
+_horarios = {}
+_trabajos = {}
+_passwords = {}
+
+# Una sola verificación de pendientes a la vez (plazo programado, inicio o recuperación).
+# Se crea dentro del loop: en Python 3.8/3.9 un Lock creado al importar queda
+# ligado al loop por defecto y no al de asyncio.run()
+_verificacion_lock = None
+_recuperacion_pendiente = None
+_ultima_recuperacion = None
+
+async def iniciar_pool_navegadores():
+    """Crea el pool de navegadores del programador y lo precalienta
+
+    Tiene al menos los contextos que exige el ritmo de marcajes
+    (MARCAJES_POR_MINUTO × DURACION_MARCAJE_S); el despachador no supera lo
+    que el pool puede completar.
+    """
+    global _pool_navegadores
+    contextos = math.ceil(HorarioConfig.MARCAJES_POR_MINUTO * HorarioConfig.DURACION_MARCAJE_S / 60)
+    navegadores = max(Config.POOL_MAX_NAVEGADORES, math.ceil(contextos / Config.POOL_CONTEXTOS_POR_NAVEGADOR))
+    pool = crear_pool_navegadores(max_navegadores=navegadores)
+    try:
+        await pool.iniciar()
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo iniciar el pool de navegadores: {e}")
+        logger.warning("   • Cada marcaje lanzará su propio navegador")
+        await pool.cerrar()
+        return None
+    
+    activar_pool(pool)
+    _pool_navegadores = pool
+    _despachador.ajustar_concurrencia(pool.capacidad, HorarioConfig.DURACION_MARCAJE_S)
+    return pool
+
+async def cerrar_pool_navegadores():
+    """Cierra el pool de navegadores al detener el programador"""
+    global _pool_navegadores
+    if _pool_navegadores is None:
+        return
+    pool = _pool_navegadores
+    _pool_navegadores = None
+    activar_pool(None)
+    try:
+        logger.info(f"🧭 Pool de navegadores: {pool.resumen()}")
+        await pool.cerrar()
+    except Exception as e:
+        logger.error(f"Error cerrando pool de navegadores: {e}")
 
 def calcular_horario_aleatorio(hora_base, minuto_base, variacion_min, variacion_max):
     """Calcula un horario aleatorio dentro del rango especificado"""
@@ -86,108 +180,128 @@ def calcular_horario_aleatorio(hora_base, minuto_base, variacion_min, variacion_
     # Aplicar variación
     dt_aleatorio = dt_base + timedelta(minutes=variacion_minutos)
     
-    logger.info(f"⏰ Horario base: {dt_base.strftime('%H:%M')}")
-    logger.info(f"🎲 Variación aplicada: {variacion_minutos:+d} minutos")
-    logger.info(f"🕐 Horario calculado: {dt_aleatorio.strftime('%H:%M')}")
+    logger.debug(f"⏰ Horario base: {dt_base.strftime('%H:%M')}")
+    logger.debug(f"🎲 Variación aplicada: {variacion_minutos:+d} minutos")
+    logger.debug(f"🕐 Horario calculado: {dt_aleatorio.strftime('%H:%M')}")
     
     return dt_aleatorio.time(), variacion_minutos
 
 def leer_registro_ejecuciones():
-    """Lee el registro de ejecuciones del archivo JSON"""
+    """Lee el registro de ejecuciones ({fecha: {tipo: datos}}) de la cuenta por defecto"""
     try:
-        if registro_file.exists():
-            with open(registro_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+        return get_registro().como_dict()
     except Exception as e:
         logger.warning(f"Error leyendo registro de ejecuciones: {e}")
     return {}
 
-def guardar_registro_ejecucion(tipo_marcaje: str, variacion_minutos: int = 0):
-    """Guarda en el registro que se ejecutó un marcaje"""
+def guardar_registro_ejecucion(tipo_marcaje: str, variacion_minutos: int = 0, usuario: str = None):
+    """Guarda en el registro que se ejecutó un marcaje (cuenta por defecto si no se indica)"""
     try:
-        registro = leer_registro_ejecuciones()
-        hoy = date.today().isoformat()
-        ahora = datetime.now()
-        ahora_iso = ahora.isoformat()
-        
-        if hoy not in registro:
-            registro[hoy] = {}
-        
-        registro[hoy][tipo_marcaje] = {
-            'ejecutado': True,
-            'hora': ahora_iso,
-            'timestamp': ahora.timestamp(),  # Para cálculos de tiempo
-            'variacion_minutos': variacion_minutos
-        }
-        
-        # Limpiar registros antiguos (mantener solo últimos 30 días)
-        fechas = sorted(registro.keys(), reverse=True)
-        if len(fechas) > 30:
-            for fecha_antigua in fechas[30:]:
-                del registro[fecha_antigua]
-        
-        with open(registro_file, 'w', encoding='utf-8') as f:
-            json.dump(registro, f, indent=2, ensure_ascii=False)
-        
-        logger.debug(f"Registro guardado: {tipo_marcaje} a las {ahora_iso}")
+        fila = get_registro().guardar(tipo_marcaje, variacion_minutos, usuario=usuario)
+        logger.debug(f"Registro guardado: {tipo_marcaje} a las {fila['hora']}")
     except Exception as e:
         logger.error(f"Error guardando registro de ejecución: {e}")
 
-def ya_se_ejecuto_hoy(tipo_marcaje: str) -> bool:
+def ya_se_ejecuto_hoy(tipo_marcaje: str, usuario: str = None) -> bool:
     """Verifica si ya se ejecutó un tipo de marcaje hoy"""
-    registro = leer_registro_ejecuciones()
-    hoy = date.today().isoformat()
-    
-    if hoy in registro and tipo_marcaje in registro[hoy]:
-        return registro[hoy][tipo_marcaje].get('ejecutado', False)
-    
-    return False
+    return get_registro().ya_ejecutado(tipo_marcaje, usuario=usuario)
+
+async def verificar_estado_con_cache(usuario=None, password=None, permitir_obsoleto=False) -> str:
+    """Verifica estado en GeoVictoria usando caché para evitar consultas redundantes
+
+    Las consultas concurrentes para la misma cuenta se agrupan (single-flight):
+    solo una abre el navegador y las demás reciben su resultado.
 
-def verificar_estado_con_cache() -> str:
-    """Verifica estado en GeoVictoria usando caché para evitar consultas redundantes"""
+    Args:
+        usuario, password: Credenciales de la cuenta (por defecto las del .env)
+        permitir_obsoleto: Si True, un estado obsoleto (pasado el TTL suave pero no el
+                           duro) se retorna de inmediato y se refresca en segundo plano.
+                           Usar solo cuando un estado aproximado es suficiente.
+    """
     cache = get_cache()
+    cuenta = usuario or os.getenv("GEOVICTORIA_USER") or "predeterminada"
     
     # Intentar obtener del caché primero
-    estado_cached = cache.get()
-    if estado_cached is not None:
+    estado_cached, frescura = cache.consultar(clave_estado(cuenta))
+    if frescura == FRESCO:
         logger.debug(f"📦 Estado obtenido del caché: {estado_cached}")
         return estado_cached
     
-    # Si no hay caché, consultar GeoVictoria
+    if frescura == OBSOLETO and permitir_obsoleto:
+        logger.debug(f"📦 Estado obsoleto del caché: {estado_cached} - Refrescando en segundo plano")
+        if cuenta not in _refrescos_pendientes and not _consultas_estado.en_curso(cuenta):
+            tarea = asyncio.create_task(_consultar_estado(cuenta, usuario, password, frescura))
+            _refrescos_pendientes[cuenta] = tarea
+            tarea.add_done_callback(lambda _: _refrescos_pendientes.pop(cuenta, None))
+        return estado_cached
+    
+    # Sin caché utilizable: consultar GeoVictoria y esperar el resultado
+    logger.debug("🔍 Consultando estado en GeoVictoria (no hay caché válido)...")
+    return await _consultar_estado(cuenta, usuario, password, frescura)
+
+async def esperar_refrescos_estado():
+    """Espera los refrescos en segundo plano pendientes (para procesos que terminan pronto)"""
+    pendientes = list(_refrescos_pendientes.values())
+    if pendientes:
+        await asyncio.gather(*pendientes, return_exceptions=True)
+
+async def _consultar_estado(cuenta, usuario=None, password=None, frescura=None):
+    """Consulta GeoVictoria (una sola consulta por cuenta a la vez) y actualiza el caché
+
+    Args:
+        frescura: Frescura de la entrada del caché antes de consultar
+    """
     try:
-        logger.debug("🔍 Consultando estado en GeoVictoria (no hay caché válido)...")
-        estado = asyncio.run(verificar_estado())
+        estado = await _consultas_estado.ejecutar(cuenta, lambda: verificar_estado(usuario, password))
         
-        # Guardar en caché
+        # Guardar en caché (los fallos con TTL corto: caché negativo)
+        cache = get_cache()
+        clave = clave_estado(cuenta)
         if estado:
-            cache.set(estado)
+            cache.set(estado, clave)
             logger.debug(f"💾 Estado guardado en caché: {estado}")
+        elif frescura != OBSOLETO:
+            # Un estado obsoleto conocido vale más que un negativo: se conserva
+            cache.set(None, clave, ttl_segundos=TTL_NEGATIVO_SEGUNDOS)
+            logger.debug(f"💾 Consulta sin estado - Caché negativo por {TTL_NEGATIVO_SEGUNDOS}s")
         
         return estado
     except Exception as e:
         logger.error(f"❌ Error verificando estado: {e}")
         return None
 
-def tiempo_desde_ultimo_marcaje() -> float:
+def tiempo_desde_ultimo_marcaje(usuario: str = None) -> float:
     """Retorna segundos desde el último marcaje de cualquier tipo (hoy)"""
-    registro = leer_registro_ejecuciones()
-    hoy = date.today().isoformat()
-    
-    if hoy not in registro:
+    ultimo_timestamp = get_registro().ultimo_timestamp(usuario=usuario)
+    if ultimo_timestamp is None:
         return float('inf')  # No hay marcajes hoy
     
-    ahora = datetime.now().timestamp()
-    timestamps = []
-    
-    for tipo_marcaje, info in registro[hoy].items():
-        if 'timestamp' in info:
-            timestamps.append(info['timestamp'])
-    
-    if not timestamps:
-        return float('inf')
-    
-    ultimo_timestamp = max(timestamps)
-    return ahora - ultimo_timestamp
+    return datetime.now().timestamp() - ultimo_timestamp
+
+def turno_predeterminado() -> dict:
+    """Turno de HorarioConfig (se usa si config/horarios.json no define otro)"""
+    return {
+        'semana': {'entrada': time(HorarioConfig.ENTRADA_SEMANA_HORA, HorarioConfig.ENTRADA_SEMANA_MINUTO),
+                   'salida': time(HorarioConfig.SALIDA_SEMANA_HORA, HorarioConfig.SALIDA_SEMANA_MINUTO)},
+        'sabado': {'entrada': time(HorarioConfig.ENTRADA_SABADO_HORA, HorarioConfig.ENTRADA_SABADO_MINUTO),
+                   'salida': time(HorarioConfig.SALIDA_SABADO_HORA, HorarioConfig.SALIDA_SABADO_MINUTO)},
+    }
+
+def turno_del_dia(dia: date, usuario: str = None):
+    """{'entrada', 'salida'} de la cuenta para ese día, None si no marca ese día"""
+    turno = _horarios.get(usuario or os.getenv("GEOVICTORIA_USER") or "predeterminada") or turno_predeterminado()
+    return turno['sabado'] if dia.weekday() == 5 else turno['semana']
+
+def cuentas_programadas() -> list:
+    """Cuentas con turno cargado ([None] = la cuenta por defecto)"""
+    return list(_horarios) or [None]
+
+def _password_de(usuario: str = None):
+    """Contraseña de la cuenta (None = run() usa las credenciales del .env)"""
+    return _passwords.get(usuario) if usuario else None
+
+def _cuenta_log(usuario: str = None) -> str:
+    return f" [{usuario}]" if usuario and len(_horarios) > 1 else ""
 
 def determinar_tipo_marcaje(accion: str, dia_semana: int) -> str:
     """Determina el tipo de marcaje basado en la acción real ejecutada y el día"""
@@ -202,7 +316,8 @@ def determinar_tipo_marcaje(accion: str, dia_semana: int) -> str:
         else:
             return "SALIDA SEMANA (L-V)"
 
-def ejecutar_marcaje_con_validacion(tipo_marcaje: str, variacion_minutos: int = 0, validar_horario: bool = True):
+async def ejecutar_marcaje_con_validacion(tipo_marcaje: str, variacion_minutos: int = 0, validar_horario: bool = True,
+                                         usuario: str = None):
     """
     Ejecutar marcaje solo si es día laborable, horario correcto y acción esperada coincide
     
@@ -210,26 +325,27 @@ def ejecutar_marcaje_con_validacion(tipo_marcaje: str, variacion_minutos: int =
         tipo_marcaje: Tipo esperado (ENTRADA SEMANA, SALIDA SEMANA, etc.)
         variacion_minutos: Variación aleatoria aplicada
         validar_horario: Si True, valida que sea el horario apropiado para el tipo de marcaje
+        usuario: Cuenta a marcar (None = la del .env)
     """
     hoy = date.today()
     ahora = datetime.now()
     
     logger.info("=" * 80)
-    logger.info(f"🔔 Intento de marcaje programado: {tipo_marcaje}")
+    logger.info(f"🔔 Intento de marcaje programado: {tipo_marcaje}{_cuenta_log(usuario)}")
     logger.info(f"📅 Fecha: {hoy.strftime('%A, %d de %B de %Y')}")
     logger.info(f"🕐 Hora: {ahora.strftime('%H:%M:%S')}")
     if variacion_minutos != 0:
         logger.info(f"🎲 Variación aleatoria: {variacion_minutos:+d} minutos")
     
     # PROTECCIÓN CRÍTICA: Verificar si ya se ejecutó (verificación temprana)
-    if ya_se_ejecuto_hoy(tipo_marcaje):
+    if ya_se_ejecuto_hoy(tipo_marcaje, usuario):
         logger.warning(f"⏭️ {tipo_marcaje} YA FUE EJECUTADO HOY - OMITIENDO")
         logger.warning(f"   Esta es una protección contra ejecuciones duplicadas")
         logger.info("=" * 80)
         return None
     
     # PROTECCIÓN ADICIONAL: Cooldown entre marcajes
-    segundos_desde_ultimo = tiempo_desde_ultimo_marcaje()
+    segundos_desde_ultimo = tiempo_desde_ultimo_marcaje(usuario)
     if segundos_desde_ultimo < HorarioConfig.COOLDOWN_ENTRE_MARCAJES:
         tiempo_espera = HorarioConfig.COOLDOWN_ENTRE_MARCAJES - segundos_desde_ultimo
         logger.warning(f"⏸️ COOLDOWN ACTIVO")
@@ -256,19 +372,18 @@ def ejecutar_marcaje_con_validacion(tipo_marcaje: str, variacion_minutos: int =
     if hoy.weekday() == 5:
         logger.info(f"📅 Hoy es sábado - Horario especial activo")
     
-    # Determinar acción esperada y horarios
+    # Determinar acción esperada y horarios (turno de la cuenta)
+    turno = turno_del_dia(hoy, usuario)
+    if turno is None:
+        logger.warning(f"📅 La cuenta no tiene turno hoy - No se ejecutará el marcaje")
+        logger.info("=" * 80)
+        return None
     if "ENTRADA" in tipo_marcaje:
         accion_esperada = "Entrada"
-        if hoy.weekday() == 5:  # Sábado
-            hora_programada = time(HorarioConfig.ENTRADA_SABADO_HORA, HorarioConfig.ENTRADA_SABADO_MINUTO)
-        else:
-            hora_programada = time(HorarioConfig.ENTRADA_SEMANA_HORA, HorarioConfig.ENTRADA_SEMANA_MINUTO)
+        hora_programada = turno['entrada']
     else:  # SALIDA
         accion_esperada = "Salida"
-        if hoy.weekday() == 5:  # Sábado
-            hora_programada = time(HorarioConfig.SALIDA_SABADO_HORA, HorarioConfig.SALIDA_SABADO_MINUTO)
-        else:
-            hora_programada = time(HorarioConfig.SALIDA_SEMANA_HORA, HorarioConfig.SALIDA_SEMANA_MINUTO)
+        hora_programada = turno['salida']
     
     # Validar horario si está habilitado
     if validar_horario:
@@ -293,18 +408,33 @@ def ejecutar_marcaje_con_validacion(tipo_marcaje: str, variacion_minutos: int =
     
     try:
         # Ejecutar el marcaje CON VALIDACIÓN de acción esperada
-        accion_ejecutada = asyncio.run(run(accion_esperada=accion_esperada))
+        accion_ejecutada = await run(accion_esperada=accion_esperada, usuario=usuario, password=_password_de(usuario))
         
         if accion_ejecutada:
             logger.info(f"✅ Marcaje completado: {accion_ejecutada}")
             
             # Registrar la acción REAL ejecutada, no la esperada
             tipo_real = determinar_tipo_marcaje(accion_ejecutada, hoy.weekday())
-            guardar_registro_ejecucion(tipo_real, variacion_minutos)
+            guardar_registro_ejecucion(tipo_real, variacion_minutos, usuario)
             logger.info(f"💾 Registro guardado: {tipo_real}")
             
         else:
             logger.warning(f"⚠️ No se pudo ejecutar marcaje")
+        
+        if _pool_navegadores is not None:
+            logger.info(f"🧭 Pool de navegadores: {_pool_navegadores.resumen()}")
+        logger.info(f"⏱️ Latencia por fase p50/p95 (ms): {get_histogramas().resumen()}")
+        circuito = get_circuito().estadisticas()
+        if circuito['estado'] != "cerrado":
+            logger.warning(f"🔌 Circuito GeoVictoria {circuito['estado']} ({circuito['rechazadas']} consultas rechazadas)")
+        consultas = _consultas_estado.estadisticas()
+        logger.info(f"🔗 Consultas de estado: {consultas['ejecuciones']} ejecutadas, {consultas['coalescidas']} coalescidas")
+        logger.info(f"📦 Caché de estado: {get_cache().resumen()}")
+        if HorarioConfig.REPARTIR_MARCAJES:
+            logger.info(f"🚦 Despachador: {_despachador.resumen()}")
+        calendario = get_calendario().estadisticas()
+        logger.debug(f"📅 Calendario de festivos: {calendario['consultas']} consultas, "
+                     f"{calendario['festivos_encontrados']} festivos, años {calendario['años']}")
             
         return accion_ejecutada
         
@@ -314,38 +444,37 @@ def ejecutar_marcaje_con_validacion(tipo_marcaje: str, variacion_minutos: int =
     finally:
         logger.info("=" * 80)
 
-def entrada_semana():
-    """Marcaje de entrada Lunes a Viernes SIN variación (horario fijo configurado en scheduler)"""
+async def entrada_semana(usuario: str = None, variacion_minutos: int = 0):
+    """Marcaje de entrada Lunes a Viernes (a la hora del turno o en el momento elegido por el despachador)"""
     # PROTECCIÓN: Verificar si ya se ejecutó antes de hacer nada
-    if ya_se_ejecuto_hoy("ENTRADA SEMANA (L-V)"):
+    if ya_se_ejecuto_hoy("ENTRADA SEMANA (L-V)", usuario):
         logger.info("⏭️ ENTRADA SEMANA (L-V) ya ejecutada hoy - Omitiendo")
         return
     
-    # No calcular variación - el scheduler ya programó en el horario exacto
+    # La variación la eligió el despachador (0 si los marcajes no se reparten)
     logger.info(f"📍 Ejecutando marcaje de entrada en horario programado")
-    ejecutar_marcaje_con_validacion("ENTRADA SEMANA (L-V)", variacion_minutos=0)
+    await ejecutar_marcaje_con_validacion("ENTRADA SEMANA (L-V)", variacion_minutos=variacion_minutos, usuario=usuario)
 
-def salida_semana():
-    """Marcaje de salida Lunes a Viernes SIN variación (horario fijo configurado en scheduler)"""
+async def salida_semana(usuario: str = None, variacion_minutos: int = 0):
+    """Marcaje de salida Lunes a Viernes (a la hora del turno o en el momento elegido por el despachador)"""
     # PROTECCIÓN 1: Verificar si ya se ejecutó antes de hacer nada
-    if ya_se_ejecuto_hoy("SALIDA SEMANA (L-V)"):
+    if ya_se_ejecuto_hoy("SALIDA SEMANA (L-V)", usuario):
         logger.info("⏭️ SALIDA SEMANA (L-V) ya ejecutada hoy - Omitiendo")
         return
     
     # PROTECCIÓN 2: Verificar que existe entrada previa (orden lógico)
-    if not ya_se_ejecuto_hoy("ENTRADA SEMANA (L-V)"):
+    if not ya_se_ejecuto_hoy("ENTRADA SEMANA (L-V)", usuario):
         logger.warning("⚠️ No hay entrada registrada localmente")
         logger.warning("   • Verificando estado real en GeoVictoria...")
         
-        # Invalidar caché para verificación fresca antes de marcaje importante
-        get_cache().invalidar()
-        boton_disponible = verificar_estado_con_cache()
+        # El caché solo tiene consultas recientes o el estado publicado tras nuestro último marcaje
+        boton_disponible = await verificar_estado_con_cache(usuario, _password_de(usuario))
         
         if boton_disponible == "Salida":
             # La entrada ya fue marcada (manual o automáticamente) pero no está registrada localmente
             logger.info(f"✅ ENTRADA SEMANA (L-V) detectada en GeoVictoria")
             logger.info(f"   • Actualizando registro local...")
-            guardar_registro_ejecucion("ENTRADA SEMANA (L-V)", variacion_minutos=0)
+            guardar_registro_ejecucion("ENTRADA SEMANA (L-V)", variacion_minutos=0, usuario=usuario)
             logger.info(f"💾 Registro de entrada actualizado")
             logger.info(f"   • Continuando con marcaje de salida...")
             # Continuar con la salida más abajo
@@ -356,45 +485,41 @@ def salida_semana():
             logger.warning("   • Por favor, marque entrada manualmente antes de marcar salida")
             return
     
-    # Invalidar caché antes de ejecutar marcaje
-    get_cache().invalidar()
-    
-    # No calcular variación - el scheduler ya programó en el horario exacto
+    # La variación la eligió el despachador (0 si los marcajes no se reparten)
     logger.info(f"📍 Ejecutando marcaje de salida en horario programado")
-    ejecutar_marcaje_con_validacion("SALIDA SEMANA (L-V)", variacion_minutos=0)
+    await ejecutar_marcaje_con_validacion("SALIDA SEMANA (L-V)", variacion_minutos=variacion_minutos, usuario=usuario)
 
-def entrada_sabado():
-    """Marcaje de entrada Sábados SIN variación (horario fijo configurado en scheduler)"""
+async def entrada_sabado(usuario: str = None, variacion_minutos: int = 0):
+    """Marcaje de entrada Sábados (a la hora del turno o en el momento elegido por el despachador)"""
     # PROTECCIÓN: Verificar si ya se ejecutó antes de hacer nada
-    if ya_se_ejecuto_hoy("ENTRADA SÁBADO"):
+    if ya_se_ejecuto_hoy("ENTRADA SÁBADO", usuario):
         logger.info("⏭️ ENTRADA SÁBADO ya ejecutada hoy - Omitiendo")
         return
     
-    # No calcular variación - el scheduler ya programó en el horario exacto
+    # La variación la eligió el despachador (0 si los marcajes no se reparten)
     logger.info(f"📍 Ejecutando marcaje de entrada sábado en horario programado")
-    ejecutar_marcaje_con_validacion("ENTRADA SÁBADO", variacion_minutos=0)
+    await ejecutar_marcaje_con_validacion("ENTRADA SÁBADO", variacion_minutos=variacion_minutos, usuario=usuario)
 
-def salida_sabado():
-    """Marcaje de salida Sábados SIN variación (horario fijo configurado en scheduler)"""
+async def salida_sabado(usuario: str = None, variacion_minutos: int = 0):
+    """Marcaje de salida Sábados (a la hora del turno o en el momento elegido por el despachador)"""
     # PROTECCIÓN 1: Verificar si ya se ejecutó antes de hacer nada
-    if ya_se_ejecuto_hoy("SALIDA SÁBADO"):
+    if ya_se_ejecuto_hoy("SALIDA SÁBADO", usuario):
         logger.info("⏭️ SALIDA SÁBADO ya ejecutada hoy - Omitiendo")
         return
     
     # PROTECCIÓN 2: Verificar que existe entrada previa (orden lógico)
-    if not ya_se_ejecuto_hoy("ENTRADA SÁBADO"):
+    if not ya_se_ejecuto_hoy("ENTRADA SÁBADO", usuario):
         logger.warning("⚠️ No hay entrada de sábado registrada localmente")
         logger.warning("   • Verificando estado real en GeoVictoria...")
         
-        # Invalidar caché para verificación fresca antes de marcaje importante
-        get_cache().invalidar()
-        boton_disponible = verificar_estado_con_cache()
+        # El caché solo tiene consultas recientes o el estado publicado tras nuestro último marcaje
+        boton_disponible = await verificar_estado_con_cache(usuario, _password_de(usuario))
         
         if boton_disponible == "Salida":
             # La entrada ya fue marcada (manual o automáticamente) pero no está registrada localmente
             logger.info(f"✅ ENTRADA SÁBADO detectada en GeoVictoria")
             logger.info(f"   • Actualizando registro local...")
-            guardar_registro_ejecucion("ENTRADA SÁBADO", variacion_minutos=0)
+            guardar_registro_ejecucion("ENTRADA SÁBADO", variacion_minutos=0, usuario=usuario)
             logger.info(f"💾 Registro de entrada actualizado")
             logger.info(f"   • Continuando con marcaje de salida...")
             # Continuar con la salida más abajo
@@ -405,29 +530,27 @@ def salida_sabado():
             logger.warning("   • Por favor, marque entrada manualmente antes de marcar salida")
             return
     
-    # Invalidar caché antes de ejecutar marcaje
-    get_cache().invalidar()
-    
-    # No calcular variación - el scheduler ya programó en el horario exacto
+    # La variación la eligió el despachador (0 si los marcajes no se reparten)
     logger.info(f"📍 Ejecutando marcaje de salida sábado en horario programado")
-    ejecutar_marcaje_con_validacion("SALIDA SÁBADO", variacion_minutos=0)
+    await ejecutar_marcaje_con_validacion("SALIDA SÁBADO", variacion_minutos=variacion_minutos, usuario=usuario)
 
-def verificar_marcajes_pendientes():
-    """Verifica y ejecuta marcajes pendientes consultando el estado real de GeoVictoria"""
+async def verificar_marcajes_pendientes(usuario: str = None):
+    """Verifica y ejecuta marcajes pendientes consultando el estado real de GeoVictoria
+    
+    Args:
+        usuario: Cuenta a verificar (None = la del .env)
+    """
     hoy = date.today()
     ahora = datetime.now()
     dia_semana = hoy.weekday()
     hora_actual = ahora.time()
     
     logger.info("\n" + "=" * 80)
-    logger.info("🔍 VERIFICANDO MARCAJES PENDIENTES")
+    logger.info(f"🔍 VERIFICANDO MARCAJES PENDIENTES{_cuenta_log(usuario)}")
     logger.info(f"📅 Fecha: {hoy.strftime('%A, %d de %B de %Y')}")
     logger.info(f"🕐 Hora actual: {ahora.strftime('%H:%M:%S')}")
     logger.info("=" * 80)
     
-    # Invalidar caché al inicio para forzar verificación fresca
-    get_cache().invalidar()
-    
     # No verificar si es domingo o festivo
     if es_festivo(hoy):
         logger.info("🎉 Hoy es festivo - No hay marcajes pendientes")
@@ -439,22 +562,25 @@ def verificar_marcajes_pendientes():
         logger.info("=" * 80)
         return
     
-    # Determinar horarios y tipos de marcaje según el día
+    # Determinar horarios (turno de la cuenta) y tipos de marcaje según el día
+    turno = turno_del_dia(hoy, usuario)
+    if turno is None:
+        logger.info("📅 La cuenta no tiene turno hoy - No hay marcajes pendientes")
+        logger.info("=" * 80)
+        return
+    hora_entrada = turno['entrada']
+    hora_salida = turno['salida']
     if dia_semana == 5:  # Sábado
-        hora_entrada = time(HorarioConfig.ENTRADA_SABADO_HORA, HorarioConfig.ENTRADA_SABADO_MINUTO)
-        hora_salida = time(HorarioConfig.SALIDA_SABADO_HORA, HorarioConfig.SALIDA_SABADO_MINUTO)
         tipo_entrada = "ENTRADA SÁBADO"
         tipo_salida = "SALIDA SÁBADO"
     else:  # Lunes a Viernes
-        hora_entrada = time(HorarioConfig.ENTRADA_SEMANA_HORA, HorarioConfig.ENTRADA_SEMANA_MINUTO)
-        hora_salida = time(HorarioConfig.SALIDA_SEMANA_HORA, HorarioConfig.SALIDA_SEMANA_MINUTO)
         tipo_entrada = "ENTRADA SEMANA (L-V)"
         tipo_salida = "SALIDA SEMANA (L-V)"
     
     marcajes_ejecutados = 0
     
     # PROTECCIÓN: Si ambos marcajes ya se ejecutaron hoy, no hacer nada
-    if ya_se_ejecuto_hoy(tipo_entrada) and ya_se_ejecuto_hoy(tipo_salida):
+    if ya_se_ejecuto_hoy(tipo_entrada, usuario) and ya_se_ejecuto_hoy(tipo_salida, usuario):
         logger.info(f"✅ Ambos marcajes completados hoy ({tipo_entrada} y {tipo_salida})")
         logger.info("✅ No hay marcajes pendientes ni correcciones necesarias")
         logger.info("=" * 80)
@@ -463,22 +589,24 @@ def verificar_marcajes_pendientes():
     # Verificar entrada pendiente
     if hora_actual > hora_entrada:
         # Primero verificar si ya se registró localmente
-        if ya_se_ejecuto_hoy(tipo_entrada):
+        if ya_se_ejecuto_hoy(tipo_entrada, usuario):
             logger.info(f"✅ {tipo_entrada} ya fue ejecutado hoy (según registro local)")
         else:
             # Validar que tenga sentido marcar entrada según la hora actual
             # No marcar entrada después de las 12 PM (mediodía)
-            hora_limite_entrada = time(12, 0)
+            hora_limite_entrada = time(HorarioConfig.LIMITE_ENTRADA_HORA, 0)
             
             if hora_actual > hora_limite_entrada:
                 # Verificar si el usuario ya marcó entrada manualmente
                 logger.info(f"⚠️ Pasó la hora límite de entrada (12:00 PM) - Verificando estado...")
-                boton_disponible = verificar_estado_con_cache()
+                # Solo se actualiza el registro local (no se marca): basta un estado aproximado
+                boton_disponible = await verificar_estado_con_cache(usuario, _password_de(usuario),
+                                                                    permitir_obsoleto=True)
                 if boton_disponible == "Salida":
                     # El usuario ya marcó entrada manualmente
                     logger.info(f"✅ {tipo_entrada} detectado en GeoVictoria (marcado manualmente)")
                     logger.info(f"   • Registrando entrada en sistema local...")
-                    guardar_registro_ejecucion(tipo_entrada, variacion_minutos=0)
+                    guardar_registro_ejecucion(tipo_entrada, variacion_minutos=0, usuario=usuario)
                     logger.info(f"💾 {tipo_entrada} registrado correctamente")
                 else:
                     logger.warning(f"⚠️ MARCAJE PERDIDO: {tipo_entrada}")
@@ -490,19 +618,19 @@ def verificar_marcajes_pendientes():
                 logger.info(f"   • Hora actual: {hora_actual.strftime('%H:%M')}")
                 
                 # Primero verificar qué botón está disponible en GeoVictoria
-                boton_disponible = verificar_estado_con_cache()
+                boton_disponible = await verificar_estado_con_cache(usuario, _password_de(usuario))
                 if boton_disponible == "Salida":
                     # El usuario ya marcó entrada manualmente
                     logger.info(f"✅ {tipo_entrada} detectado en GeoVictoria (marcado manualmente)")
                     logger.info(f"   • Registrando entrada en sistema local...")
-                    guardar_registro_ejecucion(tipo_entrada, variacion_minutos=0)
+                    guardar_registro_ejecucion(tipo_entrada, variacion_minutos=0, usuario=usuario)
                     logger.info(f"💾 {tipo_entrada} registrado correctamente")
                 elif boton_disponible == "Entrada":
                     logger.info("   • El PC probablemente se inició tarde")
                     logger.info("   • Ejecutando marcaje pendiente...")
                     logger.info("=" * 80)
                     # NO validar horario en marcajes pendientes
-                    ejecutar_marcaje_con_validacion(tipo_entrada, validar_horario=False)
+                    await ejecutar_marcaje_con_validacion(tipo_entrada, validar_horario=False, usuario=usuario)
                     marcajes_ejecutados += 1
                 else:
                     logger.warning(f"⚠️ No se pudo determinar el estado en GeoVictoria")
@@ -511,22 +639,22 @@ def verificar_marcajes_pendientes():
     
     # Verificar salida pendiente
     if hora_actual > hora_salida:
-        if not ya_se_ejecuto_hoy(tipo_salida):
+        if not ya_se_ejecuto_hoy(tipo_salida, usuario):
             # Validar que la entrada ya se haya marcado
-            if not ya_se_ejecuto_hoy(tipo_entrada):
+            if not ya_se_ejecuto_hoy(tipo_entrada, usuario):
                 logger.warning(f"⚠️ MARCAJE PENDIENTE OMITIDO: {tipo_salida}")
                 logger.warning(f"   • No se puede marcar salida sin entrada previa registrada")
                 logger.warning(f"   • Verificando estado en GeoVictoria...")
-                boton_disponible = verificar_estado_con_cache()
+                boton_disponible = await verificar_estado_con_cache(usuario, _password_de(usuario))
                 if boton_disponible == "Salida":
                     # Hay entrada marcada pero no registrada localmente
                     logger.info(f"✅ Se detectó entrada previa en GeoVictoria")
                     logger.info(f"   • Registrando entrada en sistema local...")
-                    guardar_registro_ejecucion(tipo_entrada, variacion_minutos=0)
+                    guardar_registro_ejecucion(tipo_entrada, variacion_minutos=0, usuario=usuario)
                     logger.info(f"💾 {tipo_entrada} registrado correctamente")
                     logger.info(f"   • Ahora verificando marcaje de salida pendiente...")
                     # Continuar con la verificación de salida
-                    hora_limite_salida = time(23, 0)
+                    hora_limite_salida = time(HorarioConfig.LIMITE_SALIDA_HORA, 0)
                     if hora_actual > hora_limite_salida:
                         logger.warning(f"⚠️ MARCAJE PENDIENTE OMITIDO: {tipo_salida}")
                         logger.warning(f"   • Demasiado tarde para marcar salida (después de 11:00 PM)")
@@ -534,14 +662,14 @@ def verificar_marcajes_pendientes():
                         logger.warning(f"⚠️ MARCAJE PENDIENTE DETECTADO: {tipo_salida}")
                         logger.info(f"   • Ejecutando marcaje pendiente...")
                         logger.info("=" * 80)
-                        ejecutar_marcaje_con_validacion(tipo_salida, validar_horario=False)
+                        await ejecutar_marcaje_con_validacion(tipo_salida, validar_horario=False, usuario=usuario)
                         marcajes_ejecutados += 1
                 else:
                     logger.warning(f"   • ACCIÓN: Debe marcar entrada primero")
             else:
                 # Validar que tenga sentido marcar salida según la hora actual
                 # No marcar salida después de las 11 PM
-                hora_limite_salida = time(23, 0)
+                hora_limite_salida = time(HorarioConfig.LIMITE_SALIDA_HORA, 0)
                 
                 if hora_actual > hora_limite_salida:
                     logger.warning(f"⚠️ MARCAJE PENDIENTE OMITIDO: {tipo_salida}")
@@ -558,7 +686,7 @@ def verificar_marcajes_pendientes():
                     logger.info("=" * 80)
                     
                     # NO validar horario en marcajes pendientes
-                    ejecutar_marcaje_con_validacion(tipo_salida, validar_horario=False)
+                    await ejecutar_marcaje_con_validacion(tipo_salida, validar_horario=False, usuario=usuario)
                     marcajes_ejecutados += 1
         else:
             logger.info(f"✅ {tipo_salida} ya fue ejecutado hoy (según registro local)")
@@ -577,91 +705,366 @@ def job_listener(event):
     else:
         logger.debug(f"✅ Trabajo completado: {event.job_id}")
 
-def configurar_trabajos_fijos(scheduler):
-    """Configura los trabajos con horarios fijos - la variación se aplica al ejecutar"""
-    logger.info("\n📅 CONFIGURANDO HORARIOS BASE:")
-    logger.info("=" * 80)
+def calcular_plazos_verificacion(dia: date, usuario: str = None) -> list:
+    """
+    Momentos del día en que conviene verificar marcajes pendientes de una cuenta
     
-    # LUNES A VIERNES - ENTRADA (horario base fijo, variación se aplica al ejecutar)
-    scheduler.add_job(
-        entrada_semana,
-        CronTrigger(
-            day_of_week='mon-fri',
-            hour=HorarioConfig.ENTRADA_SEMANA_HORA,
-            minute=HorarioConfig.ENTRADA_SEMANA_MINUTO,
-            timezone='America/Bogota'
-        ),
-        id='entrada_semana',
-        name=f'Entrada L-V {HorarioConfig.ENTRADA_SEMANA_HORA:02d}:{HorarioConfig.ENTRADA_SEMANA_MINUTO:02d}',
-        max_instances=1,
-        coalesce=True
-    )
-    logger.info(f"  ✓ Entrada L-V programada: {HorarioConfig.ENTRADA_SEMANA_HORA:02d}:{HorarioConfig.ENTRADA_SEMANA_MINUTO:02d}")
+    Justo después de cada ventana de marcaje (hora base + variación máxima + margen)
+    y antes de cada hora límite, cuando todavía se puede recuperar el marcaje.
     
-    # LUNES A VIERNES - SALIDA (horario base fijo, variación se aplica al ejecutar)
-    scheduler.add_job(
-        salida_semana,
-        CronTrigger(
-            day_of_week='mon-fri',
-            hour=HorarioConfig.SALIDA_SEMANA_HORA,
-            minute=HorarioConfig.SALIDA_SEMANA_MINUTO,
-            timezone='America/Bogota'
-        ),
-        id='salida_semana',
-        name=f'Salida L-V {HorarioConfig.SALIDA_SEMANA_HORA:02d}:{HorarioConfig.SALIDA_SEMANA_MINUTO:02d}',
-        max_instances=1,
-        coalesce=True
-    )
-    logger.info(f"  ✓ Salida L-V programada: {HorarioConfig.SALIDA_SEMANA_HORA:02d}:{HorarioConfig.SALIDA_SEMANA_MINUTO:02d}")
+    Returns:
+        Lista ordenada de (datetime, motivo); vacía si el día no es laborable
+        o la cuenta no tiene turno ese día
+    """
+    turno = turno_del_dia(dia, usuario)
+    if not es_dia_laborable(dia) or turno is None:
+        return []
+    
+    entrada = turno['entrada']
+    salida = turno['salida']
+    margen = timedelta(minutes=HorarioConfig.MARGEN_VERIFICACION_MINUTOS)
+    plazos = [
+        (datetime.combine(dia, entrada) + timedelta(minutes=HorarioConfig.VARIACION_ENTRADA_MAX) + margen,
+         "fin de la ventana de entrada"),
+        (datetime.combine(dia, time(HorarioConfig.LIMITE_ENTRADA_HORA, 0)) - margen,
+         "antes del límite de entrada"),
+        (datetime.combine(dia, salida) + timedelta(minutes=HorarioConfig.VARIACION_SALIDA_MAX) + margen,
+         "fin de la ventana de salida"),
+        (datetime.combine(dia, time(HorarioConfig.LIMITE_SALIDA_HORA, 0)) - margen,
+         "antes del límite de salida"),
+    ]
+    return sorted(plazos)
+
+def proximo_plazo_verificacion(desde: datetime = None):
+    """Próximo (datetime, motivo) de verificación posterior a `desde` (default: ahora)"""
+    desde = desde or datetime.now()
+    dia = desde.date()
+    for _ in range(31):
+        # Plazos de todas las cuentas: la verificación revisa todas a la vez
+        plazos = sorted(plazo for usuario in cuentas_programadas()
+                        for plazo in calcular_plazos_verificacion(dia, usuario))
+        for momento, motivo in plazos:
+            if momento > desde:
+                return momento, motivo
+        dia += timedelta(days=1)
+    return None
+
+def programar_proxima_verificacion(scheduler):
+    """Arma (o re-arma) la única verificación de pendientes en el próximo plazo"""
+    plazo = proximo_plazo_verificacion()
+    if plazo is None:
+        logger.warning("⚠️ No hay plazos de verificación en los próximos 31 días")
+        return None
     
-    # SÁBADOS - ENTRADA (horario base fijo, variación se aplica al ejecutar)
+    momento, motivo = plazo
     scheduler.add_job(
-        entrada_sabado,
-        CronTrigger(
-            day_of_week='sat',
-            hour=HorarioConfig.ENTRADA_SABADO_HORA,
-            minute=HorarioConfig.ENTRADA_SABADO_MINUTO,
-            timezone='America/Bogota'
-        ),
-        id='entrada_sabado',
-        name=f'Entrada Sábado {HorarioConfig.ENTRADA_SABADO_HORA:02d}:{HorarioConfig.ENTRADA_SABADO_MINUTO:02d}',
+        verificacion_por_plazo,
+        DateTrigger(run_date=momento, timezone='America/Bogota'),
+        id='verificacion_plazo',
+        name=f'Verificación ({motivo})',
+        replace_existing=True,
         max_instances=1,
-        coalesce=True
+        coalesce=True,
+        misfire_grace_time=None  # Si el PC estaba suspendido, ejecutarla igual al despertar
     )
-    logger.info(f"  ✓ Entrada Sábado programada: {HorarioConfig.ENTRADA_SABADO_HORA:02d}:{HorarioConfig.ENTRADA_SABADO_MINUTO:02d}")
+    logger.info(f"  ⏳ Próxima verificación de pendientes: {momento.strftime('%Y-%m-%d %H:%M')} ({motivo})")
+    return momento
+
+def lock_verificacion() -> asyncio.Lock:
+    """Lock de la verificación de pendientes (se crea en el loop en ejecución)"""
+    global _verificacion_lock
+    if _verificacion_lock is None:
+        _verificacion_lock = asyncio.Lock()
+    return _verificacion_lock
+
+async def verificar_pendientes_cuentas():
+    """Verifica los marcajes pendientes de todas las cuentas programadas, una tras otra"""
+    for usuario in cuentas_programadas():
+        try:
+            await verificar_marcajes_pendientes(usuario)
+        except Exception as e:
+            logger.error(f"❌ Error verificando pendientes{_cuenta_log(usuario)}: {e}", exc_info=True)
+
+async def verificacion_por_plazo():
+    """Verificación de pendientes en un plazo del horario; luego arma la siguiente"""
+    try:
+        async with lock_verificacion():
+            await verificar_pendientes_cuentas()
+    finally:
+        if scheduler_global is not None and scheduler_global.running:
+            programar_proxima_verificacion(scheduler_global)
+
+async def recuperar_tras_salto(motivo: str):
+    """Verificación inmediata de pendientes tras una suspensión o salto de reloj"""
+    logger.warning(f"⏱️ {motivo} - Verificando marcajes pendientes ahora")
+    
+    if scheduler_global is not None and scheduler_global.running:
+        # Re-armar el plazo (el vencido lo cubre esta recuperación) y despertar al
+        # scheduler, cuyo temporizador pudo quedar atrasado durante la suspensión
+        programar_proxima_verificacion(scheduler_global)
+        scheduler_global.wakeup()
+    
+    lock = lock_verificacion()
+    if lock.locked():
+        logger.info("   • Ya hay una verificación de pendientes en curso - Omitiendo")
+        return
+    async with lock:
+        await verificar_pendientes_cuentas()
+
+async def vigilar_reloj():
+    """
+    Compara el reloj monotónico con el de pared cada INTERVALO_VIGILANCIA_S
     
-    # SÁBADOS - SALIDA (horario base fijo, variación se aplica al ejecutar)
-    scheduler.add_job(
-        salida_sabado,
-        CronTrigger(
-            day_of_week='sat',
-            hour=HorarioConfig.SALIDA_SABADO_HORA,
-            minute=HorarioConfig.SALIDA_SABADO_MINUTO,
-            timezone='America/Bogota'
-        ),
-        id='salida_sabado',
-        name=f'Salida Sábado {HorarioConfig.SALIDA_SABADO_HORA:02d}:{HorarioConfig.SALIDA_SABADO_MINUTO:02d}',
-        max_instances=1,
-        coalesce=True
-    )
-    logger.info(f"  ✓ Salida Sábado programada: {HorarioConfig.SALIDA_SABADO_HORA:02d}:{HorarioConfig.SALIDA_SABADO_MINUTO:02d}")
+    - Suspensión: el reloj de pared avanza mucho más que el intervalo (en Windows
+      también el monotónico), o ambos relojes dejan de coincidir
+    - Salto de la hora del sistema: el reloj de pared se separa del monotónico
     
-    # VERIFICACIÓN PERIÓDICA cada hora
-    scheduler.add_job(
-        verificar_marcajes_pendientes,
-        CronTrigger(
-            minute=0,  # En punto cada hora
-            timezone='America/Bogota'
-        ),
-        id='verificacion_periodica',
-        name='Verificación periódica (cada hora)',
-        max_instances=1,
-        coalesce=True
+    En ambos casos lanza una recuperación inmediata, como máximo una cada
+    ESPERA_MIN_ENTRE_RECUPERACIONES_S.
+    """
+    global _recuperacion_pendiente, _ultima_recuperacion
+    pared = reloj.time()
+    monotonico = reloj.monotonic()
+    while True:
+        await asyncio.sleep(INTERVALO_VIGILANCIA_S)
+        pared_ahora, monotonico_ahora = reloj.time(), reloj.monotonic()
+        avance_pared = pared_ahora - pared
+        avance_monotonico = monotonico_ahora - monotonico
+        pared, monotonico = pared_ahora, monotonico_ahora
+        
+        desfase = avance_pared - avance_monotonico
+        retraso = max(avance_pared, avance_monotonico) - INTERVALO_VIGILANCIA_S
+        if abs(desfase) > UMBRAL_SALTO_RELOJ_S:
+            if desfase > 0:
+                motivo = f"Reanudación tras suspensión o reloj adelantado ({desfase / 60:.1f} min)"
+            else:
+                motivo = f"Reloj del sistema atrasado ({-desfase / 60:.1f} min)"
+        elif retraso > UMBRAL_SALTO_RELOJ_S:
+            motivo = f"Reanudación tras suspensión ({retraso / 60:.1f} min sin ejecutar)"
+        else:
+            continue
+        
+        if _ultima_recuperacion is not None and monotonico_ahora - _ultima_recuperacion < ESPERA_MIN_ENTRE_RECUPERACIONES_S:
+            logger.info(f"⏱️ {motivo} - Recuperación reciente, se omite")
+            continue
+        if _recuperacion_pendiente is not None and not _recuperacion_pendiente.done():
+            continue
+        
+        _ultima_recuperacion = monotonico_ahora
+        _recuperacion_pendiente = asyncio.create_task(recuperar_tras_salto(motivo))
+        _recuperacion_pendiente.add_done_callback(_registrar_fallo_recuperacion)
+
+def _registrar_fallo_recuperacion(tarea):
+    if not tarea.cancelled() and tarea.exception() is not None:
+        logger.error(f"❌ Error en la recuperación tras salto de reloj: {tarea.exception()}")
+
+# Función de cada trabajo de marcaje (ids de src.horarios.MARCAJES)
+FUNCIONES_MARCAJE = {
+    'entrada_semana': entrada_semana,
+    'salida_semana': salida_semana,
+    'entrada_sabado': entrada_sabado,
+    'salida_sabado': salida_sabado,
+}
+
+NOMBRES_MARCAJE = {
+    'entrada_semana': "Entrada L-V",
+    'salida_semana': "Salida L-V",
+    'entrada_sabado': "Entrada Sábado",
+    'salida_sabado': "Salida Sábado",
+}
+
+def _variaciones(marcaje: str) -> tuple:
+    """(variación mínima, máxima) en minutos de la ventana de un marcaje"""
+    if marcaje.startswith('entrada'):
+        return HorarioConfig.VARIACION_ENTRADA_MIN, HorarioConfig.VARIACION_ENTRADA_MAX
+    return HorarioConfig.VARIACION_SALIDA_MIN, HorarioConfig.VARIACION_SALIDA_MAX
+
+def _trigger_marcaje(trabajo: dict):
+    hora, minuto = trabajo['hora'], trabajo['minuto']
+    if HorarioConfig.REPARTIR_MARCAJES:
+        # El trabajo arranca al abrir la ventana; el despachador elige el momento dentro
+        inicio = max(hora * 60 + minuto + _variaciones(trabajo['marcaje'])[0], 0)
+        hora, minuto = divmod(inicio, 60)
+    return CronTriggerLaborable(
+        day_of_week=trabajo['dias'],
+        hour=hora,
+        minute=minuto,
+        timezone='America/Bogota'
     )
-    logger.info(f"  ✓ Verificación periódica: Cada hora en punto")
+
+def _cuentas_en_ventana(marcaje: str, base: time) -> list:
+    """Cuentas cuyo turno tiene este marcaje a la misma hora base (comparten ventana)"""
+    _, _, jornada, campo = MARCAJES[marcaje]
+    return [u for u, turno in _horarios.items() if (turno.get(jornada) or {}).get(campo) == base]
+
+async def despachar_marcaje(marcaje: str, usuario: str = None):
+    """
+    Marca en el hueco de la cuenta dentro de la ventana del turno, a través del despachador
+    
+    La ventana (hora base + VARIACION_*) se divide en partes iguales entre las
+    cuentas que la comparten, para que cientos de cuentas con el mismo turno no
+    lancen Chromium a la vez; el despachador además limita el ritmo global.
+    """
+    tipo = MARCAJES[marcaje][0]
+    if ya_se_ejecuto_hoy(tipo, usuario):
+        logger.info(f"⏭️ {tipo} ya ejecutada hoy{_cuenta_log(usuario)} - Omitiendo")
+        return
+    
+    hoy = date.today()
+    turno = turno_del_dia(hoy, usuario)
+    if turno is None:
+        return
+    base = turno['entrada'] if marcaje.startswith('entrada') else turno['salida']
+    variacion_min, variacion_max = _variaciones(marcaje)
+    
+    hora_base = datetime.combine(hoy, base)
+    inicio = max(hora_base + timedelta(minutes=variacion_min), datetime.combine(hoy, time.min))
+    fin = hora_base + timedelta(minutes=variacion_max)
+    cuenta = usuario or cuenta_predeterminada()
+    momento, plazo = _despachador.asignar(f"{hoy} {NOMBRES_MARCAJE[marcaje]} {base.strftime('%H:%M')}",
+                                              inicio, fin, _cuentas_en_ventana(marcaje, base), cuenta)
+    variacion = round((momento - hora_base).total_seconds() / 60)
+    logger.debug(f"🎲 {tipo}{_cuenta_log(usuario)}: hueco asignado {momento.strftime('%H:%M:%S')} "
+                 f"({variacion:+d} min)")
+    
+    # Pasado el final de la ventana no se marca: si el contexto del navegador
+    # llega tarde, el marcaje falla y lo recupera la verificación de pendientes
+    token = limite_marcaje.set(fin)
+    try:
+        await _despachador.despachar(momento, plazo,
+                                     lambda: FUNCIONES_MARCAJE[marcaje](usuario, variacion))
+    finally:
+        limite_marcaje.reset(token)
+
+def _nombre_marcaje(trabajo: dict) -> str:
+    nombre = f"{NOMBRES_MARCAJE[trabajo['marcaje']]} {trabajo['hora']:02d}:{trabajo['minuto']:02d}"
+    return f"{nombre} [{trabajo['usuario']}]" if len(_horarios) > 1 else nombre
+
+def cargar_passwords() -> dict:
+    """Contraseñas de config/cuentas.json (la cuenta del .env no necesita entrada)"""
+    if not CUENTAS_FILE.exists():
+        return {}
+    return {cuenta['usuario']: cuenta['password'] for cuenta in cargar_cuentas(CUENTAS_FILE)}
+
+def aplicar_horarios(scheduler, horarios: dict, passwords: dict) -> tuple:
+    """
+    Sincroniza los trabajos de marcaje del scheduler con los turnos por cuenta
+    
+    Solo toca los trabajos que cambian: agrega los nuevos, quita los de cuentas
+    o jornadas eliminadas y reprograma los que cambiaron de hora.
+    
+    Returns:
+        (agregados, quitados, reprogramados)
+    """
+    global _horarios, _trabajos, _passwords
+    
+    usuario_env = os.getenv("GEOVICTORIA_USER")
+    sin_credenciales = [u for u in horarios if u != usuario_env and u not in passwords
+                        and u != "predeterminada"]
+    for usuario in sin_credenciales:
+        logger.warning(f"⚠️ {usuario} no tiene contraseña en {CUENTAS_FILE.name} - Sin marcajes programados")
+    horarios = {u: turno for u, turno in horarios.items() if u not in sin_credenciales}
+    
+    nuevos = trabajos_de(horarios)
+    agregar, quitar, reprogramar = comparar_trabajos(_trabajos, nuevos)
+    _horarios = horarios
+    _passwords = passwords
+    
+    for id_trabajo in quitar:
+        if scheduler.get_job(id_trabajo) is not None:
+            scheduler.remove_job(id_trabajo)
+        logger.info(f"  ✗ Quitado: {id_trabajo}")
+    for id_trabajo in agregar:
+        trabajo = nuevos[id_trabajo]
+        if HorarioConfig.REPARTIR_MARCAJES:
+            funcion, argumentos = despachar_marcaje, [trabajo['marcaje'], trabajo['usuario']]
+        else:
+            funcion, argumentos = FUNCIONES_MARCAJE[trabajo['marcaje']], [trabajo['usuario']]
+        scheduler.add_job(
+            funcion,
+            _trigger_marcaje(trabajo),
+            args=argumentos,
+            id=id_trabajo,
+            name=_nombre_marcaje(trabajo),
+            max_instances=1,
+            coalesce=True
+        )
+        logger.info(f"  ✓ {_nombre_marcaje(trabajo)} programada")
+    for id_trabajo in reprogramar:
+        trabajo = nuevos[id_trabajo]
+        scheduler.modify_job(id_trabajo, name=_nombre_marcaje(trabajo))
+        scheduler.reschedule_job(id_trabajo, trigger=_trigger_marcaje(trabajo))
+        logger.info(f"  ↻ {_nombre_marcaje(trabajo)} reprogramada")
+    _trabajos = nuevos
+    
+    # Los plazos de verificación dependen de los turnos
+    programar_proxima_verificacion(scheduler)
+    return len(agregar), len(quitar), len(reprogramar)
+
+def configurar_trabajos_fijos(scheduler):
+    """Configura los trabajos de marcaje de cada cuenta - la variación se aplica al ejecutar
     
+    Los turnos salen de config/horarios.json (o de HorarioConfig si no existe).
+    Los triggers saltan los festivos: en festivo el programador no se despierta
+    """
+    logger.info("\n📅 CONFIGURANDO HORARIOS BASE:")
     logger.info("=" * 80)
-    logger.info("💡 Nota: Los marcajes se ejecutan en horarios FIJOS (sin variación aleatoria)")
+    
+    try:
+        horarios = cargar_horarios(turno_predeterminado(), HORARIOS_FILE)
+        passwords = cargar_passwords()
+    except Exception as e:
+        # Un archivo mal escrito no debe impedir que el programador arranque
+        logger.error(f"❌ Error leyendo {HORARIOS_FILE.name} o {CUENTAS_FILE.name}: {e} - "
+                     f"Usando el horario predeterminado")
+        horarios = {cuenta_predeterminada(): turno_predeterminado()}
+        passwords = {}
+    
+    # Marcajes de cada cuenta y verificación de pendientes en los plazos del horario
+    aplicar_horarios(scheduler, horarios, passwords)
+    
+    logger.info("=" * 80)
+    if HorarioConfig.REPARTIR_MARCAJES:
+        logger.info(f"💡 Nota: Cada marcaje se reparte en su ventana de variación "
+                    f"(máximo {HorarioConfig.MARCAJES_POR_MINUTO} marcajes/min entre todas las cuentas)")
+    else:
+        logger.info("💡 Nota: Los marcajes se ejecutan en horarios FIJOS (sin variación aleatoria)")
+
+async def vigilar_horarios(scheduler):
+    """
+    Recarga config/horarios.json (y cuentas.json) al modificarse, sin reiniciar
+    
+    Revisa la fecha de modificación cada INTERVALO_RECARGA_HORARIOS_S. Un archivo
+    con errores se ignora y se mantienen los horarios vigentes; ningún error
+    detiene la vigilancia.
+    """
+    firma = (firma_archivo(HORARIOS_FILE), firma_archivo(CUENTAS_FILE))
+    while True:
+        await asyncio.sleep(INTERVALO_RECARGA_HORARIOS_S)
+        nueva = (firma_archivo(HORARIOS_FILE), firma_archivo(CUENTAS_FILE))
+        if nueva == firma:
+            continue
+        firma = nueva
+        
+        try:
+            horarios = cargar_horarios(turno_predeterminado(), HORARIOS_FILE)
+            passwords = cargar_passwords()
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ {HORARIOS_FILE.name} o {CUENTAS_FILE.name} no es válido: {e} - "
+                         f"Se mantienen los horarios actuales")
+            continue
+        except Exception as e:
+            logger.error(f"❌ Error leyendo {HORARIOS_FILE.name} o {CUENTAS_FILE.name}: {e} - "
+                         f"Se mantienen los horarios actuales", exc_info=True)
+            continue
+        
+        try:
+            logger.info("🔄 Horarios modificados - Aplicando cambios")
+            agregados, quitados, reprogramados = aplicar_horarios(scheduler, horarios, passwords)
+            logger.info(f"🔄 Horarios recargados: {agregados} agregado(s), {quitados} quitado(s), "
+                        f"{reprogramados} reprogramado(s) - {len(_horarios)} cuenta(s)")
+        except Exception as e:
+            logger.error(f"❌ Error aplicando los horarios: {e}", exc_info=True)
 
 # Variable global para el scheduler
 scheduler_global = None
@@ -718,10 +1121,101 @@ def eliminar_lock_file():
     except Exception as e:
         logger.error(f"Error eliminando lock file: {e}")
 
+async def ejecutar_programador():
+    """Ejecuta el programador en un único loop asyncio de larga duración
+    
+    Todos los trabajos son corrutinas del mismo loop, así que comparten el pool
+    de navegadores, las sesiones y el caché sin saltos entre hilos ni loops.
+    """
+    global scheduler_global, _verificacion_lock
+    
+    # Lock nuevo ligado a este loop
+    _verificacion_lock = asyncio.Lock()
+    
+    # Navegadores calientes compartidos por todos los trabajos
+    await iniciar_pool_navegadores()
+    
+    scheduler = None
+    vigilantes = []
+    try:
+        # Crear scheduler sobre el loop actual
+        scheduler = AsyncIOScheduler(timezone='America/Bogota')
+        scheduler_global = scheduler
+        
+        # Agregar listener para eventos
+        scheduler.add_listener(job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        
+        # Configurar trabajos con los turnos de cada cuenta
+        configurar_trabajos_fijos(scheduler)
+        
+        # Verificar si hay marcajes pendientes (PC iniciado tarde)
+        logger.info("\n🔍 Verificando marcajes pendientes del día...")
+        async with lock_verificacion():
+            await verificar_pendientes_cuentas()
+        
+        scheduler.start()
+        
+        # Detectar suspensiones y saltos de reloj para recuperar sin esperar al próximo plazo
+        vigilantes.append(asyncio.create_task(vigilar_reloj()))
+        # Aplicar cambios de config/horarios.json sin reiniciar
+        vigilantes.append(asyncio.create_task(vigilar_horarios(scheduler)))
+        
+        # Mostrar trabajos programados
+        logger.info("\n📋 TRABAJOS PROGRAMADOS:")
+        logger.info("=" * 80)
+        for job in scheduler.get_jobs():
+            try:
+                next_run = job.next_run_time.strftime('%Y-%m-%d %H:%M:%S') if job.next_run_time else 'N/A'
+            except AttributeError:
+                next_run = 'Información no disponible'
+            logger.info(f"  ✓ {job.name:25} | Próxima ejecución: {next_run}")
+        logger.info("=" * 80)
+        
+        # Información sobre días excluidos
+        logger.info("\n📌 CONFIGURACIÓN:")
+        logger.info("  • Domingos: EXCLUIDOS (no se ejecuta)")
+        logger.info("  • Festivos Colombia: EXCLUIDOS (los trabajos no se programan en festivos)")
+        logger.info("  • Zona horaria: America/Bogota")
+        if HorarioConfig.REPARTIR_MARCAJES:
+            logger.info(f"  • Horarios: ALEATORIOS dentro de la ventana (entrada {HorarioConfig.VARIACION_ENTRADA_MIN:+d}/"
+                        f"{HorarioConfig.VARIACION_ENTRADA_MAX:+d} min, salida {HorarioConfig.VARIACION_SALIDA_MIN:+d}/"
+                        f"{HorarioConfig.VARIACION_SALIDA_MAX:+d} min), ritmo máx {HorarioConfig.MARCAJES_POR_MINUTO}/min")
+        else:
+            logger.info("  • Horarios: FIJOS (exactos, sin variación aleatoria)")
+        logger.info(f"  • Cuentas: {len(_horarios)} (turnos en {HORARIOS_FILE.name}, se recargan al editarlo)")
+        for usuario, turno in list(_horarios.items())[:10]:
+            jornadas = []
+            for jornada, etiqueta in (('semana', "L-V"), ('sabado', "Sáb")):
+                if turno.get(jornada):
+                    jornadas.append(f"{etiqueta} {turno[jornada]['entrada']:%H:%M}-{turno[jornada]['salida']:%H:%M}")
+            logger.info(f"    - {usuario}: {', '.join(jornadas) or 'sin turno'}")
+        if len(_horarios) > 10:
+            logger.info(f"    - ... y {len(_horarios) - 10} cuenta(s) más")
+        logger.info(f"  • Cooldown entre marcajes: {HorarioConfig.COOLDOWN_ENTRE_MARCAJES} segundos")
+        if _pool_navegadores is not None:
+            logger.info(f"  • Pool de navegadores: {_pool_navegadores.max_navegadores} Chromium caliente(s), "
+                        f"reciclaje cada {_pool_navegadores.max_usos} usos")
+        margen = HorarioConfig.MARGEN_VERIFICACION_MINUTOS
+        logger.info(f"  • Verificación de pendientes: {margen} min tras cada ventana de marcaje y "
+                    f"{margen} min antes de los límites ({HorarioConfig.LIMITE_ENTRADA_HORA}:00 / "
+                    f"{HorarioConfig.LIMITE_SALIDA_HORA}:00)")
+        logger.info("  • Recuperación automática: SI (al inicio, en cada plazo y al reanudar tras suspensión)")
+        logger.info("  • Protección contra duplicados: MÚLTIPLES CAPAS (registro + cooldown + validación)")
+        logger.info("=" * 80)
+        
+        logger.info("\n⏰ Programador activo. Presione Ctrl+C para detener.\n")
+        
+        # Mantener el loop vivo; los trabajos corren como tareas del scheduler
+        await asyncio.Event().wait()
+    finally:
+        for vigilante in vigilantes:
+            vigilante.cancel()
+        if scheduler is not None and scheduler.running:
+            scheduler.shutdown(wait=False)
+        await cerrar_pool_navegadores()
+
 def main():
     """Función principal del programador"""
-    global scheduler_global
-    
     # PROTECCIÓN: Verificar si ya hay una instancia corriendo
     crear_lock_file()
     
@@ -739,51 +1233,8 @@ def main():
     año_actual = datetime.now().year
     listar_festivos_año(año_actual)
     
-    # Verificar si hay marcajes pendientes (PC iniciado tarde)
-    logger.info("\n🔍 Verificando marcajes pendientes del día...")
-    verificar_marcajes_pendientes()
-    
-    # Crear scheduler
-    scheduler = BlockingScheduler(timezone='America/Bogota')
-    scheduler_global = scheduler
-    
-    # Agregar listener para eventos
-    scheduler.add_listener(job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
-    
-    # Configurar trabajos con horarios fijos
-    configurar_trabajos_fijos(scheduler)
-    
-    # Mostrar trabajos programados
-    logger.info("\n📋 TRABAJOS PROGRAMADOS:")
-    logger.info("=" * 80)
-    for job in scheduler.get_jobs():
-        try:
-            next_run = job.next_run_time.strftime('%Y-%m-%d %H:%M:%S') if job.next_run_time else 'N/A'
-        except AttributeError:
-            next_run = 'Información no disponible'
-        logger.info(f"  ✓ {job.name:25} | Próxima ejecución: {next_run}")
-    logger.info("=" * 80)
-    
-    # Información sobre días excluidos
-    logger.info("\n📌 CONFIGURACIÓN:")
-    logger.info("  • Domingos: EXCLUIDOS (no se ejecuta)")
-    logger.info("  • Festivos Colombia: EXCLUIDOS (validación automática)")
-    logger.info("  • Zona horaria: America/Bogota")
-    logger.info("  • Horarios: FIJOS (exactos, sin variación aleatoria)")
-    logger.info(f"    - Entrada L-V: {HorarioConfig.ENTRADA_SEMANA_HORA:02d}:{HorarioConfig.ENTRADA_SEMANA_MINUTO:02d}")
-    logger.info(f"    - Salida L-V: {HorarioConfig.SALIDA_SEMANA_HORA:02d}:{HorarioConfig.SALIDA_SEMANA_MINUTO:02d}")
-    logger.info(f"    - Entrada Sáb: {HorarioConfig.ENTRADA_SABADO_HORA:02d}:{HorarioConfig.ENTRADA_SABADO_MINUTO:02d}")
-    logger.info(f"    - Salida Sáb: {HorarioConfig.SALIDA_SABADO_HORA:02d}:{HorarioConfig.SALIDA_SABADO_MINUTO:02d}")
-    logger.info(f"  • Cooldown entre marcajes: {HorarioConfig.COOLDOWN_ENTRE_MARCAJES} segundos")
-    logger.info("  • Verificación periódica: CADA HORA (detecta y ejecuta marcajes pendientes)")
-    logger.info("  • Recuperación automática: SI (al inicio y cada hora)")
-    logger.info("  • Protección contra duplicados: MÚLTIPLES CAPAS (registro + cooldown + validación)")
-    logger.info("=" * 80)
-    
-    logger.info("\n⏰ Programador activo. Presione Ctrl+C para detener.\n")
-    
     try:
-        scheduler.start()
+        asyncio.run(ejecutar_programador())
     except (KeyboardInterrupt, SystemExit):
         logger.info("\n👋 Programador detenido por el usuario")
         logger.info("=" * 80)
@@ -0,0 +1,552 @@
+"""
+Registro de ejecuciones de marcaje
+Una entrada por (cuenta, fecha, tipo de marcaje), con dos almacenamientos:
+
+  - SQLite en modo WAL (por defecto): inserciones atómicas, consultas indexadas
+    y retención con un DELETE por fecha. Varios procesos pueden escribir a la vez.
+  - Journal append-only (JSONL): cada marcaje es una línea con fsync; el estado
+    se reconstruye reproduciendo instantánea + journal y un compactador en
+    segundo plano genera nuevas instantáneas. Se usa si SQLite no puede activar
+    WAL (ej. carpeta en red) o con GEOVICTORIA_REGISTRO=journal.
+
+Las consultas de decisión (ya_ejecutado, ultimo_timestamp) se responden desde
+una vista en memoria que solo se recarga cuando otro proceso modificó el almacenamiento.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LOG_DIR = Path(__file__).parent / "logs"
+REGISTRO_DB = LOG_DIR / "registro_ejecuciones.db"
+REGISTRO_JOURNAL = LOG_DIR / "registro_ejecuciones.journal.jsonl"
+# Formato anterior: se migra una sola vez y se renombra a .json.migrado
+REGISTRO_JSON = LOG_DIR / "registro_ejecuciones.json"
+
+DIAS_RETENCION = 30
+
+def cuenta_predeterminada() -> str:
+    """Cuenta usada cuando no se indica una (GEOVICTORIA_USER)"""
+    return os.getenv("GEOVICTORIA_USER") or "predeterminada"
+
+def _datos(fila) -> Dict:
+    return {
+        'ejecutado': True,
+        'hora': fila['hora'],
+        'timestamp': fila['timestamp'],
+        'variacion_minutos': fila['variacion_minutos'],
+    }
+
+def _leer_json_antiguo(archivo_json: Path) -> Optional[List[Dict]]:
+    """Filas del registro JSON anterior (None si no se pudo leer)"""
+    try:
+        with open(archivo_json, 'r', encoding='utf-8') as f:
+            registro = json.load(f)
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo leer {archivo_json.name} para migrarlo: {e}")
+        return None
+
+    usuario = cuenta_predeterminada()
+    filas = []
+    for fecha, marcajes in registro.items():
+        for tipo, datos in marcajes.items():
+            if not datos.get('ejecutado', True):
+                continue
+            hora = datos.get('hora') or f"{fecha}T00:00:00"
+            filas.append({
+                'usuario': usuario, 'fecha': fecha, 'tipo': tipo, 'hora': hora,
+                'timestamp': datos.get('timestamp') or datetime.fromisoformat(hora).timestamp(),
+                'variacion_minutos': datos.get('variacion_minutos', 0),
+            })
+    return filas
+
+def _marcar_migrado(archivo_json: Path, cantidad: int, destino: str) -> None:
+    try:
+        archivo_json.replace(archivo_json.with_name(archivo_json.name + ".migrado"))
+    except OSError as e:
+        logger.debug(f"No se pudo renombrar {archivo_json.name}: {e}")
+    logger.info(f"📦 Registro JSON migrado a {destino}: {cantidad} marcajes")
+
+@contextmanager
+def _bloqueo_entre_procesos(ruta: Path):
+    """Bloqueo exclusivo del sistema operativo sobre `ruta`, compartido por todos los procesos"""
+    with open(ruta, 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK se rinde tras ~10 s: seguir esperando
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class _RegistroBase(ABC):
+    """Vista en memoria y consultas comunes a ambos almacenamientos"""
+
+    def __init__(self, dias_retencion: int):
+        self.dias_retencion = dias_retencion
+        self._lock = threading.Lock()
+        # Vista en memoria: (usuario, fecha) -> {tipo: datos}
+        self._vista: Optional[Dict[tuple, Dict[str, Dict]]] = None
+        self.recargas = 0
+
+    @abstractmethod
+    def _asegurar_vista(self) -> None:
+        """Recarga la vista si el almacenamiento cambió (llamar con el lock)"""
+
+    def _limite_retencion(self) -> str:
+        return (date.today() - timedelta(days=self.dias_retencion)).isoformat()
+
+    @staticmethod
+    def _fila(tipo_marcaje: str, variacion_minutos: int, usuario: Optional[str],
+              momento: Optional[datetime]) -> Dict:
+        momento = momento or datetime.now()
+        return {
+            'usuario': usuario or cuenta_predeterminada(),
+            'fecha': momento.date().isoformat(),
+            'tipo': tipo_marcaje,
+            'hora': momento.isoformat(),
+            'timestamp': momento.timestamp(),
+            'variacion_minutos': variacion_minutos,
+        }
+
+    @staticmethod
+    def _aplicar_guardar(vista: Dict, fila) -> None:
+        vista.setdefault((fila['usuario'], fila['fecha']), {})[fila['tipo']] = _datos(fila)
+
+    @staticmethod
+    def _aplicar_eliminar(vista: Dict, usuario: str, fecha: str, tipos: List[str]) -> int:
+        marcajes = vista.get((usuario, fecha), {})
+        eliminados = 0
+        for tipo in (tipos or list(marcajes)):
+            if marcajes.pop(tipo, None) is not None:
+                eliminados += 1
+        return eliminados
+
+    def _podar_vista(self, limite: str) -> None:
+        for clave in [c for c in self._vista if c[1] < limite]:
+            del self._vista[clave]
+
+    def _marcajes_dia(self, fecha: Optional[date], usuario: Optional[str]) -> Dict[str, Dict]:
+        with self._lock:
+            self._asegurar_vista()
+            return dict(self._vista.get((usuario or cuenta_predeterminada(), (fecha or date.today()).isoformat()), {}))
+
+    def ya_ejecutado(self, tipo_marcaje: str, fecha: Optional[date] = None,
+                     usuario: Optional[str] = None) -> bool:
+        """True si el tipo de marcaje ya se registró ese día (default: hoy)"""
+        return tipo_marcaje in self._marcajes_dia(fecha, usuario)
+
+    def ultimo_timestamp(self, fecha: Optional[date] = None, usuario: Optional[str] = None) -> Optional[float]:
+        """Timestamp del último marcaje del día (None si no hay)"""
+        marcajes = self._marcajes_dia(fecha, usuario)
+        return max((datos['timestamp'] for datos in marcajes.values()), default=None)
+
+    def como_dict(self, usuario: Optional[str] = None, dias: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Registro con el formato del JSON anterior:
+        {fecha: {tipo: {'ejecutado', 'hora', 'timestamp', 'variacion_minutos'}}}
+        """
+        usuario = usuario or cuenta_predeterminada()
+        desde = (date.today() - timedelta(days=dias)).isoformat() if dias is not None else ""
+        with self._lock:
+            self._asegurar_vista()
+            dias_cuenta = {fecha: marcajes for (cuenta, fecha), marcajes in self._vista.items()
+                           if cuenta == usuario and fecha >= desde and marcajes}
+
+        registro: Dict[str, Dict] = {}
+        for fecha in sorted(dias_cuenta, reverse=True):
+            ordenados = sorted(dias_cuenta[fecha].items(), key=lambda item: item[1]['timestamp'])
+            registro[fecha] = {tipo: dict(datos) for tipo, datos in ordenados}
+        return registro
+
+class RegistroEjecuciones(_RegistroBase):
+    """Registro indexado de marcajes en SQLite/WAL (thread-safe y multiproceso)"""
+
+    def __init__(self, archivo: Path = REGISTRO_DB, archivo_json: Optional[Path] = REGISTRO_JSON,
+                 dias_retencion: int = DIAS_RETENCION):
+        """
+        Args:
+            archivo: Base SQLite del registro
+            archivo_json: Registro JSON antiguo a migrar (None = no migrar)
+            dias_retencion: Días de historial que se conservan
+
+        Raises:
+            sqlite3.Error: Si la base no se puede abrir o no admite WAL
+        """
+        super().__init__(dias_retencion)
+        self.archivo = archivo
+        self._firma_vista = None
+        self._version_vista = None
+
+        archivo.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit: cada INSERT/DELETE es su propia transacción atómica
+        self._conexion = sqlite3.connect(str(archivo), timeout=10, isolation_level=None,
+                                         check_same_thread=False)
+        self._conexion.row_factory = sqlite3.Row
+        modo = self._conexion.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if str(modo).lower() != "wal":
+            # Sin memoria compartida (carpetas en red) SQLite no activa WAL
+            self._conexion.close()
+            raise sqlite3.OperationalError(f"WAL no disponible (journal_mode={modo})")
+        # FULL: un marcaje registrado sobrevive a un corte de luz (protección anti-duplicados)
+        self._conexion.execute("PRAGMA synchronous=FULL")
+        self._conexion.executescript(
+            "CREATE TABLE IF NOT EXISTS ejecuciones ("
+            " usuario TEXT NOT NULL, fecha TEXT NOT NULL, tipo TEXT NOT NULL,"
+            " hora TEXT NOT NULL, timestamp REAL NOT NULL, variacion_minutos INTEGER NOT NULL DEFAULT 0,"
+            " PRIMARY KEY (usuario, fecha, tipo));"
+            "CREATE INDEX IF NOT EXISTS idx_ejecuciones_fecha ON ejecuciones (fecha);"
+        )
+
+        if archivo_json is not None and archivo_json.exists():
+            self._migrar_json(archivo_json)
+
+    def _firma(self) -> tuple:
+        """(mtime, tamaño) de la base y su WAL: cambia con cada commit o checkpoint"""
+        firma = []
+        for ruta in (self.archivo, self.archivo.with_name(self.archivo.name + "-wal")):
+            try:
+                st = os.stat(ruta)
+                firma.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                firma.append(None)
+        return tuple(firma)
+
+    def _asegurar_vista(self) -> None:
+        firma = self._firma()
+        if self._vista is not None and firma == self._firma_vista:
+            return
+
+        # data_version solo cambia con commits de OTRAS conexiones: si la firma
+        # cambió por nuestras propias escrituras, la vista ya está al día
+        version = self._conexion.execute("PRAGMA data_version").fetchone()[0]
+        if self._vista is None or version != self._version_vista:
+            vista: Dict[tuple, Dict[str, Dict]] = {}
+            for fila in self._conexion.execute(
+                    "SELECT usuario, fecha, tipo, hora, timestamp, variacion_minutos FROM ejecuciones"):
+                self._aplicar_guardar(vista, fila)
+            self._vista = vista
+            self._version_vista = version
+            self.recargas += 1
+        self._firma_vista = firma
+
+    def guardar(self, tipo_marcaje: str, variacion_minutos: int = 0, usuario: Optional[str] = None,
+                momento: Optional[datetime] = None) -> Dict:
+        """Registra un marcaje ejecutado (reemplaza el del mismo tipo ese día)"""
+        fila = self._fila(tipo_marcaje, variacion_minutos, usuario, momento)
+        limite = self._limite_retencion()
+        with self._lock:
+            self._asegurar_vista()
+            self._conexion.execute(
+                "INSERT OR REPLACE INTO ejecuciones (usuario, fecha, tipo, hora, timestamp, variacion_minutos)"
+                " VALUES (:usuario, :fecha, :tipo, :hora, :timestamp, :variacion_minutos)", fila
+            )
+            # Retención: borrado por el índice de fecha
+            self._conexion.execute("DELETE FROM ejecuciones WHERE fecha < ?", (limite,))
+
+            # Write-through en la vista (sin releer la base)
+            self._aplicar_guardar(self._vista, fila)
+            self._podar_vista(limite)
+        return fila
+
+    def eliminar(self, fecha: Optional[date] = None, tipos: Optional[Iterable[str]] = None,
+                 usuario: Optional[str] = None) -> int:
+        """Elimina los marcajes de un día (todos o solo `tipos`); retorna cuántos"""
+        usuario = usuario or cuenta_predeterminada()
+        fecha_iso = (fecha or date.today()).isoformat()
+        consulta = "DELETE FROM ejecuciones WHERE usuario = ? AND fecha = ?"
+        parametros = [usuario, fecha_iso]
+        tipos = list(tipos or [])
+        if tipos:
+            consulta += f" AND tipo IN ({','.join('?' * len(tipos))})"
+            parametros.extend(tipos)
+        with self._lock:
+            self._asegurar_vista()
+            eliminados = self._conexion.execute(consulta, parametros).rowcount
+            self._aplicar_eliminar(self._vista, usuario, fecha_iso, tipos)
+        return eliminados
+
+    def _migrar_json(self, archivo_json: Path) -> None:
+        """Importa el registro JSON antiguo (una vez) y lo renombra"""
+        filas = _leer_json_antiguo(archivo_json)
+        if filas is None:
+            return
+
+        with self._lock:
+            # Una sola transacción: o se migra todo o nada. Lo ya registrado en SQLite prevalece
+            self._conexion.execute("BEGIN IMMEDIATE")
+            try:
+                self._conexion.executemany(
+                    "INSERT OR IGNORE INTO ejecuciones (usuario, fecha, tipo, hora, timestamp, variacion_minutos)"
+                    " VALUES (:usuario, :fecha, :tipo, :hora, :timestamp, :variacion_minutos)", filas
+                )
+                self._conexion.execute("COMMIT")
+            except Exception:
+                self._conexion.execute("ROLLBACK")
+                raise
+
+        _marcar_migrado(archivo_json, len(filas), "SQLite")
+
+class RegistroJournal(_RegistroBase):
+    """Registro de marcajes en un journal JSONL append-only con instantáneas
+
+    Archivos:
+      - <journal>: una operación por línea ({"op": "guardar"|"eliminar", ...}), con fsync
+      - <journal>.snapshot.json: estado completo tras la última compactación
+      - <journal>.compactando: journal rotado durante una compactación
+      - <journal>.lock: bloqueo entre procesos que toman cada escritura y cada compactación
+
+    Las operaciones son idempotentes: reproducir otra vez un journal que ya
+    entró en la instantánea (compactación interrumpida) no cambia el estado.
+    """
+
+    def __init__(self, archivo: Path = REGISTRO_JOURNAL, archivo_json: Optional[Path] = REGISTRO_JSON,
+                 dias_retencion: int = DIAS_RETENCION, intervalo_compactacion_s: Optional[float] = 600,
+                 min_operaciones_compactar: int = 200):
+        """
+        Args:
+            archivo: Journal JSONL del registro
+            archivo_json: Registro JSON antiguo a migrar (None = no migrar)
+            dias_retencion: Días de historial que se conservan
+            intervalo_compactacion_s: Cada cuánto revisar si compactar (None = sin hilo)
+            min_operaciones_compactar: Líneas de journal a partir de las cuales compactar
+        """
+        super().__init__(dias_retencion)
+        self.archivo = archivo
+        self.archivo_instantanea = archivo.with_name(archivo.name + ".snapshot.json")
+        self.archivo_rotado = archivo.with_name(archivo.name + ".compactando")
+        self.archivo_bloqueo = archivo.with_name(archivo.name + ".lock")
+        self.min_operaciones_compactar = min_operaciones_compactar
+        self._firma_vista = None
+        self._operaciones_journal = 0
+        archivo.parent.mkdir(parents=True, exist_ok=True)
+
+        if archivo_json is not None and archivo_json.exists():
+            self._migrar_json(archivo_json)
+
+        self._detener = threading.Event()
+        self._hilo_compactador = None
+        if intervalo_compactacion_s:
+            self._hilo_compactador = threading.Thread(target=self._compactar_periodicamente,
+                                                      args=(intervalo_compactacion_s,),
+                                                      name="compactador-registro", daemon=True)
+            self._hilo_compactador.start()
+
+    def _firma(self) -> tuple:
+        """(mtime, tamaño) de instantánea, journal rotado y journal"""
+        firma = []
+        for ruta in (self.archivo_instantanea, self.archivo_rotado, self.archivo):
+            try:
+                st = os.stat(ruta)
+                firma.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                firma.append(None)
+        return tuple(firma)
+
+    def _reproducir(self, ruta: Path, vista: Dict) -> int:
+        """Aplica las operaciones de un journal; una línea cortada se ignora"""
+        operaciones = 0
+        try:
+            with open(ruta, 'r', encoding='utf-8') as f:
+                for numero, linea in enumerate(f, 1):
+                    linea = linea.strip()
+                    if not linea:
+                        continue
+                    try:
+                        op = json.loads(linea)
+                    except json.JSONDecodeError:
+                        # Escritura interrumpida por un corte: las demás líneas siguen siendo válidas
+                        logger.warning(f"⚠️ Línea {numero} incompleta en {ruta.name} - Ignorada")
+                        continue
+                    if op.get('op') == 'guardar':
+                        self._aplicar_guardar(vista, op)
+                    elif op.get('op') == 'eliminar':
+                        self._aplicar_eliminar(vista, op['usuario'], op['fecha'], op.get('tipos') or [])
+                    operaciones += 1
+        except FileNotFoundError:
+            pass
+        return operaciones
+
+    def _asegurar_vista(self) -> None:
+        firma = self._firma()
+        if self._vista is not None and firma == self._firma_vista:
+            return
+
+        # Instantánea + journal rotado (si una compactación quedó a medias) + journal
+        vista: Dict[tuple, Dict[str, Dict]] = {}
+        try:
+            with open(self.archivo_instantanea, 'r', encoding='utf-8') as f:
+                for fila in json.load(f).get('marcajes', []):
+                    self._aplicar_guardar(vista, fila)
+        except FileNotFoundError:
+            pass
+        self._reproducir(self.archivo_rotado, vista)
+        self._operaciones_journal = self._reproducir(self.archivo, vista)
+
+        self._vista = vista
+        self._podar_vista(self._limite_retencion())
+        self._firma_vista = firma
+        self.recargas += 1
+
+    def _anexar(self, operacion: Dict) -> None:
+        """Añade una línea al journal y la lleva a disco (O(1): no reescribe nada)"""
+        linea = (json.dumps(operacion, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+        with _bloqueo_entre_procesos(self.archivo_bloqueo), open(self.archivo, 'a+b') as f:
+            # Si un corte dejó la última línea a medias, no pegarle la nueva
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    linea = b"\n" + linea
+            f.write(linea)
+            f.flush()
+            os.fsync(f.fileno())
+        self._operaciones_journal += 1
+
+    def guardar(self, tipo_marcaje: str, variacion_minutos: int = 0, usuario: Optional[str] = None,
+                momento: Optional[datetime] = None) -> Dict:
+        """Registra un marcaje ejecutado (reemplaza el del mismo tipo ese día)"""
+        fila = self._fila(tipo_marcaje, variacion_minutos, usuario, momento)
+        with self._lock:
+            self._asegurar_vista()
+            self._anexar({'op': 'guardar', **fila})
+            self._aplicar_guardar(self._vista, fila)
+            self._podar_vista(self._limite_retencion())
+            # Nuestra propia línea no obliga a recargar
+            self._firma_vista = self._firma()
+        return fila
+
+    def eliminar(self, fecha: Optional[date] = None, tipos: Optional[Iterable[str]] = None,
+                 usuario: Optional[str] = None) -> int:
+        """Elimina los marcajes de un día (todos o solo `tipos`); retorna cuántos"""
+        usuario = usuario or cuenta_predeterminada()
+        fecha_iso = (fecha or date.today()).isoformat()
+        tipos = list(tipos or [])
+        with self._lock:
+            self._asegurar_vista()
+            self._anexar({'op': 'eliminar', 'usuario': usuario, 'fecha': fecha_iso, 'tipos': tipos})
+            eliminados = self._aplicar_eliminar(self._vista, usuario, fecha_iso, tipos)
+            self._firma_vista = self._firma()
+        return eliminados
+
+    def compactar(self) -> bool:
+        """
+        Escribe una instantánea del estado y descarta el journal ya incluido
+
+        Cada paso deja un estado recuperable si el proceso muere:
+          1. Rotar el journal (las nuevas escrituras van a un journal vacío)
+          2. Escribir la instantánea en un temporal, fsync y reemplazo atómico
+          3. Borrar el journal rotado
+
+        Todo ocurre con el bloqueo entre procesos tomado: ningún proceso puede
+        anexar al journal rotado ni compactar a la vez.
+        """
+        with self._lock, _bloqueo_entre_procesos(self.archivo_bloqueo):
+            if not self.archivo_rotado.exists():
+                if not self.archivo.exists():
+                    return False
+                os.replace(self.archivo, self.archivo_rotado)
+
+            self._firma_vista = None
+            self._asegurar_vista()
+            marcajes = [
+                {'usuario': usuario, 'fecha': fecha, 'tipo': tipo, **datos}
+                for (usuario, fecha), tipos in self._vista.items()
+                for tipo, datos in tipos.items()
+            ]
+            temporal = self.archivo_instantanea.with_name(f"{self.archivo_instantanea.name}.{os.getpid()}.tmp")
+            with open(temporal, 'w', encoding='utf-8') as f:
+                json.dump({'generado': datetime.now().isoformat(timespec='seconds'), 'marcajes': marcajes},
+                          f, ensure_ascii=False, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.archivo_instantanea)
+            self.archivo_rotado.unlink(missing_ok=True)
+            self._firma_vista = self._firma()
+
+        logger.info(f"🗜️ Registro compactado: {len(marcajes)} marcajes en la instantánea")
+        return True
+
+    def _compactar_periodicamente(self, intervalo_s: float) -> None:
+        while not self._detener.wait(intervalo_s):
+            try:
+                with self._lock:
+                    self._asegurar_vista()  # cuenta también las líneas de otros procesos
+                if self._operaciones_journal >= self.min_operaciones_compactar or self.archivo_rotado.exists():
+                    self.compactar()
+            except Exception as e:
+                logger.warning(f"⚠️ Error compactando el registro: {e}")
+
+    def detener_compactador(self) -> None:
+        """Detiene el hilo de compactación (el journal sigue siendo válido)"""
+        self._detener.set()
+        if self._hilo_compactador is not None:
+            self._hilo_compactador.join(timeout=2)
+
+    def _migrar_json(self, archivo_json: Path) -> None:
+        """Importa el registro JSON antiguo (una vez) y lo renombra"""
+        filas = _leer_json_antiguo(archivo_json)
+        if filas is None:
+            return
+
+        with self._lock:
+            self._asegurar_vista()
+            # Lo ya registrado en el journal prevalece
+            for fila in filas:
+                if fila['tipo'] not in self._vista.get((fila['usuario'], fila['fecha']), {}):
+                    self._anexar({'op': 'guardar', **fila})
+                    self._aplicar_guardar(self._vista, fila)
+            self._firma_vista = self._firma()
+
+        _marcar_migrado(archivo_json, len(filas), "journal")
+
+_registro: Optional[_RegistroBase] = None
+_registro_lock = threading.Lock()
+
+def get_registro() -> _RegistroBase:
+    """
+    Retorna el registro de ejecuciones del proceso
+
+    SQLite/WAL (src/logs/registro_ejecuciones.db) salvo con GEOVICTORIA_REGISTRO=journal
+    o si la base no admite WAL; entonces journal append-only (registro_ejecuciones.journal.jsonl)
+    """
+    global _registro
+    with _registro_lock:
+        if _registro is None:
+            if os.getenv("GEOVICTORIA_REGISTRO", "sqlite").lower() == "journal":
+                _registro = RegistroJournal()
+            else:
+                try:
+                    _registro = RegistroEjecuciones()
+                except sqlite3.Error as e:
+                    logger.warning(f"⚠️ Registro SQLite no disponible ({e}) - Usando journal append-only")
+                    _registro = RegistroJournal()
+        return _registro
@@ -0,0 +1,92 @@
+"""
+Almacén de sesiones autenticadas de GeoVictoria
+Guarda el storage_state de Playwright por cuenta para evitar el formulario de login
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Dict
+
+logger = logging.getLogger(__name__)
+
+class AlmacenSesiones:
+    """Persistencia de storage_state (cookies + localStorage) por cuenta"""
+
+    def __init__(self, directorio: Path, max_edad_horas: float = 12):
+        """
+        Args:
+            directorio: Carpeta donde se guardan los archivos de sesión
+            max_edad_horas: Antigüedad máxima antes de descartar una sesión guardada
+        """
+        self._directorio = Path(directorio)
+        self._max_edad = max_edad_horas * 3600
+        self._lock = threading.Lock()
+
+    def _ruta(self, usuario: str) -> Path:
+        # El nombre del archivo no expone el usuario
+        nombre = hashlib.sha256(usuario.encode('utf-8')).hexdigest()[:16]
+        return self._directorio / f"sesion_{nombre}.json"
+
+    def obtener(self, usuario: str) -> Optional[Dict]:
+        """
+        Retorna el storage_state guardado para la cuenta si existe y no es muy antiguo
+
+        Returns:
+            Diccionario apto para new_context(storage_state=...) o None
+        """
+        ruta = self._ruta(usuario)
+        try:
+            with self._lock:
+                if not ruta.exists():
+                    return None
+                edad = time.time() - ruta.stat().st_mtime
+                if edad > self._max_edad:
+                    logger.debug(f"🔑 Sesión guardada expirada ({edad / 3600:.1f} h) - Se descarta")
+                    ruta.unlink()
+                    return None
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ Error leyendo sesión guardada: {e}")
+            return None
+
+    async def guardar(self, context, usuario: str) -> None:
+        """Guarda el storage_state actual del contexto (escritura atómica)"""
+        try:
+            estado = await context.storage_state()
+            ruta = self._ruta(usuario)
+            with self._lock:
+                self._directorio.mkdir(parents=True, exist_ok=True)
+                temporal = ruta.with_suffix('.tmp')
+                with open(temporal, 'w', encoding='utf-8') as f:
+                    json.dump(estado, f)
+                try:
+                    os.chmod(temporal, 0o600)  # Contiene cookies de autenticación
+                except OSError:
+                    pass
+                os.replace(temporal, ruta)
+            logger.debug("💾 Sesión autenticada guardada")
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo guardar la sesión: {e}")
+
+    def invalidar(self, usuario: str) -> None:
+        """Elimina la sesión guardada para forzar un login completo"""
+        try:
+            with self._lock:
+                ruta = self._ruta(usuario)
+                if ruta.exists():
+                    ruta.unlink()
+                    logger.debug("🔑 Sesión guardada invalidada")
+        except Exception as e:
+            logger.warning(f"⚠️ Error invalidando sesión: {e}")
+
+# Instancia global del almacén
+_almacen_global = AlmacenSesiones(Path(__file__).parent / "logs" / "sesiones")
+
+def get_almacen_sesiones() -> AlmacenSesiones:
+    """Retorna la instancia global del almacén de sesiones"""
+    return _almacen_global
@@ -0,0 +1,338 @@
+"""
+Servidor local que imita el flujo de GeoVictoria para pruebas y benchmarks
+Login con #user y contraseña, redirección al portal, iframe "gvportal" con los
+botones "Marcar Entrada"/"Marcar Salida", latencias configurables e inyección de fallos
+
+Uso:
+    python src/simulador_geovictoria.py --puerto 8765 --latencia-iframe 300
+"""
+import argparse
+import json
+import random
+import secrets
+import threading
+import time
+from http.cookies import SimpleCookie
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional
+from urllib.parse import urlparse, parse_qs, quote
+
+class OpcionesSimulador:
+    """Latencias (ms) y probabilidades de fallo del simulador"""
+
+    def __init__(self, latencia_login: int = 150, latencia_portal: int = 100,
+                 latencia_iframe: int = 300, latencia_boton: int = 200,
+                 latencia_marcar: int = 150, jitter: float = 0.2,
+                 prob_error_login: float = 0.0, prob_sin_iframe: float = 0.0,
+                 prob_sin_boton: float = 0.0, prob_error_marcar: float = 0.0,
+                 password_valida: Optional[str] = None, semilla: Optional[int] = None):
+        """
+        Args:
+            latencia_login: Respuesta del formulario y del POST de login
+            latencia_portal: Respuesta de la página principal y del iframe
+            latencia_iframe: Retraso (en el navegador) antes de adjuntar el iframe
+            latencia_boton: Retraso (en el navegador) antes de mostrar el botón
+            latencia_marcar: Respuesta del endpoint de marcaje
+            jitter: Variación relativa aleatoria aplicada a cada latencia
+            prob_error_login: Probabilidad de responder 500 al login
+            prob_sin_iframe: Probabilidad de que el portal no inserte el iframe
+            prob_sin_boton: Probabilidad de que el iframe no muestre ningún botón
+            prob_error_marcar: Probabilidad de que el marcaje responda 500
+            password_valida: Si se indica, única contraseña aceptada
+            semilla: Semilla aleatoria para ejecuciones repetibles
+        """
+        self.latencia_login = latencia_login
+        self.latencia_portal = latencia_portal
+        self.latencia_iframe = latencia_iframe
+        self.latencia_boton = latencia_boton
+        self.latencia_marcar = latencia_marcar
+        self.jitter = jitter
+        self.prob_error_login = prob_error_login
+        self.prob_sin_iframe = prob_sin_iframe
+        self.prob_sin_boton = prob_sin_boton
+        self.prob_error_marcar = prob_error_marcar
+        self.password_valida = password_valida
+        self.random = random.Random(semilla)
+
+    def latencia(self, base_ms: int) -> float:
+        """Latencia con jitter en segundos"""
+        if base_ms <= 0:
+            return 0.0
+        factor = 1 + self.random.uniform(-self.jitter, self.jitter)
+        return base_ms * factor / 1000
+
+    def falla(self, probabilidad: float) -> bool:
+        return probabilidad > 0 and self.random.random() < probabilidad
+
+# Escenarios predefinidos: sobrescriben las opciones indicadas
+ESCENARIOS = {
+    'normal': {},
+    # La SPA del iframe tarda en mostrar los botones (más que Config.BUTTON_TIMEOUT)
+    'render_lento': {'latencia_boton': 8000},
+}
+
+PAGINA_LOGIN = """<!DOCTYPE html>
+<html><head><title>GeoVictoria - Login</title></head>
+<body>
+  <form method="post" action="/account/login?ReturnUrl=%2f">
+    <input id="user" name="user" type="text" autocomplete="username">
+    <input name="password" type="password" autocomplete="current-password">
+    <button type="submit">Ingresar</button>
+  </form>
+  {error}
+</body></html>"""
+
+PAGINA_PRINCIPAL = """<!DOCTYPE html>
+<html><head><title>GeoVictoria</title></head>
+<body>
+  <h1>Portal</h1>
+  <div id="contenedor"></div>
+  <script>
+    setTimeout(function () {{
+      if (!{insertar}) return;
+      var f = document.createElement('iframe');
+      f.src = '{url_iframe}';
+      f.width = 800; f.height = 400;
+      document.getElementById('contenedor').appendChild(f);
+    }}, {retraso});
+  </script>
+</body></html>"""
+
+PAGINA_IFRAME = """<!DOCTYPE html>
+<html><head><title>gvportal</title></head>
+<body>
+  <div id="marcaje"></div>
+  <script>
+    function mostrar(accion) {{
+      var c = document.getElementById('marcaje');
+      c.innerHTML = '';
+      if (!accion) return;
+      var b = document.createElement('button');
+      b.textContent = 'Marcar ' + accion;
+      b.onclick = function () {{
+        fetch('/api/marcar?u={usuario}', {{method: 'POST'}})
+          .then(function (r) {{ return r.json(); }})
+          .then(function (d) {{ mostrar(d.siguiente); }});
+      }};
+      c.appendChild(b);
+    }}
+    setTimeout(function () {{ mostrar({accion}); }}, {retraso});
+  </script>
+</body></html>"""
+
+class SimuladorGeoVictoria:
+    """Servidor HTTP en un hilo de fondo que imita el portal de GeoVictoria
+
+    El login se sirve en `localhost` y el iframe en `127.0.0.1` (mismo puerto),
+    de modo que son orígenes distintos como en producción.
+    """
+
+    def __init__(self, puerto: int = 0, opciones: OpcionesSimulador = None):
+        self.opciones = opciones or OpcionesSimulador()
+        self._sesiones: Dict[str, str] = {}       # token -> usuario
+        self._estado: Dict[str, str] = {}         # usuario -> botón disponible
+        self._contadores = {'logins': 0, 'sesiones_reutilizadas': 0, 'portales': 0,
+                            'iframes': 0, 'marcajes': 0, 'fallos_inyectados': 0}
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', puerto), self._crear_handler())
+        self._servidor.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def puerto(self) -> int:
+        return self._servidor.server_address[1]
+
+    @property
+    def login_url(self) -> str:
+        return f"http://localhost:{self.puerto}/account/login?ReturnUrl=%2f"
+
+    @property
+    def iframe_domain(self) -> str:
+        return f"127.0.0.1:{self.puerto}"
+
+    def iniciar(self) -> 'SimuladorGeoVictoria':
+        self._hilo = threading.Thread(target=self._servidor.serve_forever,
+                                      name="simulador-geovictoria", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def configurar_geovictoria(self) -> None:
+        """Apunta Config.LOGIN_URL y Config.IFRAME_DOMAIN de src.geovictoria al simulador"""
+        from src.geovictoria import Config
+        Config.LOGIN_URL = self.login_url
+        Config.IFRAME_DOMAIN = self.iframe_domain
+
+    def estado_usuario(self, usuario: str) -> str:
+        with self._lock:
+            return self._estado.get(usuario, "Entrada")
+
+    def contadores(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._contadores)
+
+    def _contar(self, clave: str) -> None:
+        with self._lock:
+            self._contadores[clave] += 1
+
+    def _crear_handler(self):
+        simulador = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, formato, *args):
+                pass  # Silencioso: el benchmark mide, no registra
+
+            def _usuario_sesion(self) -> Optional[str]:
+                cookies = SimpleCookie(self.headers.get('Cookie', ''))
+                token = cookies.get('gv_sesion')
+                if token is None:
+                    return None
+                with simulador._lock:
+                    return simulador._sesiones.get(token.value)
+
+            def _responder(self, codigo: int, cuerpo: str = "", tipo: str = "text/html",
+                           cabeceras: Dict[str, str] = None):
+                datos = cuerpo.encode('utf-8')
+                self.send_response(codigo)
+                self.send_header('Content-Type', f"{tipo}; charset=utf-8")
+                self.send_header('Content-Length', str(len(datos)))
+                for nombre, valor in (cabeceras or {}).items():
+                    self.send_header(nombre, valor)
+                self.end_headers()
+                self.wfile.write(datos)
+
+            def _redirigir(self, destino: str, cabeceras: Dict[str, str] = None):
+                self._responder(302, cabeceras={'Location': destino, **(cabeceras or {})})
+
+            def do_GET(self):
+                ruta = urlparse(self.path)
+                opciones = simulador.opciones
+
+                if ruta.path == '/account/login':
+                    time.sleep(opciones.latencia(opciones.latencia_login))
+                    if self._usuario_sesion():
+                        simulador._contar('sesiones_reutilizadas')
+                        return self._redirigir('/')
+                    return self._responder(200, PAGINA_LOGIN.format(error=""))
+
+                if ruta.path == '/':
+                    time.sleep(opciones.latencia(opciones.latencia_portal))
+                    usuario = self._usuario_sesion()
+                    if not usuario:
+                        return self._redirigir('/account/login?ReturnUrl=%2f')
+                    simulador._contar('portales')
+                    insertar = not opciones.falla(opciones.prob_sin_iframe)
+                    if not insertar:
+                        simulador._contar('fallos_inyectados')
+                    url_iframe = f"http://{simulador.iframe_domain}/portal?u={quote(usuario)}"
+                    return self._responder(200, PAGINA_PRINCIPAL.format(
+                        insertar='true' if insertar else 'false',
+                        url_iframe=url_iframe,
+                        retraso=int(opciones.latencia(opciones.latencia_iframe) * 1000)
+                    ))
+
+                if ruta.path == '/portal':
+                    time.sleep(opciones.latencia(opciones.latencia_portal))
+                    simulador._contar('iframes')
+                    usuario = parse_qs(ruta.query).get('u', [''])[0]
+                    accion = simulador.estado_usuario(usuario)
+                    if opciones.falla(opciones.prob_sin_boton):
+                        simulador._contar('fallos_inyectados')
+                        accion = None
+                    return self._responder(200, PAGINA_IFRAME.format(
+                        usuario=quote(usuario),
+                        accion=json.dumps(accion),
+                        retraso=int(opciones.latencia(opciones.latencia_boton) * 1000)
+                    ))
+
+                if ruta.path == '/stats':
+                    return self._responder(200, json.dumps(simulador.contadores()), tipo="application/json")
+
+                self._responder(404, "No encontrado")
+
+            def do_POST(self):
+                ruta = urlparse(self.path)
+                opciones = simulador.opciones
+                longitud = int(self.headers.get('Content-Length', 0) or 0)
+                cuerpo = self.rfile.read(longitud).decode('utf-8') if longitud else ""
+
+                if ruta.path == '/account/login':
+                    time.sleep(opciones.latencia(opciones.latencia_login))
+                    if opciones.falla(opciones.prob_error_login):
+                        simulador._contar('fallos_inyectados')
+                        return self._responder(500, "Error interno simulado")
+                    datos = parse_qs(cuerpo)
+                    usuario = datos.get('user', [''])[0]
+                    password = datos.get('password', [''])[0]
+                    valida = password if opciones.password_valida is None else opciones.password_valida
+                    if not usuario or not password or password != valida:
+                        return self._responder(200, PAGINA_LOGIN.format(error="<p>Credenciales inválidas</p>"))
+                    token = secrets.token_hex(16)
+                    with simulador._lock:
+                        simulador._sesiones[token] = usuario
+                    simulador._contar('logins')
+                    return self._redirigir('/', {'Set-Cookie': f"gv_sesion={token}; Path=/; HttpOnly"})
+
+                if ruta.path == '/api/marcar':
+                    time.sleep(opciones.latencia(opciones.latencia_marcar))
+                    if opciones.falla(opciones.prob_error_marcar):
+                        simulador._contar('fallos_inyectados')
+                        return self._responder(500, json.dumps({'error': 'simulado'}), tipo="application/json")
+                    usuario = parse_qs(ruta.query).get('u', [''])[0]
+                    with simulador._lock:
+                        actual = simulador._estado.get(usuario, "Entrada")
+                        siguiente = "Salida" if actual == "Entrada" else "Entrada"
+                        simulador._estado[usuario] = siguiente
+                        simulador._contadores['marcajes'] += 1
+                    return self._responder(200, json.dumps({'marcado': actual, 'siguiente': siguiente}),
+                                           tipo="application/json")
+
+                self._responder(404, "No encontrado")
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulador local de GeoVictoria")
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--latencia-login', type=int, default=150)
+    parser.add_argument('--latencia-portal', type=int, default=100)
+    parser.add_argument('--latencia-iframe', type=int, default=300)
+    parser.add_argument('--latencia-boton', type=int, default=200)
+    parser.add_argument('--latencia-marcar', type=int, default=150)
+    parser.add_argument('--prob-error-login', type=float, default=0.0)
+    parser.add_argument('--prob-sin-iframe', type=float, default=0.0)
+    parser.add_argument('--prob-sin-boton', type=float, default=0.0)
+    parser.add_argument('--prob-error-marcar', type=float, default=0.0)
+    parser.add_argument('--escenario', choices=sorted(ESCENARIOS), default='normal',
+                        help="Escenario predefinido (sobrescribe las opciones que define)")
+    args = parser.parse_args()
+
+    valores = dict(
+        latencia_login=args.latencia_login, latencia_portal=args.latencia_portal,
+        latencia_iframe=args.latencia_iframe, latencia_boton=args.latencia_boton,
+        latencia_marcar=args.latencia_marcar, prob_error_login=args.prob_error_login,
+        prob_sin_iframe=args.prob_sin_iframe, prob_sin_boton=args.prob_sin_boton,
+        prob_error_marcar=args.prob_error_marcar
+    )
+    valores.update(ESCENARIOS[args.escenario])
+    opciones = OpcionesSimulador(**valores)
+    simulador = SimuladorGeoVictoria(args.puerto, opciones).iniciar()
+
+    print("=" * 70)
+    print(f"🧪 Simulador GeoVictoria escuchando en el puerto {simulador.puerto}")
+    print("   Apunte el marcaje al simulador con estas variables de entorno:")
+    print(f"   GEOVICTORIA_LOGIN_URL={simulador.login_url}")
+    print(f"   GEOVICTORIA_IFRAME_DOMAIN={simulador.iframe_domain}")
+    print("   Presione Ctrl+C para detener")
+    print("=" * 70)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulador.detener()
+
+if __name__ == "__main__":
+    main()
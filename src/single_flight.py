@@ -0,0 +1,70 @@
+"""
+Deduplicación "single-flight" de operaciones asíncronas
+Si varias corrutinas piden la misma clave a la vez, solo una ejecuta la
+operación y las demás esperan su resultado
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable, Any
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución"""
+
+    def __init__(self, nombre: str = "operación"):
+        """
+        Args:
+            nombre: Nombre descriptivo para los logs
+        """
+        self._nombre = nombre
+        self._en_vuelo: Dict[Hashable, asyncio.Future] = {}
+        self._esperando: Dict[Hashable, int] = {}
+        self._ejecuciones = 0
+        self._coalescidas = 0
+
+    async def ejecutar(self, clave: Hashable, operacion: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Ejecuta `operacion()` o se une a la ejecución en curso para `clave`
+
+        Args:
+            clave: Identificador de la operación (ej. la cuenta)
+            operacion: Función sin argumentos que retorna el awaitable a ejecutar
+
+        Returns:
+            El resultado de la ejecución (compartido entre todos los llamadores)
+        """
+        tarea = self._en_vuelo.get(clave)
+        if tarea is not None and not tarea.done():
+            self._coalescidas += 1
+            self._esperando[clave] = self._esperando.get(clave, 0) + 1
+            logger.debug(f"🔗 {self._nombre} en curso para {clave} - Esperando su resultado")
+            # shield: cancelar a un llamador no cancela la operación de los demás
+            return await asyncio.shield(tarea)
+
+        tarea = asyncio.ensure_future(operacion())
+        self._en_vuelo[clave] = tarea
+        self._esperando[clave] = 0
+        self._ejecuciones += 1
+        tarea.add_done_callback(lambda t: self._terminar(clave, t))
+        return await asyncio.shield(tarea)
+
+    def _terminar(self, clave: Hashable, tarea: asyncio.Future) -> None:
+        if self._en_vuelo.get(clave) is tarea:
+            del self._en_vuelo[clave]
+            esperando = self._esperando.pop(clave, 0)
+            if esperando:
+                logger.info(f"🔗 {self._nombre}: {esperando} llamada(s) concurrente(s) reutilizaron una sola ejecución")
+
+    def en_curso(self, clave: Hashable) -> bool:
+        """True si ya hay una ejecución en curso para `clave`"""
+        tarea = self._en_vuelo.get(clave)
+        return tarea is not None and not tarea.done()
+
+    def estadisticas(self) -> Dict[str, int]:
+        """Ejecuciones reales, llamadas coalescidas y operaciones en curso"""
+        return {
+            'ejecuciones': self._ejecuciones,
+            'coalescidas': self._coalescidas,
+            'en_vuelo': len(self._en_vuelo),
+        }
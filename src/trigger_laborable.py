@@ -0,0 +1,54 @@
+"""
+Trigger de APScheduler que no dispara en festivos de Colombia
+Envuelve un CronTrigger y, al calcular la próxima ejecución, salta los días
+festivos: el programador no se despierta en festivos y get_jobs() muestra
+la próxima ejecución real en día laborable.
+"""
+import logging
+from datetime import date, datetime, time, timedelta
+
+from apscheduler.triggers.base import BaseTrigger
+from apscheduler.triggers.cron import CronTrigger
+
+from src.festivos_colombia import es_festivo
+
+logger = logging.getLogger(__name__)
+
+# Tope de días festivos seguidos que se saltan antes de rendirse
+MAX_FESTIVOS_SEGUIDOS = 31
+
+class CronTriggerLaborable(BaseTrigger):
+    """CronTrigger que omite los festivos (los argumentos son los de CronTrigger)"""
+
+    def __init__(self, **kwargs):
+        self.cron = CronTrigger(**kwargs)
+        self.festivos_omitidos = 0
+
+    def _inicio_del_dia(self, dia: date) -> datetime:
+        zona = self.cron.timezone
+        if hasattr(zona, 'localize'):  # pytz
+            return zona.localize(datetime.combine(dia, time.min))
+        return datetime.combine(dia, time.min, tzinfo=zona)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        siguiente = self.cron.get_next_fire_time(previous_fire_time, now)
+        for _ in range(MAX_FESTIVOS_SEGUIDOS):
+            if siguiente is None or not es_festivo(siguiente.date()):
+                return siguiente
+            logger.debug(f"🎉 {siguiente.date()} es festivo - Se omite la ejecución de las {siguiente:%H:%M}")
+            self.festivos_omitidos += 1
+            siguiente = self.cron.get_next_fire_time(None, self._inicio_del_dia(siguiente.date() + timedelta(days=1)))
+        return siguiente
+
+    def __getstate__(self):
+        return {'version': 1, 'cron': self.cron}
+
+    def __setstate__(self, state):
+        self.cron = state['cron']
+        self.festivos_omitidos = 0
+
+    def __str__(self):
+        return f"{self.cron} sin festivos"
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} ({self.cron!r})>"